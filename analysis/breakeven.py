@@ -0,0 +1,126 @@
+import argparse, json, re
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from compute_gc import KEYS
+from runs_io import load_runs, runs_available
+
+# Amortized break-even of generated variants: how many production executions it
+# takes for a variant's per-run energy savings (vs the task's *_baseline variants,
+# as in compute_gc.py) to repay the energy spent generating it.
+#
+#   break_even_runs             = gen_energy_j / (energy_base_j - energy_j)
+#   break_even_runs_incremental = (gen_energy_j - gen_base_j) / (energy_base_j - energy_j)
+#
+# The incremental form only charges what the prompt costs beyond generating with
+# the baseline prompt. 0 = repaid from the first run; inf = never (no per-run saving).
+# Per-run energy depends on the workload and its size, so savings (and break-even)
+# are computed per task × workload × n × workers, as PDs are in compute_gc.py.
+
+def variant_name(model: str, prompt: str) -> str:
+    # same as harness.sweep.variant_name / the Makefile
+    return re.sub(r"[:/.]", "_", f"{model}_{prompt}")
+
+def load_generation_energy(jsonl: str, emissions_csv: str) -> pd.DataFrame:
+    """
+    Generation energy (J) per task × variant: the calls of one generation
+    (first call plus repairs, sharing a generation_id) are summed, then averaged
+    over generations. Records from harness.generate --with-codecarbon carry
+    energy_j; older ones are matched to CodeCarbon's emissions.csv row with the
+    same emissions_kg. Records without a generation_id count as one generation each.
+    """
+    recs = [json.loads(l) for l in Path(jsonl).read_text(encoding="utf-8").splitlines() if l.strip()]
+    df = pd.DataFrame(recs)
+    if df.empty:
+        return pd.DataFrame(columns=["task_id","variant","generations","gen_calls","gen_energy_j"])
+    df = df[df.get("jobs", pd.Series(1, index=df.index)).fillna(1) == 1].copy()  # batch records span variants
+    if "energy_j" not in df.columns:
+        df["energy_j"] = np.nan
+    if Path(emissions_csv).exists():
+        em = pd.read_csv(emissions_csv)
+        em = em[em["project_name"] == "llm_generation"]
+        kwh = em["energy_consumed"].to_numpy(float)
+        kg = em["emissions"].to_numpy(float)
+        def match(e):
+            i = np.flatnonzero(np.isclose(kg, e, rtol=1e-9, atol=0))
+            return kwh[i[0]] * 3.6e6 if len(i) else np.nan
+        missing = df["energy_j"].isna()
+        df.loc[missing, "energy_j"] = df.loc[missing, "emissions_kg"].map(match)
+    df["variant"] = [variant_name(m, p) for m, p in zip(df["model"], df["prompt"])]
+    gid = df["generation_id"] if "generation_id" in df.columns else pd.Series(np.nan, index=df.index)
+    df["generation_id"] = gid.fillna(pd.Series([f"record:{i}" for i in df.index], index=df.index))
+    per_gen = df.groupby(["task_id","variant","generation_id"]).agg(
+        calls=("energy_j","count"), energy_j=("energy_j", lambda e: e.sum(min_count=1))).reset_index()
+    return per_gen.groupby(["task_id","variant"]).agg(generations=("energy_j","count"), gen_calls=("calls","sum"),
+                                                      gen_energy_j=("energy_j","mean")).reset_index()
+
+def breakeven_table(runs: pd.DataFrame, gen: pd.DataFrame) -> pd.DataFrame:
+    runs = runs[runs["correct"] == 1].copy()
+    runs["workload"] = runs["workload"].fillna(runs["task_id"])  # runs recorded before named workloads
+    for c in ("n", "workers"):
+        runs[c] = runs[c].astype(float)
+    run = runs.groupby(KEYS + ["variant"], dropna=False).agg(energy_j=("energy_j","mean")).reset_index()
+    df = run.merge(gen, on=["task_id","variant"], how="left")
+    base = df[df["variant"].str.endswith("_baseline")].groupby(KEYS, dropna=False).agg(
+        energy_base_j=("energy_j","mean"), gen_base_j=("gen_energy_j","mean")).reset_index()
+    df = df.merge(base, on=KEYS, how="left")
+    df["saving_per_run_j"] = df["energy_base_j"] - df["energy_j"]
+    df["extra_gen_j"] = df["gen_energy_j"] - df["gen_base_j"]
+    df["break_even_runs"] = _runs_to_repay(df["gen_energy_j"], df["saving_per_run_j"])
+    df["break_even_runs_incremental"] = _runs_to_repay(df["extra_gen_j"], df["saving_per_run_j"])
+    return df
+
+def _runs_to_repay(cost: pd.Series, saving: pd.Series) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        be = np.where(saving <= 0, np.inf, np.where(cost <= 0, 0.0, cost / saving))
+    return np.where(cost.isna() | saving.isna(), np.nan, be)
+
+def plot(table: pd.DataFrame, out: str, call_volume: float):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("[WARN] matplotlib not installed; skipping plot")
+        return
+    t = table[~table["variant"].str.endswith("_baseline")].dropna(subset=["break_even_runs"])
+    if t.empty:
+        return
+    finite = t["break_even_runs"].replace(np.inf, np.nan)
+    cap = max(finite.max() if finite.notna().any() else 1.0, call_volume) * 10
+    size = lambda r: "" if pd.isna(r.n) else f" n={r.n:g}"
+    labels = [f"{r.workload}{size(r)}\n{r.variant}" for r in t.itertuples()]
+    vals = t["break_even_runs"].replace(np.inf, cap).clip(lower=1)
+    fig, ax = plt.subplots(figsize=(9, 0.35 * len(t) + 1.5))
+    ax.barh(labels, vals, color=["tab:red" if v == np.inf else "tab:green" for v in t["break_even_runs"]])
+    ax.axvline(call_volume, color="k", ls="--", label=f"call volume ({call_volume:g})")
+    ax.set_xscale("log")
+    ax.set_xlabel("executions to repay generation energy (red = never)")
+    ax.tick_params(axis="y", labelsize=6)
+    ax.legend(loc="lower right")
+    fig.tight_layout()
+    fig.savefig(out, dpi=150)
+    print(f"Saved: {out}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", default="", help="Read this runs.csv instead of the results store")
+    ap.add_argument("--gen-log", default="data/raw/codecarbon_generation.jsonl")
+    ap.add_argument("--emissions", default="data/raw/emissions.csv")
+    ap.add_argument("--out", default="data/derived/breakeven_table.csv")
+    ap.add_argument("--plot", default="data/derived/breakeven.png")
+    ap.add_argument("--call-volume", type=float, default=1e6,
+                    help="Expected production executions; variants that break even below it are worth generating")
+    args = ap.parse_args()
+
+    source = dict(db=None, csv=Path(args.runs)) if args.runs else {}
+    if not runs_available(**source) or not Path(args.gen_log).exists():
+        raise SystemExit("Need measured runs and the generation CodeCarbon log. Run the harness with --with-codecarbon first.")
+    runs = load_runs(where={"correct": 1}, columns=KEYS + ["variant","energy_j","correct"], **source)
+    table = breakeven_table(runs, load_generation_energy(args.gen_log, args.emissions))
+    table["worth_it"] = table["break_even_runs"] <= args.call_volume
+    table.to_csv(args.out, index=False)
+    print(f"Saved: {args.out}")
+    cols = KEYS + ["variant","saving_per_run_j","gen_energy_j","break_even_runs","break_even_runs_incremental","worth_it"]
+    print(table[~table["variant"].str.endswith("_baseline")][cols].to_string(index=False))
+    plot(table, args.plot, args.call_volume)
@@ -1,49 +1,218 @@
+import argparse, sqlite3
+from contextlib import closing
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from runs_io import DB_FILE, load_runs, max_run_id, runs_available
 
-runs_path = Path("data/derived/runs.csv")
-if not runs_path.exists():
-    raise SystemExit("No runs.csv found. Run the harness first.")
-
-df = pd.read_csv(runs_path)
-
-# Aggregate per task × variant
-agg = df.groupby(["task_id","variant"]).agg(
-    runtime_s=("runtime_s","mean"),
-    mem_kib=("mem_kib","mean"),
-    flops=("flops","mean"),
-    energy_j=("energy_j","mean"),
-    correct=("correct","max"),
-    n=("runtime_s","size")
-).reset_index()
-
-# Baseline join - find variants that end with "_baseline"
-base = agg[agg["variant"].str.endswith("_baseline")][["task_id","variant","runtime_s","mem_kib","flops","energy_j"]].rename(columns={
-    "runtime_s":"runtime_base","mem_kib":"mem_base","flops":"flops_base","energy_j":"energy_base"
-})
-
-# For multiple baseline variants per task, take the mean
-base = base.groupby("task_id").agg(
-    runtime_base=("runtime_base","mean"),
-    mem_base=("mem_base","mean"), 
-    flops_base=("flops_base","mean"),
-    energy_base=("energy_base","mean")
-).reset_index()
-merged = agg.merge(base, on="task_id", how="left")
-
-# PDs (masked by correctness)
-merged["pd_runtime"] = (merged["runtime_base"] - merged["runtime_s"]) / merged["runtime_base"]
-merged["pd_memory"]  = (merged["mem_base"]     - merged["mem_kib"])  / merged["mem_base"]
-merged["pd_flops"]   = (merged["flops_base"]   - merged["flops"])    / merged["flops_base"]
-merged["pd_energy"]  = (merged["energy_base"]  - merged["energy_j"]) / merged["energy_base"]
-
-for c in ["pd_runtime","pd_memory","pd_flops","pd_energy"]:
-    merged[c] = merged[c].fillna(0.0) * merged["correct"]
-
-# GC = sum of positive PDs
-merged["gc"] = merged[["pd_runtime","pd_memory","pd_energy","pd_flops"]].clip(lower=0).sum(axis=1)
-
-merged[["task_id","variant","correct","pd_runtime","pd_memory","pd_flops","pd_energy"]].to_csv("data/derived/pd_table.csv", index=False)
-merged[["task_id","variant","gc","correct"]].to_csv("data/derived/gc_table.csv", index=False)
-
-print("Saved: data/derived/pd_table.csv, data/derived/gc_table.csv")
+# Aggregate per task × workload × size × workers × variant (PDs only compare runs of the same workload)
+KEYS = ["task_id","workload","n","workers"]
+GROUP = KEYS + ["variant"]
+METRICS = ["runtime_s","mem_kib","flops","energy_j"]
+PD_FILE = Path("data/derived/pd_table.csv")
+GC_FILE = Path("data/derived/gc_table.csv")
+PD_NAMES = {"runtime_s":"pd_runtime","mem_kib":"pd_memory","flops":"pd_flops","energy_j":"pd_energy"}
+BASE_NAMES = {"runtime_s":"runtime_base","mem_kib":"mem_base","flops":"flops_base","energy_j":"energy_base"}
+Z95 = 1.959963984540054
+PD_COLS = ["task_id","workload","variant","n","workers","correct","pd_runtime","pd_memory","pd_flops","pd_energy"] \
+    + [f"{pd_}_{b}" for pd_ in PD_NAMES.values() for b in ("lo", "hi")]
+GC_COLS = ["task_id","workload","variant","n","workers","gc","correct"]
+
+# Incremental mode keeps per-group running state and the last folded-in run_id in the
+# results store, so each call only reads runs appended since the previous one and
+# only recomputes PD/GC rows for the (task, workload, n, workers) keys they touch.
+# The state per metric is (count, mean, M2 = sum of squared deviations), merged with
+# Chan et al.'s parallel update: unlike raw sums of squares it does not cancel
+# catastrophically for large flops / energy_j values.
+STATE_TABLE = "gc_groups"
+SUM_COLS = [f"{m}_{s}" for m in METRICS for s in ("cnt", "mean", "m2")] + ["runs"]
+
+def group_sums(df: pd.DataFrame) -> pd.DataFrame:
+    """Per-group metric count, mean and M2 (non-null values), max(correct) and run count."""
+    g = df.groupby(GROUP, dropna=False)
+    out = g.agg(correct=("correct","max"), runs=("runtime_s","size"))
+    for m in METRICS:
+        cnt = g[m].count()
+        out[f"{m}_cnt"] = cnt
+        out[f"{m}_mean"] = g[m].mean()
+        out[f"{m}_m2"] = (g[m].var(ddof=0) * cnt).fillna(0.0)
+    return out.reset_index()[GROUP + SUM_COLS + ["correct"]]
+
+def combine(*parts: pd.DataFrame) -> pd.DataFrame:
+    parts = [p for p in parts if p is not None and not p.empty]
+    if len(parts) < 2:
+        return parts[0] if parts else pd.DataFrame(columns=GROUP + SUM_COLS + ["correct"])
+    both = pd.concat(parts, ignore_index=True)
+    ids = both.groupby(GROUP, dropna=False).ngroup()
+    g = both.groupby(ids)
+    out = g[GROUP].first().assign(runs=g["runs"].sum(), correct=g["correct"].max())
+    for m in METRICS:
+        cnt, mean = both[f"{m}_cnt"], both[f"{m}_mean"]
+        n = cnt.groupby(ids).sum()
+        mu = (cnt * mean.fillna(0.0)).groupby(ids).sum() / n.where(n > 0)
+        dev = cnt * (mean - ids.map(mu)) ** 2
+        out[f"{m}_cnt"] = n
+        out[f"{m}_mean"] = mu
+        out[f"{m}_m2"] = both[f"{m}_m2"].groupby(ids).sum() + dev.fillna(0.0).groupby(ids).sum()
+    return out.reset_index(drop=True)[GROUP + SUM_COLS + ["correct"]]
+
+def pd_gc(sums: pd.DataFrame) -> pd.DataFrame:
+    """PD and GC rows for every group in `sums` (each key must include all its variants)."""
+    agg = sums[GROUP].copy()
+    agg["correct"] = sums["correct"].astype(int)  # stored state is REAL
+    agg["runs"] = sums["runs"].astype(int)
+    for m in METRICS:
+        cnt = sums[f"{m}_cnt"]
+        agg[m] = sums[f"{m}_mean"].where(cnt > 0)  # mean of non-null values, NaN when none
+        var = (sums[f"{m}_m2"] / (cnt - 1)).where(cnt >= 2)
+        agg[f"{m}_sem2"] = var / cnt  # squared standard error of the mean
+
+    # Baseline join - find variants that end with "_baseline"
+    base = agg[agg["variant"].str.endswith("_baseline")][KEYS + ["variant","runtime_s","mem_kib","flops","energy_j"]].rename(columns={
+        "runtime_s":"runtime_base","mem_kib":"mem_base","flops":"flops_base","energy_j":"energy_base"
+    })
+
+    # For multiple baseline variants per task, take the mean
+    base = base.groupby(KEYS, dropna=False).agg(
+        runtime_base=("runtime_base","mean"),
+        mem_base=("mem_base","mean"),
+        flops_base=("flops_base","mean"),
+        energy_base=("energy_base","mean")
+    ).reset_index()
+    merged = agg.merge(base, on=KEYS, how="left").merge(_base_sem2(agg), on=KEYS, how="left")
+
+    # PDs (masked by correctness)
+    merged["pd_runtime"] = (merged["runtime_base"] - merged["runtime_s"]) / merged["runtime_base"]
+    merged["pd_memory"]  = (merged["mem_base"]     - merged["mem_kib"])  / merged["mem_base"]
+    merged["pd_flops"]   = (merged["flops_base"]   - merged["flops"])    / merged["flops_base"]
+    merged["pd_energy"]  = (merged["energy_base"]  - merged["energy_j"]) / merged["energy_base"]
+
+    for c in ["pd_runtime","pd_memory","pd_flops","pd_energy"]:
+        merged[c] = merged[c].fillna(0.0) * merged["correct"]
+
+    # 95% CIs: delta method on the ratio of means, PD = 1 - mean / mean_base
+    for m, pd_ in PD_NAMES.items():
+        b = merged[BASE_NAMES[m]]
+        ratio = merged[m] / b
+        se = ratio.abs() * np.sqrt(merged[f"{m}_sem2"] / merged[m] ** 2 + merged[f"{m}_base_sem2"] / b ** 2)
+        raw = 1 - ratio
+        ok = (merged["correct"] == 1) & np.isfinite(raw) & np.isfinite(se)
+        merged[f"{pd_}_lo"] = (raw - Z95 * se).where(ok)
+        merged[f"{pd_}_hi"] = (raw + Z95 * se).where(ok)
+
+    # GC = sum of positive PDs
+    merged["gc"] = merged[["pd_runtime","pd_memory","pd_energy","pd_flops"]].clip(lower=0).sum(axis=1)
+    return merged
+
+def _base_sem2(agg: pd.DataFrame) -> pd.DataFrame:
+    """Squared standard error of the baseline (mean of the baseline variants' means), per key."""
+    base = agg[agg["variant"].str.endswith("_baseline")]
+    cols = {}
+    for m in METRICS:
+        has = base[m].notna()
+        cols[f"_{m}_k"] = has
+        cols[f"_{m}_s"] = base[f"{m}_sem2"].where(has)
+    g = base[KEYS].assign(**cols).groupby(KEYS, dropna=False)
+    out = g.size().to_frame("_n").reset_index()[KEYS]
+    for m in METRICS:
+        k, s, c = (g[f"_{m}_k"].sum().values, g[f"_{m}_s"].sum().values, g[f"_{m}_s"].count().values)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"{m}_base_sem2"] = np.where((k > 0) & (c == k), s / k.astype(float) ** 2, np.nan)
+    return out
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    # runs recorded before named workloads: the task's standard workload
+    df["workload"] = df["workload"].fillna(df["task_id"])
+    for c in ("n", "workers"):
+        df[c] = df[c].astype(float)  # NaN for runs recorded before sizes / worker counts were
+    for m in METRICS:
+        df[m] = df[m].astype(float)  # all-NULL columns come back from SQL as object
+    return df
+
+def _ordered(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(GROUP, na_position="last", kind="stable").reset_index(drop=True)
+
+def write_tables(merged: pd.DataFrame):
+    merged = _ordered(merged)
+    merged[PD_COLS].to_csv(PD_FILE, index=False)
+    merged[GC_COLS].to_csv(GC_FILE, index=False)
+
+# --- Incremental state in the results store ---
+def _key_params(keys: pd.DataFrame, cols):
+    return [tuple(None if pd.isna(v) else v for v in row) for row in keys[cols].itertuples(index=False)]
+
+def _state_ready(conn) -> bool:
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    if STATE_TABLE not in names or "gc_watermark" not in names:
+        return False
+    # state written by an older version (e.g. raw sums of squares) is rebuilt
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({STATE_TABLE})")] == GROUP + SUM_COLS + ["correct"]
+
+def reset_state(conn):
+    conn.execute(f"DROP TABLE IF EXISTS {STATE_TABLE}")
+    conn.execute("DROP TABLE IF EXISTS gc_watermark")
+    cols = ", ".join([f"{c} {'TEXT' if c in ('task_id','workload','variant') else 'REAL'}" for c in GROUP + SUM_COLS + ["correct"]])
+    conn.execute(f"CREATE TABLE {STATE_TABLE} ({cols})")
+    conn.execute(f"CREATE INDEX {STATE_TABLE}_keys ON {STATE_TABLE} (task_id, workload)")
+    conn.execute("CREATE TABLE gc_watermark (last_run_id INTEGER)")
+    conn.execute("INSERT INTO gc_watermark VALUES (0)")
+
+def load_state(conn, keys: pd.DataFrame) -> pd.DataFrame:
+    """Stored sums for every variant of the given (task, workload, n, workers) keys."""
+    cols = GROUP + SUM_COLS + ["correct"]
+    sql = f"SELECT {', '.join(cols)} FROM {STATE_TABLE} WHERE " + " AND ".join(f"{k} IS ?" for k in KEYS)
+    rows = [r for p in _key_params(keys, KEYS) for r in conn.execute(sql, p)]
+    return pd.DataFrame(rows, columns=cols).astype({c: float for c in ["n","workers"] + SUM_COLS + ["correct"]})
+
+def save_state(conn, sums: pd.DataFrame, keys: pd.DataFrame, last_run_id: int):
+    cols = GROUP + SUM_COLS + ["correct"]
+    conn.executemany(f"DELETE FROM {STATE_TABLE} WHERE " + " AND ".join(f"{k} IS ?" for k in KEYS), _key_params(keys, KEYS))
+    conn.executemany(f"INSERT INTO {STATE_TABLE} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})",
+                     _key_params(sums, cols))
+    conn.execute("UPDATE gc_watermark SET last_run_id = ?", (last_run_id,))
+
+def incremental(db: Path, full: bool = False) -> int:
+    """Folds runs appended since the last call into the stored sums and rewrites only the affected PD/GC rows."""
+    with closing(sqlite3.connect(db)) as conn, conn:  # closes the connection; `conn` commits the fold
+        top = max_run_id(db)
+        tables_exist = PD_FILE.exists() and GC_FILE.exists()
+        if full or not _state_ready(conn) or not tables_exist \
+                or conn.execute("SELECT last_run_id FROM gc_watermark").fetchone()[0] > top:
+            reset_state(conn)
+        since = conn.execute("SELECT last_run_id FROM gc_watermark").fetchone()[0]
+        new = load_runs(columns=["run_id"] + GROUP + METRICS + ["correct"], db=db, after_run_id=since)
+        new = new[new["run_id"] <= top]
+        if new.empty:
+            print(f"[INFO] No new runs since run_id {since}; tables unchanged.")
+            return 0
+
+        new = _normalize(new)
+        keys = new[KEYS].drop_duplicates()
+        sums = combine(load_state(conn, keys), group_sums(new))
+        merged = pd_gc(sums)
+        if since:
+            old_pd, old_gc = pd.read_csv(PD_FILE), pd.read_csv(GC_FILE)
+            old = old_pd.merge(old_gc[GROUP + ["gc"]], on=GROUP, how="left")
+            old = old.merge(keys, on=KEYS, how="left", indicator=True)
+            merged = pd.concat([old[old["_merge"] == "left_only"].drop(columns="_merge"), merged], ignore_index=True)
+        write_tables(merged)
+        save_state(conn, sums, keys, top)
+        print(f"[INFO] Folded {len(new)} new runs (run_id {since + 1}..{top}) into {len(keys)} task × workload × size keys.")
+        return len(new)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--full", action="store_true", help="Rebuild the tables from all runs instead of only new ones")
+    args = ap.parse_args()
+
+    if not runs_available():
+        raise SystemExit("No runs found (results store or runs.csv). Run the harness first.")
+    if DB_FILE.exists():
+        incremental(DB_FILE, full=args.full)
+    else:
+        # runs.csv only: no run ids to track, so always a full recompute
+        df = _normalize(load_runs(columns=GROUP + METRICS + ["correct"]))
+        write_tables(pd_gc(group_sums(df)))
+
+    print("Saved: data/derived/pd_table.csv, data/derived/gc_table.csv")
@@ -0,0 +1,60 @@
+import argparse, json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Attributes generation energy (CodeCarbon, data/raw/codecarbon_generation.jsonl) to
+# prompt length vs output length with a least-squares fit
+#     energy_j ~ j_per_prompt_token * prompt_eval_count + j_per_output_token * eval_count + overhead_j
+# and flags prompt templates whose token counts are far above the others.
+
+def load_records(path: str) -> pd.DataFrame:
+    rows = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines() if line.strip()]
+    df = pd.DataFrame(rows)
+    need = ["energy_j","prompt_eval_count","eval_count"]
+    if df.empty or not set(need) <= set(df.columns):
+        return pd.DataFrame()
+    return df.dropna(subset=need)
+
+def fit_attribution(df: pd.DataFrame) -> dict:
+    X = np.column_stack([df["prompt_eval_count"], df["eval_count"], np.ones(len(df))]).astype(float)
+    y = df["energy_j"].to_numpy(float)
+    coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+    pred = X @ coef
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    r2 = 1.0 - ((y - pred) ** 2).sum() / ss_tot if ss_tot > 0 else 1.0
+    return {"j_per_prompt_token": coef[0], "j_per_output_token": coef[1], "overhead_j": coef[2],
+            "r2": r2, "records": len(df)}
+
+def prompt_table(df: pd.DataFrame, fit: dict, flag_ratio: float) -> pd.DataFrame:
+    # single-job records only: batch records cover several prompts
+    single = df[df.get("jobs", pd.Series(1, index=df.index)).fillna(1) == 1]
+    t = single.groupby("prompt").agg(calls=("energy_j","size"), prompt_tokens=("prompt_eval_count","mean"),
+                                     output_tokens=("eval_count","mean"), energy_j=("energy_j","mean"))
+    t["prompt_energy_j"] = fit["j_per_prompt_token"] * t["prompt_tokens"]
+    t["output_energy_j"] = fit["j_per_output_token"] * t["output_tokens"]
+    t["verbose"] = ((t["output_tokens"] >= flag_ratio * t["output_tokens"].median())
+                    | (t["prompt_tokens"] >= flag_ratio * t["prompt_tokens"].median()))
+    return t.reset_index()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--log", default="data/raw/codecarbon_generation.jsonl")
+    ap.add_argument("--out", default="data/derived/gen_energy_table.csv")
+    ap.add_argument("--flag-ratio", type=float, default=1.5,
+                    help="Flag prompts whose mean prompt or output tokens are this many times the median")
+    args = ap.parse_args()
+
+    df = load_records(args.log)
+    if len(df) < 3:
+        raise SystemExit("Need at least 3 generation records with token counts and energy "
+                         "(harness.generate --with-codecarbon).")
+    fit = fit_attribution(df)
+    print(f"[RESULT] {fit['j_per_prompt_token']:.4g} J/prompt token, {fit['j_per_output_token']:.4g} J/output token, "
+          f"overhead {fit['overhead_j']:.4g} J per call (R²={fit['r2']:.3f}, n={fit['records']})")
+    table = prompt_table(df, fit, args.flag_ratio)
+    table.to_csv(args.out, index=False)
+    print(f"Saved: {args.out}")
+    print(table.to_string(index=False))
+    for _, r in table[table["verbose"]].iterrows():
+        print(f"[WARN] Verbose prompt: {r['prompt']} ({r['prompt_tokens']:.0f} prompt / {r['output_tokens']:.0f} output tokens on average)")
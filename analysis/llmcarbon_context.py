@@ -1,4 +1,5 @@
 import argparse, pandas as pd
+from runs_io import load_runs
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
@@ -7,7 +8,7 @@ if __name__ == "__main__":
     ap.add_argument("--embodied-kg", type=float, default=0.0, help="Embodied kg CO2e (context)")
     args = ap.parse_args()
 
-    df = pd.read_csv("data/derived/runs.csv")
+    df = load_runs(columns=["task_id","variant","runtime_s","energy_j"])
 
     # Joules -> kWh; include PUE to account for infra overhead
     df["kwh"] = (df["energy_j"].fillna(0) * args.pue) / 3.6e6
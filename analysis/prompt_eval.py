@@ -0,0 +1,40 @@
+import argparse, json
+import pandas as pd
+from pathlib import Path
+
+# Prompt-processing cost per model × prompt layout, from the Ollama timings that
+# harness.generate stores in each generated module's .json metadata. Compare
+# batches generated with --prompt-layout inline vs shared_prefix.
+
+def load_timings(root: str = "tasks/generated") -> pd.DataFrame:
+    rows = []
+    for p in Path(root).glob("*/*.py.json"):
+        meta = json.loads(p.read_text(encoding="utf-8"))
+        for i, t in enumerate(meta.get("timings") or []):
+            if not t:
+                continue  # cache hit or cancelled stream: nothing measured
+            rows.append({"task_id": meta["task_id"], "prompt": meta["prompt"], "model": meta["model"],
+                         "layout": meta.get("prompt_layout", "inline"), "call": i, **t})
+    return pd.DataFrame(rows)
+
+def prompt_eval_table(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[df["call"] == 0].copy()  # first call only; repairs have different prompts
+    df["prompt_eval_s"] = df["prompt_eval_duration"] / 1e9
+    g = df.groupby(["model","layout"])
+    out = g.agg(calls=("task_id","size"), prompt_tokens=("prompt_eval_count","mean"),
+                prompt_eval_s=("prompt_eval_s","mean"), total_prompt_eval_s=("prompt_eval_s","sum"))
+    return out.reset_index()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--root", default="tasks/generated")
+    ap.add_argument("--out", default="data/derived/prompt_eval_table.csv")
+    args = ap.parse_args()
+
+    df = load_timings(args.root)
+    if df.empty or "prompt_eval_duration" not in df.columns:
+        raise SystemExit("No Ollama timings in generation metadata. Generate with the current harness.generate first.")
+    table = prompt_eval_table(df)
+    table.to_csv(args.out, index=False)
+    print(f"Saved: {args.out}")
+    print(table.to_string(index=False))
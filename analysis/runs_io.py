@@ -0,0 +1,80 @@
+"""
+Loads measured runs for the analysis scripts.
+
+Reads the SQLite results store written by harness.run
+(data/derived/results.sqlite). Column selection and `where` filters are
+pushed into the SQL query, so a script that only needs one task or the
+correct runs never parses the rest. When no store exists yet, it falls back
+to runs.csv and applies the same projection and filters with pandas.
+"""
+import sqlite3
+from contextlib import closing
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+DB_FILE = Path("data/derived/results.sqlite")
+CSV_FILE = Path("data/derived/runs.csv")
+
+def max_run_id(db: Path = DB_FILE) -> int:
+    with closing(sqlite3.connect(db)) as conn:
+        return conn.execute("SELECT COALESCE(MAX(run_id), 0) FROM runs").fetchone()[0]
+
+def runs_available(db: Optional[Path] = DB_FILE, csv: Path = CSV_FILE) -> bool:
+    return bool(db and Path(db).exists()) or Path(csv).exists()
+
+def _where_sql(where: Dict[str, Any], known):
+    clauses, params = [], []
+    for col, val in where.items():
+        if col not in known:
+            raise KeyError(f"Unknown runs column: {col}")
+        if val is None:
+            clauses.append(f"{col} IS NULL")
+        elif isinstance(val, (list, tuple, set)):
+            val = list(val)
+            clauses.append(f"{col} IN ({', '.join('?' * len(val))})")
+            params += val
+        else:
+            clauses.append(f"{col} = ?")
+            params.append(val)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def load_runs(where: Optional[Dict[str, Any]] = None, columns: Optional[Iterable[str]] = None,
+              db: Optional[Path] = DB_FILE, csv: Path = CSV_FILE, after_run_id: Optional[int] = None) -> pd.DataFrame:
+    """
+    Returns the runs matching `where` ({column: value | list of values | None})
+    with only `columns` (default: all). Columns missing from an older runs.csv
+    come back as NaN. db=None reads `csv` only. `after_run_id` (store only)
+    returns just the runs appended after that run_id.
+    """
+    where = where or {}
+    if db and Path(db).exists():
+        with closing(sqlite3.connect(db)) as conn:
+            known = [r[1] for r in conn.execute("PRAGMA table_info(runs)")]
+            cols = list(columns) if columns else [c for c in known if c not in ("run_id", "invocation_id")]
+            missing = [c for c in cols if c not in known]
+            if missing:
+                raise KeyError(f"Unknown runs column(s): {missing}")
+            sql, params = _where_sql(where, known)
+            if after_run_id is not None:
+                sql += (" AND" if sql else " WHERE") + " run_id > ?"
+                params.append(after_run_id)
+            order = " ORDER BY run_id" if "run_id" in known else ""
+            return pd.read_sql_query(f"SELECT {', '.join(cols)} FROM runs{sql}{order}", conn, params=params)
+
+    if after_run_id is not None:
+        raise ValueError("after_run_id needs the results store (runs.csv has no run ids)")
+    df = pd.read_csv(csv)
+    for col, val in where.items():
+        if col not in df.columns:
+            df = df.iloc[0:0] if val is not None else df
+        elif val is None:
+            df = df[df[col].isna()]
+        elif isinstance(val, (list, tuple, set)):
+            df = df[df[col].isin(list(val))]
+        else:
+            df = df[df[col] == val]
+    for col in columns or ():
+        if col not in df.columns:
+            df[col] = float("nan")  # runs.csv written before the column existed
+    return (df[list(columns)] if columns else df).reset_index(drop=True)
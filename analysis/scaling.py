@@ -0,0 +1,70 @@
+import argparse
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from runs_io import load_runs, runs_available
+
+# Empirical complexity: slope of log(metric) vs log(n) per task × workload × workers
+# × variant, from runs measured with `harness.run --sizes ...`. Worker counts are
+# kept apart so a curve never mixes parallelism with input size.
+METRICS = ["runtime_s","mem_kib","flops","energy_j"]
+
+def fit_loglog(sizes, values):
+    """Least-squares slope and R² of log(values) ~ log(sizes)."""
+    x, y = np.log(np.asarray(sizes, float)), np.log(np.asarray(values, float))
+    slope, intercept = np.polyfit(x, y, 1)
+    resid = y - (slope * x + intercept)
+    ss_tot = ((y - y.mean()) ** 2).sum()
+    r2 = 1.0 - (resid ** 2).sum() / ss_tot if ss_tot > 0 else 1.0
+    return slope, r2
+
+def scaling_table(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[(df["correct"] == 1) & df["n"].notna()].copy()
+    df["workload"] = df["workload"].fillna(df["task_id"]) if "workload" in df.columns else df["task_id"]
+    df["workers"] = df["workers"].astype(float) if "workers" in df.columns else np.nan
+    out = []
+    for (task, workload, workers, variant), g in df.groupby(["task_id","workload","workers","variant"], dropna=False):
+        means = g.groupby("n")[[m for m in METRICS if m in g.columns]].mean()
+        for m in means.columns:
+            s = means[m].dropna()
+            s = s[s > 0]
+            if len(s) < 2:
+                continue
+            slope, r2 = fit_loglog(s.index.values, s.values)
+            out.append({"task_id": task, "workload": workload, "workers": workers, "variant": variant, "metric": m, "k_sizes": len(s),
+                        "n_min": int(s.index.min()), "n_max": int(s.index.max()),
+                        "slope": slope, "r2": r2})
+    return pd.DataFrame(out)
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", default="", help="Read this runs.csv instead of the results store")
+    ap.add_argument("--task", action="append", help="Only these task ids (repeatable)")
+    ap.add_argument("--out", default="data/derived/scaling_table.csv")
+    ap.add_argument("--flag-slope", type=float, default=1.5,
+                    help="Flag runtime slopes at or above this (1 = linear, 2 = quadratic)")
+    args = ap.parse_args()
+
+    source = dict(db=None, csv=Path(args.runs)) if args.runs else {}
+    if not runs_available(**source):
+        raise SystemExit("No runs found (results store or runs.csv). Run the harness first.")
+    df = load_runs(where={"task_id": args.task} if args.task else None,
+                   columns=["task_id","workload","workers","variant","n","correct"] + METRICS, **source)
+    if df["n"].isna().all():
+        raise SystemExit("No runs with a size 'n'. Measure with `harness.run --sizes ...` first.")
+
+    table = scaling_table(df)
+    if table.empty:
+        raise SystemExit("Need at least two sizes per task × variant (harness.run --sizes).")
+    table["flagged"] = (table["metric"] == "runtime_s") & (table["slope"] >= args.flag_slope)
+    table.to_csv(args.out, index=False)
+    print(f"Saved: {args.out}")
+
+    rt = table[table["metric"] == "runtime_s"]
+    print(rt[["task_id","workload","workers","variant","n_min","n_max","slope","r2","flagged"]].to_string(index=False))
+    flagged = rt[rt["flagged"]]
+    if not flagged.empty:
+        print(f"\n[WARN] {len(flagged)} variant(s) scale super-linearly (runtime slope >= {args.flag_slope}):")
+        for _, r in flagged.iterrows():
+            workers = "" if pd.isna(r["workers"]) else f" (workers={r['workers']:g})"
+            print(f"  {r['task_id']} / {r['workload']}{workers} / {r['variant']}: slope={r['slope']:.2f}")
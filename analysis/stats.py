@@ -1,84 +1,174 @@
+import argparse, os
 import pandas as pd
 from pathlib import Path
 from scipy import stats
-import itertools
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
+from compute_gc import KEYS
+from runs_io import load_runs, runs_available
 
-runs = Path("data/derived/runs.csv")
-if not runs.exists():
-    raise SystemExit("No runs.csv found. Run measurements first.")
-
-df = pd.read_csv(runs)
-
-def pairwise_tests(metric="runtime_s"):
-    out = []
-    for task, g in df.groupby("task_id"):
-        g = g[g["correct"]==1]
-        variants = sorted(g["variant"].unique())
-        for (v1, v2) in itertools.combinations(variants, 2):
-            a = g[g["variant"]==v1][metric].dropna()
-            b = g[g["variant"]==v2][metric].dropna()
-            if len(a) >= 2 and len(b) >= 2:
-                # Check for nearly identical data that causes precision issues
-                a_var = np.var(a)
-                b_var = np.var(b)
-                
-                # Welch's t-test with precision check
-                if a_var == 0 and b_var == 0:
-                    # Both groups are constant - check if means are equal
-                    t = 0.0 if np.mean(a) == np.mean(b) else np.inf
-                    p = 1.0 if np.mean(a) == np.mean(b) else 0.0
-                elif a_var == 0 or b_var == 0:
-                    # One group is constant - may cause precision issues
-                    try: 
-                        t, p = stats.ttest_ind(a, b, equal_var=False)
-                    except (RuntimeWarning, ValueError): 
-                        t, p = np.nan, np.nan
-                else:
-                    # Normal case
-                    try: t, p = stats.ttest_ind(a, b, equal_var=False)
-                    except Exception: t, p = np.nan, np.nan
-                
-                # Mann-Whitney U test (more robust to identical values)
-                try: w, p_w = stats.mannwhitneyu(a, b, alternative="two-sided")
-                except Exception: w, p_w = np.nan, np.nan
-                
-                out.append({"task_id": task, "metric": metric, "v1": v1, "v2": v2, "t": t, "p_t": p, "mw": w, "p_mw": p_w})
-    return pd.DataFrame(out)
-
-def anova(metric="runtime_s"):
-    out = []
-    for task, g in df.groupby("task_id"):
-        g = g[g['correct']==1]
-        grouped = [grp[metric].dropna().values for _, grp in g.groupby("variant")]
-        labels = list(dict.fromkeys(g["variant"]))
-        if len(grouped) >= 2 and all(len(x) >= 2 for x in grouped):
-            # Check if any group has constant values (variance = 0)
-            variances = [np.var(x) for x in grouped]
-            if all(v == 0 for v in variances):
-                # All groups are constant - F statistic undefined
-                f, p = np.nan, np.nan
-            elif any(v == 0 for v in variances):
-                # Some groups are constant - may still cause issues
-                try: 
-                    f, p = stats.f_oneway(*grouped)
-                except (ValueError, RuntimeWarning): 
-                    f, p = np.nan, np.nan
-            else:
-                # Normal case
-                try: f, p = stats.f_oneway(*grouped)
-                except Exception: f, p = np.nan, np.nan
-            out.append({"task_id": task, "metric": metric, "f": f, "p": p, "k": len(grouped), "variants": ",".join(labels)})
-    return pd.DataFrame(out)
-
-metrics = ["runtime_s","mem_kib","flops","energy_j"]
-
-for m in metrics:
-    print(f"\n=== Pairwise ({m}) ===")
-    dfp = pairwise_tests(m)
-    print(dfp.to_string(index=False) if not dfp.empty else "(insufficient data)")
-
-print("\n=== ANOVA (per metric) ===")
-for m in metrics:
-    dfa = anova(m)
-    print(dfa.to_string(index=False) if not dfa.empty else f"(insufficient data for {m})")
+# Samples are grouped once per task × workload × n × workers × metric (the PD
+# groups of compute_gc.py, so sizes and workloads are never pooled) into
+# per-variant arrays; Welch's t
+# is then computed for all variant pairs at once from per-variant moments, and
+# Mann-Whitney U is batched over pairs with equal sample sizes (scipy's axis
+# support). p-values are corrected per group × metric family (Holm and BH).
+# Groups are independent, so --jobs N fans them out over a process pool.
+METRICS = ["runtime_s","mem_kib","flops","energy_j"]
+
+def group_samples(df: pd.DataFrame, metric: str):
+    """
+    {(task_id, workload, n, workers): (sorted variant labels, [non-null samples
+    per variant], labels in order of appearance)} for correct runs. Variants
+    with no non-null samples keep an empty array (they make ANOVA inapplicable,
+    as before).
+    """
+    df = df[df["correct"] == 1][KEYS + ["variant", metric]].copy()
+    df["workload"] = df["workload"].fillna(df["task_id"])  # runs recorded before named workloads
+    for c in ("n", "workers"):
+        df[c] = df[c].astype(float)
+    out = {}
+    for key, g in df.groupby(KEYS, sort=True, dropna=False):
+        labels, samples = zip(*[(v, s.dropna().to_numpy(float)) for v, s in g.groupby("variant", sort=True)[metric]])
+        out[key] = (list(labels), list(samples), list(dict.fromkeys(g["variant"])))
+    return out
+
+def welch_all_pairs(samples, i, j):
+    """Welch's t and two-sided p for all pairs (i[k], j[k]) from per-variant moments."""
+    n = np.array([len(s) for s in samples], float)
+    mean = np.array([s.mean() for s in samples])
+    var = np.array([s.var(ddof=1) for s in samples])
+    zero = np.array([np.var(s) == 0 for s in samples])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vn1, vn2 = var[i] / n[i], var[j] / n[j]
+        t = (mean[i] - mean[j]) / np.sqrt(vn1 + vn2)
+        dof = (vn1 + vn2) ** 2 / (vn1 ** 2 / (n[i] - 1) + vn2 ** 2 / (n[j] - 1))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    # Both groups constant: t/p undefined; equal means -> (0, 1), otherwise (inf, 0)
+    both = zero[i] & zero[j]
+    same = mean[i] == mean[j]
+    t = np.where(both, np.where(same, 0.0, np.inf), t)
+    p = np.where(both, np.where(same, 1.0, 0.0), p)
+    return t, p
+
+def _mwu_method(a, b):
+    # scipy's "auto" rule, decided per pair (scipy decides it once per batch)
+    if len(a) > 8 and len(b) > 8:
+        return "asymptotic"
+    return "asymptotic" if len(np.unique(np.concatenate([a, b]))) < len(a) + len(b) else "exact"
+
+def mannwhitney_all_pairs(samples, i, j):
+    """Two-sided Mann-Whitney U for pairs (i[k], j[k]), batched by (n1, n2, method)."""
+    u, p = np.full(len(i), np.nan), np.full(len(i), np.nan)
+    batches = {}
+    for k, (a, b) in enumerate(zip(i, j)):
+        x, y = samples[a], samples[b]
+        batches.setdefault((len(x), len(y), _mwu_method(x, y)), []).append(k)
+    for (_, _, method), ks in batches.items():
+        x = np.stack([samples[i[k]] for k in ks])
+        y = np.stack([samples[j[k]] for k in ks])
+        try:
+            res = stats.mannwhitneyu(x, y, alternative="two-sided", method=method, axis=1)
+            u[ks], p[ks] = res.statistic, res.pvalue
+        except Exception:
+            pass
+    return u, p
+
+def holm(p):
+    """Holm step-down adjusted p-values (NaN entries are left out of the family)."""
+    p = np.asarray(p, float)
+    out = np.full_like(p, np.nan)
+    ok = ~np.isnan(p)
+    m = ok.sum()
+    if m:
+        order = np.argsort(p[ok], kind="stable")
+        adj = np.maximum.accumulate((m - np.arange(m)) * p[ok][order]).clip(max=1.0)
+        vals = np.empty(m)
+        vals[order] = adj
+        out[ok] = vals
+    return out
+
+def bh(p):
+    """Benjamini-Hochberg adjusted p-values (NaN entries are left out of the family)."""
+    p = np.asarray(p, float)
+    out = np.full_like(p, np.nan)
+    ok = ~np.isnan(p)
+    m = ok.sum()
+    if m:
+        order = np.argsort(p[ok], kind="stable")
+        adj = np.minimum.accumulate((m / np.arange(m, 0, -1) * p[ok][order][::-1]))[::-1].clip(max=1.0)
+        vals = np.empty(m)
+        vals[order] = adj
+        out[ok] = vals
+    return out
+
+def task_pairwise(key, metric, labels, samples) -> pd.DataFrame:
+    keep = [k for k, s in enumerate(samples) if len(s) >= 2]
+    if len(keep) < 2:
+        return pd.DataFrame()
+    labels, samples = [labels[k] for k in keep], [samples[k] for k in keep]
+    i, j = np.triu_indices(len(samples), k=1)
+    t, p_t = welch_all_pairs(samples, i, j)
+    mw, p_mw = mannwhitney_all_pairs(samples, i, j)
+    lab = np.array(labels, dtype=object)
+    return pd.DataFrame({**dict(zip(KEYS, key)), "metric": metric, "v1": lab[i], "v2": lab[j], "t": t, "p_t": p_t,
+                         "mw": mw, "p_mw": p_mw, "p_t_holm": holm(p_t), "p_t_bh": bh(p_t),
+                         "p_mw_holm": holm(p_mw), "p_mw_bh": bh(p_mw)})
+
+def task_anova(key, metric, labels, samples) -> pd.DataFrame:
+    # `labels` here are in order of appearance, as in the original report
+    if len(samples) < 2 or any(len(x) < 2 for x in samples):
+        return pd.DataFrame()
+    # All groups constant: F statistic undefined
+    if all(np.var(x) == 0 for x in samples):
+        f, p = np.nan, np.nan
+    else:
+        try: f, p = stats.f_oneway(*samples)
+        except Exception: f, p = np.nan, np.nan
+    return pd.DataFrame([{**dict(zip(KEYS, key)), "metric": metric, "f": f, "p": p, "k": len(samples), "variants": ",".join(labels)}])
+
+def _task_job(job):
+    key, metric, (labels, samples, seen) = job
+    return task_pairwise(key, metric, labels, samples), task_anova(key, metric, seen, samples)
+
+def run_tests(df: pd.DataFrame, metrics=METRICS, jobs: int = 1):
+    """Returns ({metric: pairwise table}, {metric: ANOVA table})."""
+    work = [(key, m, groups) for m in metrics for key, groups in group_samples(df, m).items()]
+    if jobs > 1 and len(work) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            results = list(ex.map(_task_job, work, chunksize=max(1, len(work) // (4 * jobs))))
+    else:
+        results = [_task_job(w) for w in work]
+    pair, anov = {m: [] for m in metrics}, {m: [] for m in metrics}
+    for (_, m, _), (pw, an) in zip(work, results):
+        pair[m].append(pw)
+        anov[m].append(an)
+    cat = lambda parts: pd.concat(parts, ignore_index=True) if any(not x.empty for x in parts) else pd.DataFrame()
+    return {m: cat(pair[m]) for m in metrics}, {m: cat(anov[m]) for m in metrics}
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=1, help="Worker processes (tasks are tested in parallel)")
+    ap.add_argument("--task", action="append", help="Only these task ids (repeatable)")
+    ap.add_argument("--out", default="", help="Also write all pairwise results to this CSV")
+    args = ap.parse_args()
+
+    if not runs_available():
+        raise SystemExit("No runs found (results store or runs.csv). Run measurements first.")
+    where = {"correct": 1, **({"task_id": args.task} if args.task else {})}
+    df = load_runs(where=where, columns=KEYS + ["variant","correct"] + METRICS)
+    pairwise, anovas = run_tests(df, METRICS, args.jobs if args.jobs > 0 else (os.cpu_count() or 1))
+
+    for m in METRICS:
+        print(f"\n=== Pairwise ({m}) ===")
+        dfp = pairwise[m]
+        print(dfp.to_string(index=False) if not dfp.empty else "(insufficient data)")
+
+    print("\n=== ANOVA (per metric) ===")
+    for m in METRICS:
+        dfa = anovas[m]
+        print(dfa.to_string(index=False) if not dfa.empty else f"(insufficient data for {m})")
+
+    if args.out:
+        pd.concat([pairwise[m] for m in METRICS], ignore_index=True).to_csv(args.out, index=False)
+        print(f"Saved: {args.out}")
@@ -0,0 +1,147 @@
+"""
+Benchmarking environment control for harness.run.
+
+Reduces run-to-run noise from the host rather than from the measurement:
+the measured process (and the perf / worker children it starts, which
+inherit the affinity) is pinned to one core, or to one core per worker for
+parallel and threaded workloads, preferring cores isolated with
+`isolcpus=`; the core's frequency governor, current frequency and turbo
+state are recorded; the load average is checked so a busy host is
+warned about or refused; and the garbage collector can be disabled during
+the timed region. `environment_metadata()` gathers all of it for the
+invocation metadata in the results store.
+
+    python -m harness.env      # print the current environment report
+"""
+import gc, json, os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+CPU_DIR = Path("/sys/devices/system/cpu")
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+def parse_cpu_list(spec: Optional[str]) -> Set[int]:
+    """'1,3-5' -> {1, 3, 4, 5} (sysfs / isolcpus list format)."""
+    cpus = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+def isolated_cpus() -> Set[int]:
+    return parse_cpu_list(_read(CPU_DIR / "isolated"))
+
+def pick_cpus(count: int = 1) -> List[int]:
+    """
+    `count` cores to measure on. A process already pinned to no more cores
+    than that (e.g. by harness.sweep) keeps its set. Otherwise isolated cores
+    come first, then the highest-numbered allowed ones (CPU 0 takes most
+    interrupts and housekeeping).
+    """
+    allowed = sorted(os.sched_getaffinity(0))
+    if len(allowed) <= count:
+        return allowed
+    isolated = sorted(isolated_cpus() & set(allowed), reverse=True)
+    rest = [c for c in reversed(allowed) if c not in isolated]
+    return sorted((isolated + rest)[:count])
+
+def cpus_for_run(spec: str, parallel: bool = False, workers: Optional[int] = None) -> Optional[List[int]]:
+    """
+    Cores for --pin-cpu `spec`: "none" skips pinning; "auto" picks one core, or
+    for parallel workloads one per worker process / thread (every allowed core
+    when the worker count is left to the workload), so pinning does not
+    serialize them; anything else is a CPU list such as "3" or "2-5".
+    """
+    if spec == "none":
+        return None
+    if spec == "auto":
+        return pick_cpus((workers or len(os.sched_getaffinity(0))) if parallel else 1)
+    cpus = sorted(parse_cpu_list(spec))
+    if not cpus:
+        raise ValueError(f"Empty CPU list: {spec!r}")
+    return cpus
+
+def pin(cpus: Iterable[int]) -> List[int]:
+    """Pins this process (and children started afterwards) to `cpus`."""
+    cpus = sorted(set(cpus))
+    bad = [c for c in cpus if c not in range(os.cpu_count() or 1)]
+    if bad:
+        raise ValueError(f"CPU(s) {bad} do not exist on this host ({os.cpu_count()} CPUs)")
+    os.sched_setaffinity(0, cpus)
+    return cpus
+
+def turbo_enabled() -> Optional[bool]:
+    no_turbo = _read(CPU_DIR / "intel_pstate/no_turbo")
+    if no_turbo is not None:
+        return no_turbo == "0"
+    boost = _read(CPU_DIR / "cpufreq/boost")
+    return None if boost is None else boost == "1"
+
+def cpu_freq_info(cpu: int = 0) -> Dict[str, Optional[object]]:
+    """Governor, current / min / max frequency (kHz) and turbo state of `cpu`; None where sysfs lacks it."""
+    freq = CPU_DIR / f"cpu{cpu}/cpufreq"
+    khz = lambda name: int(v) if (v := _read(freq / name)) and v.isdigit() else None
+    return {
+        "governor": _read(freq / "scaling_governor"),
+        "freq_khz": khz("scaling_cur_freq"),
+        "freq_min_khz": khz("scaling_min_freq"),
+        "freq_max_khz": khz("scaling_max_freq"),
+        "turbo": turbo_enabled(),
+    }
+
+def load_per_cpu() -> float:
+    """1-minute load average divided by the number of CPUs."""
+    return os.getloadavg()[0] / (os.cpu_count() or 1)
+
+class BusyHostError(RuntimeError):
+    pass
+
+def check_load(max_load: float, action: str = "warn") -> float:
+    """Warns (action="warn") or raises BusyHostError ("refuse") when the load per CPU exceeds max_load."""
+    load = load_per_cpu()
+    if load > max_load:
+        msg = f"Host is busy: load average per CPU {load:.2f} > {max_load:g}"
+        if action == "refuse":
+            raise BusyHostError(msg)
+        print(f"[WARN] {msg}; measurements will be noisy.")
+    return load
+
+@contextmanager
+def gc_disabled(enabled: bool = True):
+    """Collects, then keeps the garbage collector off for the block (no-op when enabled is False)."""
+    if not enabled:
+        yield
+        return
+    was = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was:
+            gc.enable()
+
+def environment_metadata(cpus: Optional[List[int]] = None, no_gc: bool = False) -> dict:
+    """Environment fields recorded with each harness.run invocation (frequency of the first pinned core)."""
+    info = cpu_freq_info(cpus[0] if cpus else 0)
+    return {
+        "pinned_cpus": cpus,
+        "affinity": sorted(os.sched_getaffinity(0)),
+        "isolated_cpus": sorted(isolated_cpus()),
+        **info,
+        "loadavg": [round(x, 2) for x in os.getloadavg()],
+        "cpu_count": os.cpu_count(),
+        "gc_disabled": no_gc,
+    }
+
+if __name__ == "__main__":
+    print(json.dumps(environment_metadata(pick_cpus()), indent=2))
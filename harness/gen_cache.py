@@ -0,0 +1,114 @@
+"""
+Content-addressed cache of Ollama /api/generate responses.
+
+Entries are keyed by sha256 of (rendered prompt, model digest, merged options,
+response mode) and stored as one JSON file each under data/cache/generation/. The model
+digest comes from Ollama's /api/tags, so re-pulling a model under the same
+tag invalidates its entries. Eviction drops entries older than max_age_s,
+then the least recently used ones until the cache fits in max_bytes. The mode
+names how the response was obtained ("full", or the streaming early-stop
+policy), so a response cut off at the closing fence is never served to a
+call that expects the full text.
+"""
+import hashlib, json, os, time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+
+from harness import ollama_client
+
+CACHE_DIR = Path("data/cache/generation")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_AGE_S = 30 * 24 * 3600
+
+@lru_cache(maxsize=None)
+def model_digest(model: str, host: Optional[str] = None) -> str:
+    """Digest of `model` from /api/tags; falls back to the model name when Ollama cannot be asked."""
+    host = host or ollama_client.OLLAMA_HOST
+    try:
+        r = requests.get(f"{host}/api/tags", timeout=10)
+        r.raise_for_status()
+        for m in r.json().get("models", []):
+            if model in (m.get("name"), m.get("model")) and m.get("digest"):
+                return m["digest"]
+    except Exception as e:
+        print(f"[WARN] Could not read model digest from {host}/api/tags: {e}")
+    print(f"[WARN] No digest for {model}; caching by model name")
+    return f"name:{model}"
+
+def cache_key(prompt: str, digest: str, options: Optional[Dict[str, Any]], mode: str = "full") -> str:
+    blob = json.dumps({"prompt": prompt, "model": digest, "options": options or {}, "mode": mode},
+                      sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+class GenerationCache:
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_s: float = DEFAULT_MAX_AGE_S):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        p = self._path(key)
+        try:
+            resp = json.loads(p.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - p.stat().st_mtime > self.max_age_s:
+            return None
+        os.utime(p, (time.time(), p.stat().st_mtime))  # atime = last use, mtime = written
+        return resp
+
+    def put(self, key: str, resp: dict):
+        p = self._path(key)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        tmp = p.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps(resp), encoding="utf-8")
+        os.replace(tmp, p)
+
+    def evict(self) -> int:
+        """Applies the age then size bounds; returns the number of entries removed."""
+        if not self.root.exists():
+            return 0
+        now = time.time()
+        entries, removed = [], 0
+        for p in self.root.glob("*/*.json"):
+            st = p.stat()
+            if now - st.st_mtime > self.max_age_s:
+                p.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def wrap(self, call: Callable[[str], Awaitable[dict]], digest: str,
+             options: Optional[Dict[str, Any]], mode: str = "full") -> Callable[[str], Awaitable[dict]]:
+        """Async `call(prompt)` that serves repeated prompts (same `mode`) from the cache."""
+        async def cached(prompt: str) -> dict:
+            key = cache_key(prompt, digest, options, mode)
+            resp = self.get(key)
+            if resp is not None:
+                self.hits += 1
+                print(f"[INFO] Generation cache hit: {key[:12]}")
+                resp.pop("stream", None)  # describes the original call, not this one
+                return {**resp, "cache_hit": True}
+            self.misses += 1
+            resp = await call(prompt)
+            if resp.get("response"):
+                self.put(key, resp)
+            return resp
+        return cached
@@ -1,9 +1,15 @@
-import argparse, json, re, sys
+import argparse, asyncio, json, re, sys, time, uuid
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any
+from typing import Awaitable, Callable, Dict, Any
 import yaml
-from harness.ollama_client import generate as ollama_generate
+from harness.gen_cache import DEFAULT_MAX_AGE_S, DEFAULT_MAX_BYTES, GenerationCache, model_digest
+from harness.ollama_client import AsyncOllamaClient, generate as ollama_generate, generate_stream as ollama_generate_stream
+
+TASK_IDS = ["inefficient_sort", "modular_example", "unit_test_gen",
+            "log_file_parser", "json_data_normalizer", "cache_with_expiry"]
+PROMPT_NAMES = ["baseline", "cot_then_optimize", "eff_from_scratch", "tagged_explained"]
+GENERATED_DIR = Path("tasks/generated")
 
 def read(path):
     return Path(path).read_text(encoding="utf-8")
@@ -13,6 +19,18 @@ def build_prompt(template_path: str, task_spec_path: str) -> str:
     spec = read(task_spec_path)
     return tpl.replace("{{TASK_SPEC}}", spec)
 
+PROMPT_LAYOUTS = ["inline", "shared_prefix"]
+
+def build_prompt_shared(template_path: str, task_spec_path: str) -> str:
+    """
+    Same template, but the task spec is moved to the front so every prompt
+    variant of a task starts with an identical prefix that Ollama's prompt
+    cache can reuse; the template refers back to it.
+    """
+    spec = read(task_spec_path)
+    tpl = read(template_path).replace("{{TASK_SPEC}}", "(see the task specification above)")
+    return f"[task specification]\n{spec}\n\n{tpl}"
+
 # --- Robust extractors (unchanged) ---
 FENCE_PATTERNS = [
     r"```python\s*(.*?)\s*```",
@@ -43,6 +61,59 @@ def extract_python_code_any(text: str) -> str | None:
 
     return None
 
+# A fenced block containing one of these is what we keep; streaming stops once one has arrived
+CODE_MARKERS = ("def run_task", "class ExpiringCache")
+
+class FenceParser:
+    """
+    Incremental scanner over streamed model output. feed() returns True once a
+    complete ``` or ~~~ fenced block containing one of `markers` has been seen.
+    """
+    def __init__(self, markers=CODE_MARKERS):
+        self.markers = markers
+        self.text = ""
+        self.block: str | None = None
+        self._pos = 0          # next index to scan from
+        self._open = None      # (index after the opening fence, fence)
+
+    def feed(self, chunk: str) -> bool:
+        if self.block is not None:
+            return True
+        self.text += chunk
+        text = self.text
+        while True:
+            if self._open is None:
+                hits = [(i, f) for f in ("```", "~~~") if (i := text.find(f, self._pos)) != -1]
+                if not hits:
+                    break
+                i, fence = min(hits)
+                self._open = (i + 3, fence)
+                self._pos = i + 3
+            start, fence = self._open
+            j = text.find(fence, self._pos)
+            if j == -1:
+                break
+            body = text[start:j]
+            if any(m in body for m in self.markers):
+                self.block = body
+                return True
+            self._open, self._pos = None, j + 3
+        self._pos = max(self._pos, len(text) - 2)  # a fence may straddle chunks
+        return False
+
+def response_mode(stream: bool) -> str:
+    """Generation cache mode: full responses and fence-truncated streams are cached apart."""
+    return "stream:fence:" + ",".join(CODE_MARKERS) if stream else "full"
+
+def stream_stats(resp: dict, options: Dict[str, Any]) -> Dict[str, Any] | None:
+    """Per-call streaming record; tokens_saved_max bounds the tokens not generated after an early stop."""
+    st = resp.get("stream")
+    if st is None:
+        return None
+    budget = options.get("num_predict")
+    saved = max(0, budget - st["chunks"]) if st["early_stop"] and isinstance(budget, int) and budget > 0 else 0
+    return {**st, "tokens_saved_max": saved}
+
 def slugify(s: str) -> str:
     return re.sub(r"[^a-zA-Z0-9_]+", "_", s).strip("_")
 
@@ -52,9 +123,6 @@ def save_debug_raw(content: str, out_dir: Path, stem: str):
     p.write_text(content, encoding="utf-8")
     return p
 
-def generate_once(model: str, prompt: str, options: dict | None):
-    return ollama_generate(model, prompt, options=options)
-
 def repair_prompt(original_response: str) -> str:
     return (
         "You previously returned code without a clean Python fenced block.\n"
@@ -101,72 +169,79 @@ def _merge_options(user_opts: Dict[str, Any] | None, defaults: Dict[str, Any]) -
     merged.update(user_opts)  # user wins on conflicts
     return merged
 
-if __name__ == "__main__":
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--task-id", required=True, choices=["inefficient_sort", "modular_example", "unit_test_gen",
-        "log_file_parser", "json_data_normalizer", "cache_with_expiry"])
-    ap.add_argument("--prompt", required=True,
-                    choices=["baseline","cot_then_optimize","eff_from_scratch","tagged_explained"])
-    ap.add_argument("--model", default="deepseek-coder:6.7b")
-    ap.add_argument("--options", default=None, help="YAML string to override default Ollama options")
-    ap.add_argument("--with-codecarbon", action="store_true",
-                    help="Log inference energy/CO2e with CodeCarbon during generation")
-    ap.add_argument("--retry", type=int, default=1, help="If extraction fails, retry this many times with a repair prompt")
-    ap.add_argument("--save-raw", action="store_true", help="Save raw model responses for debugging")
-    args = ap.parse_args()
+def job_prompt(task_id: str, prompt_name: str, layout: str = "inline") -> str:
+    # keeps the {{TASK_SPEC}} replacement
+    build = build_prompt_shared if layout == "shared_prefix" else build_prompt
+    return build(f"prompts/{prompt_name}.txt", f"tasks/task_specs/{task_id}.md")
 
-    template = f"prompts/{args.prompt}.txt"
-    spec = f"tasks/task_specs/{args.task_id}.md"
+# Timing/count fields of a finished /api/generate response (durations in ns)
+TIMING_FIELDS = ("prompt_eval_count", "prompt_eval_duration", "eval_count", "eval_duration",
+                 "load_duration", "total_duration")
 
-    # build prompt (keeps your {{TASK_SPEC}} replacement)
-    tpl_text = read(template)
-    spec_text = read(spec)
-    prompt = tpl_text.replace("{{TASK_SPEC}}", spec_text)
+def call_timings(resp: dict) -> Dict[str, Any] | None:
+    """Ollama's counters for one call; None for cache hits and cancelled streams (nothing measured)."""
+    if resp.get("cache_hit"):
+        return None
+    t = {k: resp[k] for k in TIMING_FIELDS if k in resp}
+    if not t:
+        return None
+    # derived throughputs (durations are ns)
+    if t.get("eval_duration"):
+        t["output_tokens_per_s"] = t.get("eval_count", 0) / (t["eval_duration"] / 1e9)
+    if t.get("prompt_eval_duration"):
+        t["prompt_tokens_per_s"] = t.get("prompt_eval_count", 0) / (t["prompt_eval_duration"] / 1e9)
+    return t
 
-    # options: merge safe defaults with user overrides
-    defaults = _default_options_for(args.prompt)
-    user_options = yaml.safe_load(args.options) if args.options else None
-    options = _merge_options(user_options, defaults)
+def energy_fields(tracker, timings: list) -> Dict[str, Any]:
+    """
+    Token counts summed over `timings` plus CodeCarbon's measured energy for the
+    same window, as joules per token (prompt + output) and per output token.
+    """
+    timings = [t for t in timings if t]
+    out: Dict[str, Any] = {k: sum(t.get(k, 0) for t in timings) for k in TIMING_FIELDS}
+    data = getattr(tracker, "final_emissions_data", None)
+    kwh = getattr(data, "energy_consumed", None)
+    if kwh is None:
+        return out
+    out["energy_j"] = kwh * 3.6e6
+    tokens = out["prompt_eval_count"] + out["eval_count"]
+    if tokens:
+        out["j_per_token"] = out["energy_j"] / tokens
+    if out["eval_count"]:
+        out["j_per_output_token"] = out["energy_j"] / out["eval_count"]
+    return out
 
-    # run generation (with optional CodeCarbon)
-    def _call_model(p):
-        if args.with_codecarbon:
-            from codecarbon import EmissionsTracker
-            tracker = EmissionsTracker(project_name="llm_generation", output_dir="data/raw", log_level="error")
-            tracker.start()
-            try:
-                return ollama_generate(args.model, p, options=options)
-            finally:
-                emissions = tracker.stop()
-                import time
-                Path("data/raw").mkdir(parents=True, exist_ok=True)
-                with open("data/raw/codecarbon_generation.jsonl","a", encoding="utf-8") as f:
-                    f.write(json.dumps({
-                        "ts": time.time(),
-                        "task_id": args.task_id,
-                        "prompt": args.prompt,
-                        "model": args.model,
-                        "options": options,
-                        "emissions_kg": emissions
-                    }) + "\n")
-        else:
-            return ollama_generate(args.model, p, options=options)
+def job_options(prompt_name: str, user_options: Dict[str, Any] | None) -> Dict[str, Any]:
+    # merge safe defaults with user overrides
+    return _merge_options(user_options, _default_options_for(prompt_name))
 
-    resp = _call_model(prompt)
+async def generate_job(call: Callable[[str], Awaitable[dict]], task_id: str, prompt_name: str, model: str,
+                       options: Dict[str, Any], retry: int = 1, save_raw: bool = False,
+                       out_root: Path = GENERATED_DIR, layout: str = "inline") -> Path | None:
+    """
+    Prompts the model through `call`, extracts the code (asking for a repair up
+    to `retry` times) and saves it with its .json metadata. Returns the saved
+    path, or None when no code could be extracted.
+    """
+    stem = f"{task_id}__{prompt_name}__{slugify(model)}"
+    resp = await call(job_prompt(task_id, prompt_name, layout))
     txt = resp.get("response", "")
+    streams = [stream_stats(resp, options)]
+    timings = [call_timings(resp)]
 
-    if args.save_raw:
-        save_debug_raw(txt, Path("data/raw"), f"{args.task_id}__{args.prompt}__{slugify(args.model)}")
+    if save_raw:
+        save_debug_raw(txt, Path("data/raw"), stem)
 
     code = extract_python_code_any(txt)
-    tries_left = args.retry
+    tries_left = retry
     while code is None and tries_left > 0:
         # ask the model to repair the formatting
-        fix = repair_prompt(txt)
-        resp2 = _call_model(fix)
+        resp2 = await call(repair_prompt(txt))
         txt2 = resp2.get("response","")
-        if args.save_raw:
-            save_debug_raw(txt2, Path("data/raw"), f"{args.task_id}__{args.prompt}__{slugify(args.model)}__repair{tries_left}")
+        streams.append(stream_stats(resp2, options))
+        timings.append(call_timings(resp2))
+        if save_raw:
+            save_debug_raw(txt2, Path("data/raw"), f"{stem}__repair{tries_left}")
         code = extract_python_code_any(txt2)
         txt = txt2
         tries_left -= 1
@@ -176,23 +251,181 @@ if __name__ == "__main__":
         if "def run_task" in txt:
             code = extract_python_code_any(txt) or txt
         else:
-            sys.stderr.write("Failed to extract Python code block from model response.\n")
-            sys.exit(1)
+            sys.stderr.write(f"Failed to extract Python code block from model response ({stem}).\n")
+            return None
 
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
-    fname = f"{args.task_id}__{args.prompt}__{slugify(args.model)}__{ts}.py"
-    out_dir = Path("tasks/generated") / args.task_id
+    out_dir = out_root / task_id
     out_dir.mkdir(parents=True, exist_ok=True)
+    # cache hits can finish within the same second as a previous run
+    fname, k = f"{stem}__{ts}.py", 1
+    while (out_dir / fname).exists():
+        fname, k = f"{stem}__{ts}_{k}.py", k + 1
     out_path = out_dir / fname
     out_path.write_text(code, encoding="utf-8")
 
     meta = {
-        "task_id": args.task_id,
-        "prompt": args.prompt,
-        "model": args.model,
+        "task_id": task_id,
+        "prompt": prompt_name,
+        "model": model,
         "options": options,
         "timestamp": ts,
         "file": str(out_path)
     }
+    meta["prompt_layout"] = layout
+    meta["cache_hit"] = bool(resp.get("cache_hit"))
+    if any(timings):
+        meta["timings"] = timings  # one record per model call (first, then repairs)
+    if streams[0] is not None:
+        meta["stream"] = streams  # one record per model call (first, then repairs)
     (out_dir / (fname + ".json")).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return out_path
+
+def _log_codecarbon(emissions, **fields):
+    Path("data/raw").mkdir(parents=True, exist_ok=True)
+    with open("data/raw/codecarbon_generation.jsonl","a", encoding="utf-8") as f:
+        f.write(json.dumps({"ts": time.time(), **fields, "emissions_kg": emissions}) + "\n")
+
+def _tracker():
+    from codecarbon import EmissionsTracker
+    return EmissionsTracker(project_name="llm_generation", output_dir="data/raw", log_level="error")
+
+async def generate_batch(jobs, model: str, user_options: Dict[str, Any] | None, concurrency: int,
+                         retry: int = 1, save_raw: bool = False, host: str | None = None,
+                         stream: bool = False, cache: GenerationCache | None = None,
+                         layout: str = "inline", keep_alive: str | None = None) -> list:
+    """
+    Runs all (task_id, prompt_name) jobs concurrently over one pooled client.
+    Returns (task_id, prompt_name, saved path or None) in job order. Jobs are
+    submitted task by task, so a task's prompt variants reach Ollama back to
+    back while its shared prefix is still cached.
+    """
+    digest = model_digest(model, host) if cache else None
+    async with AsyncOllamaClient(host=host, concurrency=concurrency, keep_alive=keep_alive) as client:
+        async def one(task_id, prompt_name):
+            options = job_options(prompt_name, user_options)
+            if stream:
+                call = lambda p: client.generate_stream(model, p, options=options, stop=FenceParser().feed)
+            else:
+                call = lambda p: client.generate(model, p, options=options)
+            if cache:
+                call = cache.wrap(call, digest, options, response_mode(stream))
+            try:
+                path = await generate_job(call, task_id, prompt_name, model, options, retry, save_raw,
+                                          layout=layout)
+            except Exception as e:
+                print(f"[WARN] Generation failed for {task_id} / {prompt_name}: {e}")
+                path = None
+            if path:
+                print(f"Saved: {path}", flush=True)
+            return task_id, prompt_name, path
+        return await asyncio.gather(*(one(t, p) for t, p in jobs))
+
+def _csv_list(s: str):
+    return [x.strip() for x in s.split(",") if x.strip()]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--task-id", choices=TASK_IDS)
+    ap.add_argument("--prompt", choices=PROMPT_NAMES)
+    ap.add_argument("--tasks", default="", help="Batch mode: comma-separated task ids (with --prompts)")
+    ap.add_argument("--prompts", default="", help="Batch mode: comma-separated prompt names (with --tasks)")
+    ap.add_argument("--concurrency", type=int, default=2,
+                    help="Batch mode: requests in flight (Ollama also caps this at OLLAMA_NUM_PARALLEL)")
+    ap.add_argument("--model", default="deepseek-coder:6.7b")
+    ap.add_argument("--options", default=None, help="YAML string to override default Ollama options")
+    ap.add_argument("--with-codecarbon", action="store_true",
+                    help="Log inference energy/CO2e with CodeCarbon during generation")
+    ap.add_argument("--retry", type=int, default=1, help="If extraction fails, retry this many times with a repair prompt")
+    ap.add_argument("--save-raw", action="store_true", help="Save raw model responses for debugging")
+    ap.add_argument("--stream", action="store_true",
+                    help="Stream the response and cancel it once a complete code block has arrived")
+    ap.add_argument("--prompt-layout", choices=PROMPT_LAYOUTS, default="inline",
+                    help="shared_prefix puts the task spec first so prompt variants share a cacheable prefix")
+    ap.add_argument("--keep-alive", default=None, help="Ollama keep_alive for the model, e.g. 10m (default: server's)")
+    ap.add_argument("--no-cache", action="store_true", help="Always call Ollama; do not read or write the generation cache")
+    ap.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / 2**20, help="Generation cache size bound")
+    ap.add_argument("--cache-max-age-days", type=float, default=DEFAULT_MAX_AGE_S / 86400, help="Generation cache age bound")
+    args = ap.parse_args()
+
+    user_options = yaml.safe_load(args.options) if args.options else None
+    batch = bool(args.tasks or args.prompts)
+    if batch:
+        tasks, prompts = _csv_list(args.tasks), _csv_list(args.prompts)
+        bad = [t for t in tasks if t not in TASK_IDS] + [p for p in prompts if p not in PROMPT_NAMES]
+        if not tasks or not prompts or bad:
+            ap.error(f"batch mode needs --tasks and --prompts from the known ids (unknown: {bad})")
+    elif not (args.task_id and args.prompt):
+        ap.error("either --task-id and --prompt, or --tasks and --prompts, are required")
+
+    cache = None
+    if not args.no_cache:
+        cache = GenerationCache(max_bytes=int(args.cache_max_mb * 2**20), max_age_s=args.cache_max_age_days * 86400)
+        evicted = cache.evict()
+        if evicted:
+            print(f"[INFO] Generation cache: evicted {evicted} entries")
+
+    if batch:
+        jobs = [(t, p) for t in tasks for p in prompts]
+        print(f"[INFO] Generating {len(jobs)} jobs with concurrency {args.concurrency}")
+        # overlapping requests cannot be attributed per job: one CodeCarbon record for the batch
+        tracker = _tracker() if args.with_codecarbon else None
+        if tracker:
+            tracker.start()
+        results = []
+        try:
+            results = asyncio.run(generate_batch(jobs, args.model, user_options, args.concurrency,
+                                                 args.retry, args.save_raw, stream=args.stream, cache=cache,
+                                                 layout=args.prompt_layout, keep_alive=args.keep_alive))
+        finally:
+            if tracker:
+                emissions = tracker.stop()
+                # token totals read back from the saved metadata of this batch
+                timings = [t for _, _, path in results if path
+                           for t in json.loads(Path(f"{path}.json").read_text(encoding="utf-8")).get("timings") or []]
+                # the options actually sent (defaults merged with --options), per prompt variant
+                _log_codecarbon(emissions, task_id=",".join(tasks), prompt=",".join(prompts), model=args.model,
+                                options={p: job_options(p, user_options) for p in prompts}, jobs=len(jobs),
+                                **energy_fields(tracker, timings))
+        if cache:
+            print(f"[INFO] Generation cache: {cache.hits} hits, {cache.misses} misses")
+        failed = [(t, p) for t, p, path in results if path is None]
+        if failed:
+            sys.stderr.write(f"Generation failed for: {failed}\n")
+            sys.exit(1)
+        sys.exit(0)
+
+    options = job_options(args.prompt, user_options)
+
+    def _generate(p):
+        if args.stream:
+            return ollama_generate_stream(args.model, p, options=options, stop=FenceParser().feed,
+                                          keep_alive=args.keep_alive)
+        return ollama_generate(args.model, p, options=options, keep_alive=args.keep_alive)
+
+    # run generation (with optional CodeCarbon); every call of this generation, repairs included,
+    # is logged with the same generation_id so its energy can be summed per generation
+    generation_id = uuid.uuid4().hex
+    async def _call_model(p):
+        if args.with_codecarbon:
+            tracker = _tracker()
+            tracker.start()
+            resp = {}
+            try:
+                resp = _generate(p)
+                return resp
+            finally:
+                emissions = tracker.stop()
+                _log_codecarbon(emissions, task_id=args.task_id, prompt=args.prompt, model=args.model,
+                                generation_id=generation_id, options=options, prompt_chars=len(p),
+                                **energy_fields(tracker, [call_timings(resp)]))
+        else:
+            return _generate(p)
+
+    call = cache.wrap(_call_model, model_digest(args.model), options, response_mode(args.stream)) \
+        if cache else _call_model
+    out_path = asyncio.run(generate_job(call, args.task_id, args.prompt, args.model, options,
+                                        args.retry, args.save_raw, layout=args.prompt_layout))
+    if out_path is None:
+        sys.exit(1)
     print(f"Saved: {out_path}")
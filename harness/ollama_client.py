@@ -1,23 +1,172 @@
-import requests, json
+import asyncio, requests, json
 
 OLLAMA_HOST = "http://localhost:11434"
+RETRY_STATUS = {429, 500, 502, 503, 504}
 
-def generate(model: str, prompt: str, options: dict | None = None) -> dict:
-    url = f"{OLLAMA_HOST}/api/generate"
-    payload = {"model": model, "prompt": prompt, "stream": False}
-    print(f"[INFO] Sending request to Ollama: {url}")
-    print(f"[INFO] Model: {model}")
-    print(f"[INFO] Prompt length: {len(prompt)}")
+_session = requests.Session()  # keep-alive across sequential calls
+
+def _payload(model: str, prompt: str, options: dict | None, stream: bool = False,
+             keep_alive: str | None = None) -> dict:
+    payload = {"model": model, "prompt": prompt, "stream": stream}
     if options:
-        print(f"[INFO] Using options: {options}")
         payload["options"] = options
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive  # how long Ollama keeps the model (and its prompt cache) loaded
+    return payload
+
+def generate(model: str, prompt: str, options: dict | None = None, keep_alive: str | None = None) -> dict:
+    url = f"{OLLAMA_HOST}/api/generate"
+    print(f"[INFO] Sending request to Ollama: {url} (model={model}, prompt_chars={len(prompt)}, "
+          f"options={sorted(options) if options else []})")
     try:
-        r = requests.post(url, json=payload, timeout=600)
+        r = _session.post(url, json=_payload(model, prompt, options, keep_alive=keep_alive), timeout=600)
         print(f"[INFO] Ollama response status: {r.status_code}")
         r.raise_for_status()
-        resp_json = r.json()
-        print(f"[INFO] Ollama response keys: {list(resp_json.keys())}")
-        return resp_json  # {'model':..., 'response': 'text', 'done': true, ...}
+        return r.json()  # {'model':..., 'response': 'text', 'done': true, ...}
+    except Exception as e:
+        print(f"[ERROR] Ollama request failed: {e}")
+        raise
+
+class _StreamState:
+    """Accumulates /api/generate NDJSON chunks into a non-streamed style response."""
+    def __init__(self, stop):
+        self.stop, self.parts, self.chunks, self.final, self.early_stop = stop, [], 0, {}, False
+
+    def feed(self, line) -> bool:
+        """Returns True once the stream is finished or `stop` asked to cancel it."""
+        if not line:
+            return False
+        msg = json.loads(line)
+        text = msg.get("response", "")
+        self.parts.append(text)
+        self.chunks += 1
+        if msg.get("done"):
+            self.final = msg
+            return True
+        if self.stop and self.stop(text):
+            self.early_stop = True
+            return True
+        return False
+
+    def result(self) -> dict:
+        resp = {k: v for k, v in self.final.items() if k != "response"}
+        resp["response"] = "".join(self.parts)
+        resp["done"] = bool(self.final.get("done"))
+        # Ollama sends about one token per chunk
+        resp["stream"] = {"chunks": self.chunks, "early_stop": self.early_stop}
+        return resp
+
+def generate_stream(model: str, prompt: str, options: dict | None = None, stop=None,
+                    keep_alive: str | None = None) -> dict:
+    """
+    Streamed generate(): chunks are passed to `stop(text)` as they arrive and the
+    request is cancelled (connection closed) as soon as it returns True.
+    """
+    url = f"{OLLAMA_HOST}/api/generate"
+    print(f"[INFO] Streaming from Ollama: {url} (model={model}, prompt_chars={len(prompt)}, "
+          f"options={sorted(options) if options else []})")
+    state = _StreamState(stop)
+    try:
+        with _session.post(url, json=_payload(model, prompt, options, stream=True, keep_alive=keep_alive), stream=True, timeout=600) as r:
+            print(f"[INFO] Ollama response status: {r.status_code}")
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if state.feed(line):
+                    break
     except Exception as e:
         print(f"[ERROR] Ollama request failed: {e}")
         raise
+    if state.early_stop:
+        print(f"[INFO] Stopped stream early after {state.chunks} chunks")
+    return state.result()
+
+class AsyncOllamaClient:
+    """
+    asyncio client for /api/generate over one pooled httpx.AsyncClient.
+    At most `concurrency` requests are in flight; connection errors and
+    429/5xx responses are retried `retries` times with exponential backoff.
+    Ollama only runs requests in parallel up to its OLLAMA_NUM_PARALLEL.
+    `keep_alive` (e.g. "10m") is sent with every request.
+
+        async with AsyncOllamaClient(concurrency=2) as client:
+            resp = await client.generate(model, prompt, options)
+    """
+    def __init__(self, host: str | None = None, concurrency: int = 2, retries: int = 3,
+                 backoff_s: float = 1.0, timeout_s: float = 600, keep_alive: str | None = None):
+        if concurrency <= 0:
+            raise ValueError("concurrency must be positive")
+        self.host = host or OLLAMA_HOST
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.timeout_s = timeout_s
+        self.keep_alive = keep_alive
+        self._client = None
+        self._sem = None
+
+    async def __aenter__(self):
+        import httpx  # optional: only needed for concurrent generation
+        self._client = httpx.AsyncClient(
+            base_url=self.host, timeout=self.timeout_s,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        self._sem = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._client.aclose()
+        self._client = None
+
+    async def generate(self, model: str, prompt: str, options: dict | None = None) -> dict:
+        payload = _payload(model, prompt, options, keep_alive=self.keep_alive)
+        async def attempt():
+            r = await self._client.post("/api/generate", json=payload)
+            return r, (lambda: r.json())
+        return await self._with_retries(attempt)
+
+    async def generate_stream(self, model: str, prompt: str, options: dict | None = None, stop=None) -> dict:
+        """Streamed generate(); the request is cancelled once `stop(chunk_text)` returns True."""
+        payload = _payload(model, prompt, options, stream=True, keep_alive=self.keep_alive)
+        async def attempt():
+            req = self._client.build_request("POST", "/api/generate", json=payload)
+            r = await self._client.send(req, stream=True)
+            async def read():
+                state = _StreamState(stop)
+                try:
+                    async for line in r.aiter_lines():
+                        if state.feed(line):
+                            break
+                finally:
+                    await r.aclose()  # closing mid-stream cancels generation
+                return state.result()
+            return r, read
+        return await self._with_retries(attempt)
+
+    async def _with_retries(self, attempt):
+        """
+        Runs `attempt()` -> (response, read) until the status is not retryable,
+        then returns `await read()` (or read()) for a successful response.
+        """
+        import httpx
+        if self._client is None:
+            raise RuntimeError("use AsyncOllamaClient as 'async with'")
+        async with self._sem:
+            for i in range(self.retries + 1):
+                try:
+                    r, read = await attempt()
+                    if r.status_code not in RETRY_STATUS or i == self.retries:
+                        if r.is_error:
+                            await r.aclose()
+                        r.raise_for_status()
+                        out = read()
+                        return await out if asyncio.iscoroutine(out) else out
+                    await r.aclose()
+                    reason = f"HTTP {r.status_code}"
+                except httpx.TransportError as e:
+                    if i == self.retries:
+                        print(f"[ERROR] Ollama request failed: {e}")
+                        raise
+                    reason = f"{type(e).__name__}: {e}"
+                delay = self.backoff_s * 2 ** i
+                print(f"[WARN] Ollama request failed ({reason}); retry {i + 1}/{self.retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
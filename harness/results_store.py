@@ -0,0 +1,165 @@
+"""
+SQLite results store for measured runs.
+
+Runs are stored with typed columns in `runs`, and each `harness.run`
+invocation gets one row in `invocations` carrying the run metadata (host,
+CPU model, frequency governor, git commit, timestamp, argv). Rows are
+buffered in memory and written in a single transaction per invocation
+instead of reopening a file per run. The runs table is indexed on
+(task_id, variant, workload), so analysis scripts can push their filters
+into SQL (see analysis/runs_io.py) instead of parsing all of runs.csv.
+
+An empty store imports an existing runs.csv once, so the history stays
+queryable. The database uses WAL mode, so parallel sweep workers can
+append while analysis reads.
+
+    python -m harness.results_store --import-csv data/derived/runs.csv
+"""
+import argparse, csv, json, platform, socket, sqlite3, subprocess, sys, time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DB_FILE = Path("data/derived/results.sqlite")
+CSV_FILE = Path("data/derived/runs.csv")
+
+# Column order is the runs.csv column order (harness.run.RUN_FIELDS)
+RUN_COLUMNS = [("task_id", "TEXT"), ("workload", "TEXT"), ("impl", "TEXT"), ("variant", "TEXT"),
+               ("n", "INTEGER"), ("workers", "INTEGER"), ("run_idx", "INTEGER"),
+               ("runtime_s", "REAL"), ("mem_kib", "REAL"), ("flops", "REAL"), ("energy_j", "REAL"),
+               ("cycles", "REAL"), ("instructions", "REAL"), ("correct", "INTEGER")]
+INVOCATION_COLUMNS = [("started_at", "TEXT"), ("host", "TEXT"), ("cpu", "TEXT"), ("governor", "TEXT"),
+                      ("commit_sha", "TEXT"), ("python", "TEXT"), ("argv", "TEXT"), ("meta", "TEXT")]
+_CAST = {"TEXT": str, "INTEGER": lambda v: int(float(v)), "REAL": float}
+
+def _read(path: str) -> Optional[str]:
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return None
+
+def cpu_model() -> str:
+    for line in (_read("/proc/cpuinfo") or "").splitlines():
+        if line.startswith("model name"):
+            return line.split(":", 1)[1].strip()
+    return platform.processor() or platform.machine()
+
+def git_commit() -> Optional[str]:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (sha + ("-dirty" if dirty else "")) or None
+
+def run_metadata(argv: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+    return {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": socket.gethostname(),
+        "cpu": cpu_model(),
+        "governor": _read("/sys/devices/system/cpu/cpu0/cpufreq/scaling_governor"),
+        "commit_sha": git_commit(),
+        "python": platform.python_version(),
+        "argv": json.dumps(sys.argv if argv is None else argv),
+    }
+
+def _cast(kind: str, v):
+    if v is None or v == "":
+        return None
+    try:
+        return _CAST[kind](v)
+    except (TypeError, ValueError):
+        return None
+
+class ResultsStore:
+    """Buffered writer for one invocation's runs. Use as a context manager so rows are flushed on exit."""
+    def __init__(self, path: Path = DB_FILE, import_from: Optional[Path] = CSV_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._ensure_schema()
+        self.invocation_id: Optional[int] = None
+        self._rows: List[tuple] = []
+        if import_from and Path(import_from).exists():
+            # the write lock makes concurrent first opens (parallel sweep workers) import only once
+            self.conn.execute("BEGIN IMMEDIATE")
+            if self.conn.execute("SELECT COUNT(*) FROM invocations").fetchone()[0]:
+                self.conn.rollback()
+            else:
+                n = self.import_csv(import_from)
+                print(f"[INFO] Imported {n} existing rows from {import_from} into {self.path}")
+
+    def _ensure_schema(self):
+        cols = ", ".join(f"{c} {t}" for c, t in INVOCATION_COLUMNS)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS invocations (invocation_id INTEGER PRIMARY KEY, {cols})")
+        cols = ", ".join(f"{c} {t}" for c, t in RUN_COLUMNS)
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS runs (run_id INTEGER PRIMARY KEY, invocation_id INTEGER "
+                          f"REFERENCES invocations(invocation_id), {cols})")
+        # stores created before a column existed get it added (left NULL), like the runs.csv header upgrade
+        for table, wanted in (("invocations", INVOCATION_COLUMNS), ("runs", RUN_COLUMNS)):
+            have = {r[1] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+            for c, t in wanted:
+                if c not in have:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {c} {t}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS runs_task_variant ON runs (task_id, variant, workload)")
+        self.conn.commit()
+
+    def start_invocation(self, meta: Optional[dict] = None, **extra) -> int:
+        """Records one invocation's metadata; `extra` keys that are not columns go into the JSON `meta` column."""
+        fields = dict(meta if meta is not None else run_metadata())
+        known = {c for c, _ in INVOCATION_COLUMNS}
+        rest = {k: v for k, v in {**fields, **extra}.items() if k not in known}
+        fields = {k: v for k, v in {**fields, **extra}.items() if k in known}
+        fields["meta"] = json.dumps(rest) if rest else fields.get("meta")
+        names = list(fields)
+        cur = self.conn.execute(f"INSERT INTO invocations ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                                [fields[k] for k in names])
+        self.conn.commit()
+        self.invocation_id = cur.lastrowid
+        return self.invocation_id
+
+    def add(self, row: dict):
+        self._rows.append((self.invocation_id, *(_cast(t, row.get(c)) for c, t in RUN_COLUMNS)))
+
+    def flush(self) -> int:
+        rows, self._rows = self._rows, []
+        if rows:
+            names = ["invocation_id"] + [c for c, _ in RUN_COLUMNS]
+            with self.conn:
+                self.conn.executemany(f"INSERT INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})", rows)
+        return len(rows)
+
+    def import_csv(self, csv_path: Path) -> int:
+        """Imports a runs.csv (any header vintage) as one invocation marked as imported."""
+        with open(csv_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        saved = self.invocation_id
+        self.start_invocation({"started_at": None, "argv": None}, imported_from=str(csv_path))
+        for r in rows:
+            self.add(r)
+        n = self.flush()
+        self.invocation_id = saved
+        return n
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--db", default=str(DB_FILE))
+    ap.add_argument("--import-csv", default="", help="Append the rows of a runs.csv to the store")
+    args = ap.parse_args()
+
+    with ResultsStore(Path(args.db), import_from=None) as store:
+        if args.import_csv:
+            print(f"[INFO] Imported {store.import_csv(Path(args.import_csv))} rows from {args.import_csv}")
+        n_inv, n_runs = (store.conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0] for t in ("invocations", "runs"))
+        print(f"[INFO] {args.db}: {n_runs} runs from {n_inv} invocations")
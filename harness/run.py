@@ -1,40 +1,21 @@
-import argparse, tracemalloc, time, subprocess, csv, sys, random
+import argparse, tracemalloc, time, subprocess, csv, sys
 from pathlib import Path
 from importlib import import_module
 
-from tasks.validators import validate
-from harness.utils import parse_perf_stderr, FLOPS_EVENT, latest_generated_module
+from harness.env import BusyHostError, check_load, cpu_freq_info, cpus_for_run, environment_metadata, gc_disabled, pin
+from harness.results_store import DB_FILE, RUN_COLUMNS, ResultsStore
+from harness.sampling import AdaptiveSampler
+from harness.validate_pool import Limits, VerdictCache, validate_cached
+from harness.utils import (parse_perf_counters, PerfCounters, FLOPS_EVENT, ENERGY_EVENT, PERF_EVENTS,
+                           latest_generated_module)
+from harness.worker import MeasurementWorker
+from harness.workloads import PreparedWorkload, WORKLOADS, get_workload, prepare, snippet as workload_snippet
 
 DATA_FILE = Path("data/derived/runs.csv")
 DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 # --- Energy helpers (per-run) ---
-import csv as _csv, subprocess as _sp
-
-def measure_energy_perf_snippet(snippet: str):
-    """
-    Uses perf RAPL counter power/energy-pkg/ to estimate CPU package Joules
-    for the provided one-liner Python snippet (executed in a child process).
-    """
-    cmd = [
-        "perf","stat","-x",",","-e","power/energy-pkg/",
-        sys.executable,"-c", snippet
-    ]
-    proc = _sp.run(cmd, capture_output=True, text=True)
-    joules = None
-    for line in proc.stderr.splitlines():
-        if "power/energy-pkg/" in line:
-            parts = [p.strip() for p in line.split(",")]
-            if parts:
-                try:
-                    joules = float(parts[0].replace(",", ""))
-                except Exception:
-                    try:
-                        joules = float(line.strip().split()[0].replace(",", ""))
-                    except Exception:
-                        joules = None
-            break
-    return joules
+import csv as _csv
 
 def per_run_energy_from_csv(path: str, idx: int):
     """
@@ -52,217 +33,172 @@ def per_run_energy_from_csv(path: str, idx: int):
         return None
     return None
 
-# --- Entrypoint resolution & workloads ---
-def has_run_task(mod) -> bool:
-    return hasattr(mod, "run_task") and callable(getattr(mod, "run_task"))
+# --- Measurement helpers ---
+def run_with_tracemalloc(runner: PreparedWorkload, no_gc: bool = False):
+    runner.setup()  # fixture construction stays outside the timed/traced region
+    with gc_disabled(no_gc):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        runner.run()
+        dt = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return dt, peak / 1024.0  # KiB (float)
 
-def get_runner_callable(task_id: str, mod):
+def run_with_perf_counters(snippet: str, events=PERF_EVENTS) -> PerfCounters:
     """
-    Returns a zero-arg callable that executes the task workload in-process
-    (used for timing + tracemalloc).
+    Runs the snippet once under a single `perf stat` with all requested events,
+    so FLOPs, energy, cycles and instructions describe the same execution.
     """
-    if has_run_task(mod):
-        run_task = getattr(mod, "run_task")
-        
-        # Task-specific argument handling
-        if task_id == "inefficient_sort":
-            return lambda: run_task(300, seed=7)
-        elif task_id == "json_data_normalizer":
-            # Build test data for json_data_normalizer
-            def _runner():
-                rnd = random.Random(42)
-                data = []
-                for rid in range(2000):
-                    rec = {"id": rid, "timestamp": f"t{rid}"}
-                    if rid % 4 == 0:
-                        rec["user"] = {"id": rid % 10, "name": f"U{rid%10}"}
-                    # 0–3 items
-                    k = rid % 3
-                    if k:
-                        rec["items"] = [{"sku": f"S{(rid+j)%50}", "qty": (j+1)} for j in range(k)]
-                    data.append(rec)
-                return run_task(data)
-            return _runner
-        elif task_id == "log_file_parser":
-            # Build test log lines for log_file_parser
-            def _runner():
-                rnd = random.Random(42)
-                lines = []
-                for i in range(4000):
-                    lines.append(f"[t] INFO start {i}")
-                    if i % 3 == 0:
-                        lines.append(f"[t] ERROR E123: bad {i}")
-                    if i % 10 == 0:
-                        lines.append(f"2025-01-01T00:00:00Z ERROR E42 minor {i}")
-                    if i % 25 == 0 and rnd.random() < 0.5:
-                        lines.append("unstructured line")
-                return run_task(lines)
-            return _runner
-        else:
-            # For other tasks, try calling with no arguments
-            return run_task
-
-    # Synthetic but stable workloads for developer tasks
-    if task_id == "log_file_parser" and hasattr(mod, "parse_errors"):
-        parse = getattr(mod, "parse_errors")
-        def _runner():
-            # Build ~10k lines with mixed levels; deterministic
-            rnd = random.Random(42)
-            lines = []
-            for i in range(4000):
-                lines.append(f"[t] INFO start {i}")
-                if i % 3 == 0:
-                    lines.append(f"[t] ERROR E123: bad {i}")
-                if i % 10 == 0:
-                    lines.append(f"2025-01-01T00:00:00Z ERROR E42 minor {i}")
-                if i % 25 == 0 and rnd.random() < 0.5:
-                    lines.append("unstructured line")
-            _ = parse(lines)
-        return _runner
+    cmd = [
+        "perf", "stat", "-x", ",", "-e", ",".join(events),
+        sys.executable, "-c", snippet
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    return parse_perf_counters(result.stderr)
 
-    if task_id == "json_data_normalizer" and hasattr(mod, "normalize_records"):
-        norm = getattr(mod, "normalize_records")
-        def _runner():
-            rnd = random.Random(42)
-            data = []
-            for rid in range(2000):
-                rec = {"id": rid, "timestamp": f"t{rid}"}
-                if rid % 4 == 0:
-                    rec["user"] = {"id": rid % 10, "name": f"U{rid%10}"}
-                # 0–3 items
-                k = rid % 3
-                if k:
-                    rec["items"] = [{"sku": f"S{(rid+j)%50}", "qty": (j+1)} for j in range(k)]
-                data.append(rec)
-            _ = norm(data)
-        return _runner
+def perf_events_for(skip_perf: bool, energy_source: str):
+    """Events to collect per iteration (in PERF_EVENTS order)."""
+    wanted = set()
+    if not skip_perf:
+        wanted.update([FLOPS_EVENT, "cycles", "instructions"])
+    if energy_source == "perf":
+        wanted.add(ENERGY_EVENT)
+    return [e for e in PERF_EVENTS if e in wanted]
 
-    if task_id == "cache_with_expiry" and hasattr(mod, "ExpiringCache"):
-        Cache = getattr(mod, "ExpiringCache")
-        def _runner():
-            c = Cache(ttl_seconds=60)
-            # exercise put/get; no sleeps (expiration not required during run)
-            for i in range(20000):
-                k = f"k{i%2000}"
-                if i % 3 == 0:
-                    c.put(k, str(i))
-                _ = c.get(k)
-        return _runner
+RUN_FIELDS = [name for name, _ in RUN_COLUMNS]
 
-    # Fallback: try common function names if present
-    for name in ("main", "run", "solve"):
-        if hasattr(mod, name) and callable(getattr(mod, name)):
-            return getattr(mod, name)
+def _upgrade_csv_header():
+    """Rewrites an existing runs.csv whose header predates RUN_FIELDS (new columns left empty)."""
+    with open(DATA_FILE, newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames == RUN_FIELDS:
+            return
+        rows = list(reader)
+    print(f"[INFO] Upgrading {DATA_FILE} header to: {','.join(RUN_FIELDS)}")
+    tmp = DATA_FILE.with_suffix(".csv.tmp")
+    with open(tmp, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=RUN_FIELDS, restval="", extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(rows)
+    tmp.replace(DATA_FILE)
 
-    raise AttributeError(f"No runnable entrypoint found for task '{task_id}'. Module lacks run_task and known APIs.")
+def append_csv(rows):
+    new = not DATA_FILE.exists()
+    if not new:
+        _upgrade_csv_header()
+    with open(DATA_FILE, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new:
+            writer.writerow(RUN_FIELDS)
+        writer.writerows([row.get(k, "") for k in RUN_FIELDS] for row in rows)
 
-def get_runner_snippet(task_id: str, module_name: str) -> str:
+def save_rows(rows, db: Path = DB_FILE, csv_mirror: bool = True, **meta):
     """
-    Returns a Python snippet suitable for `python -c` that executes the same workload
-    as get_runner_callable, so perf can measure counters/energy in a child process.
+    Writes one invocation's rows to the results store (one transaction) and,
+    optionally, runs.csv. `meta` is stored with the invocation.
     """
-    base = f"import importlib,random; m=importlib.import_module('{module_name}'); "
-    if has_run_task(import_module(module_name)):
-        if task_id == "inefficient_sort":
-            return base + "m.run_task(300, seed=7)"
-        elif task_id == "json_data_normalizer":
-            return base + (
-                "rnd=random.Random(42); "
-                "data=[]; "
-                "for rid in range(2000): "
-                "  rec={'id':rid,'timestamp':f't{rid}'}; "
-                "  "
-                "  rec.update({'user':{'id':rid%10,'name':f'U{rid%10}'}}) if rid%4==0 else None; "
-                "  k=rid%3; "
-                "  rec.update({'items':[{'sku':f'S{(rid+j)%50}','qty':(j+1)} for j in range(k)]}) if k else None; "
-                "  data.append(rec); "
-                "m.run_task(data)"
-            )
-        elif task_id == "log_file_parser":
-            return base + (
-                "rnd=random.Random(42); "
-                "lines=[]; "
-                "import sys; "
-                "[(lines.append(f'[t] INFO start {i}'), "
-                "  lines.append(f'[t] ERROR E123: bad {i}') if i%3==0 else None, "
-                "  lines.append(f'2025-01-01T00:00:00Z ERROR E42 minor {i}') if i%10==0 else None, "
-                "  lines.append('unstructured line') if (i%25==0 and rnd.random()<0.5) else None) "
-                " for i in range(4000)]; "
-                "m.run_task(lines)"
-            )
-        else:
-            # For other tasks, try calling with no arguments
-            return base + "m.run_task()"
+    if not rows:
+        return
+    print(f"[INFO] Saving {len(rows)} runs to {db}" + (f" and {DATA_FILE}" if csv_mirror else ""))
+    with ResultsStore(db) as store:
+        store.start_invocation(None, **meta)
+        for row in rows:
+            store.add(row)
+    if csv_mirror:
+        append_csv(rows)
 
-    if task_id == "log_file_parser":
-        return base + (
-            "parse=getattr(m,'parse_errors'); rnd=random.Random(42); "
-            "lines=[]; "
-            "import sys; "
-            "[(lines.append(f'[t] INFO start {i}'), "
-            "  lines.append(f'[t] ERROR E123: bad {i}') if i%3==0 else None, "
-            "  lines.append(f'2025-01-01T00:00:00Z ERROR E42 minor {i}') if i%10==0 else None, "
-            "  lines.append('unstructured line') if (i%25==0 and rnd.random()<0.5) else None) "
-            " for i in range(4000)]; "
-            "_=parse(lines)"
-        )
-    if task_id == "json_data_normalizer":
-        return base + (
-            "norm=getattr(m,'normalize_records'); rnd=random.Random(42); "
-            "data=[]; "
-            "for rid in range(2000): "
-            "  rec={'id':rid,'timestamp':f't{rid}'}; "
-            "  "
-            "  rec.update({'user':{'id':rid%10,'name':f'U{rid%10}'}}) if rid%4==0 else None; "
-            "  k=rid%3; "
-            "  rec.update({'items':[{'sku':f'S{(rid+j)%50}','qty':(j+1)} for j in range(k)]}) if k else None; "
-            "  data.append(rec); "
-            "_=norm(data)"
-        )
-    if task_id == "cache_with_expiry":
-        return base + (
-            "Cache=getattr(m,'ExpiringCache'); c=Cache(ttl_seconds=60); "
-            "from time import time; "
-            "for i in range(20000): "
-            "  k=f'k{i%2000}'; "
-            "  (c.put(k,str(i)) if i%3==0 else None); "
-            "  _=c.get(k)"
-        )
+def parse_sizes(spec: str):
+    """'1e3,1e4,1e5' -> [1000, 10000, 100000]"""
+    return [int(float(x)) for x in spec.split(",") if x.strip()]
 
-    # Try common names
-    return base + (
-        "fn=None\n"
-        "for name in ('run_task','main','run','solve'):\n"
-        "  fn=getattr(m,name,None)\n"
-        "  if callable(fn): break\n"
-        "fn() if fn else (_ for _ in ()).throw(RuntimeError('no entrypoint'))"
-    )
+def measure(args, impl: str, mod, correct: int, size, perf_events, csv_offset: int = 0):
+    """Runs warmup + measured iterations of one workload size and returns the result rows."""
+    # Resolve in-process runner and external snippet
+    runner = prepare(args.workload, mod, size, args.workers)
+    n = runner.size
+    snippet = workload_snippet(args.workload, mod.__name__, n, args.workers, args.no_gc)
+    print(f"[INFO] Workload: {args.workload}, size: n={n}" + (f", workers={args.workers}" if args.workers else ""))
 
-# --- Measurement helpers ---
-def run_with_tracemalloc(runner):
-    tracemalloc.start()
-    t0 = time.perf_counter()
-    runner()
-    dt = time.perf_counter() - t0
-    _, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
-    return dt, peak / 1024.0  # KiB (float)
+    worker = None
+    if args.worker and perf_events:
+        print(f"[INFO] Starting persistent measurement worker...")
+        worker = MeasurementWorker(args.workload, mod.__name__, n, args.workers, no_gc=args.no_gc)
+        print(f"[INFO] Worker ready (pid={worker.pid})")
 
-def run_with_perf_snippet(snippet: str):
-    cmd = [
-        "perf", "stat", "-x", ",", "-e", FLOPS_EVENT,
-        sys.executable, "-c", snippet
-    ]
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return parse_perf_stderr(result.stderr)
+    sampler = None
+    if args.adaptive:
+        sampler = AdaptiveSampler(args.adaptive, args.target, args.min_runs, args.runs)
+        print(f"[INFO] Adaptive sampling: {args.adaptive} <= {args.target:g}, runs {args.min_runs}..{args.runs}")
+    total_iters = args.warmup + args.runs
+    rows = []
+    print(f"[INFO] Total iterations: {total_iters} (warmup: {args.warmup}, runs: {args.runs})")
+    for i in range(total_iters):
+        if sampler and sampler.done():
+            break
+        print(f"[INFO] Iteration {i+1}/{total_iters}")
+        print(f"[INFO] Running with tracemalloc...")
+        runtime, peak = run_with_tracemalloc(runner, args.no_gc)
 
-def append_csv(row: dict):
-    new = not DATA_FILE.exists()
-    with open(DATA_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        if new:
-            writer.writerow(["task_id","impl","variant","run_idx","runtime_s","mem_kib","flops","energy_j","correct"])
-        writer.writerow([row[k] for k in ["task_id","impl","variant","run_idx","runtime_s","mem_kib","flops","energy_j","correct"]])
+        counters = PerfCounters()
+        if perf_events:
+            print(f"[INFO] Measuring perf counters (events={','.join(perf_events)})...")
+            try:
+                if worker:
+                    counters = worker.perf_counters(perf_events, args.worker_iters)
+                else:
+                    counters = run_with_perf_counters(snippet, perf_events)
+                print(f"[INFO] Counters measured: {counters}")
+            except Exception as e:
+                print(f"[WARN] perf measurement failed: {e}")
+        flops = counters.flops
+
+        # Energy per run (program-under-test)
+        if args.energy_source == "perf":
+            energy_j = counters.energy_j
+            print(f"[INFO] Energy measured: {energy_j} J")
+        elif args.energy_source == "csv":
+            idx = csv_offset + i - args.warmup
+            print(f"[INFO] Reading energy from CSV: {args.energy_csv}, index: {idx}")
+            energy_j = per_run_energy_from_csv(args.energy_csv, idx)
+            print(f"[INFO] Energy from CSV: {energy_j} J")
+        else:
+            energy_j = None
+
+        if i < args.warmup:
+            print(f"[INFO] Warm-up {i+1}: correct={correct}, t={runtime:.3f}s, mem={peak:.1f} KiB, FLOPs={flops}, E={energy_j}")
+            continue
+
+        row = dict(
+            task_id=args.task_id, workload=args.workload, impl=impl, variant=args.variant, n=n if n is not None else "",
+            workers=args.workers or "", run_idx=i - args.warmup,
+            runtime_s=runtime, mem_kib=peak, flops=flops if flops is not None else "",
+            energy_j=energy_j if energy_j is not None else "",
+            cycles=counters.cycles if counters.cycles is not None else "",
+            instructions=counters.instructions if counters.instructions is not None else "",
+            correct=correct
+        )
+        rows.append(row)
+        print(f"[RESULT] Run {i - args.warmup}: correct={correct}, t={runtime:.3f}s, mem={peak:.1f} KiB, FLOPs={flops}, E={energy_j}")
+        if runner.last_units:
+            unit = runner.workload.unit
+            rate = f"[RESULT]   throughput={runner.last_units / runtime:.3g} {unit}/s"
+            if energy_j is not None:
+                rate += f", energy={energy_j / runner.last_units:.3g} J/{unit}"
+            print(rate)
+        extra = runner.summarize()
+        if extra:
+            print(f"[RESULT]   {extra}")
+        if sampler:
+            sampler.add(row)
+            print(f"[INFO] Convergence: {sampler.status()}")
+
+    if worker:
+        worker.close()
+    if sampler:
+        state = "converged" if sampler.converged() else "hit --runs budget"
+        print(f"[RESULT] Adaptive sampling {state} after {sampler.n} runs: {sampler.status()}")
+    return rows
 
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
@@ -283,8 +219,50 @@ if __name__ == "__main__":
     ap.add_argument("--energy-source", choices=["none","perf","csv"], default="none", help="How to capture per-run energy")
     ap.add_argument("--energy-csv", default="", help="CSV with per-run energy_j (when --energy-source=csv)")
     ap.add_argument("--skip-perf", action="store_true", help="Skip FLOPs measurement if perf missing.")
+    ap.add_argument("--worker", action="store_true",
+                    help="Measure perf counters in a persistent worker process (import once, perf attaches by PID)")
+    ap.add_argument("--worker-iters", type=int, default=1,
+                    help="Iterations per perf window in --worker mode; counters are reported per iteration")
+    ap.add_argument("--workload", default=None,
+                    help="Workload from harness.workloads (default: the task's standard workload)")
+    ap.add_argument("--sizes", default="",
+                    help="Comma-separated workload sizes, e.g. 1e3,1e4,1e5 (default: the task's fixed size)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Worker processes for parallel workloads, e.g. log_file_parser_sharded (default: CPU count)")
+    ap.add_argument("--adaptive", choices=["rse", "ci"], default=None,
+                    help="Run until the relative standard error (rse) or bootstrap CI half-width (ci) of every "
+                         "metric's mean is <= --target; --runs becomes the maximum")
+    ap.add_argument("--target", type=float, default=0.02, help="Relative uncertainty target for --adaptive")
+    ap.add_argument("--min-runs", type=int, default=5, help="Minimum measured runs for --adaptive")
+    ap.add_argument("--results-db", default=str(DB_FILE), help="SQLite results store")
+    ap.add_argument("--no-csv", action="store_true", help="Only write the results store, not the runs.csv mirror")
+    ap.add_argument("--pin-cpu", default="auto",
+                    help="Cores to pin the measured process and its perf/worker children to: auto (isolated cores, "
+                         "else the last allowed ones; one per worker for parallel workloads), a CPU list such as "
+                         "3 or 2-5, or none")
+    ap.add_argument("--max-load", type=float, default=0.5,
+                    help="Highest 1-minute load average per CPU considered quiet")
+    ap.add_argument("--on-busy", choices=["warn", "refuse"], default="warn",
+                    help="What to do when the load average exceeds --max-load")
+    ap.add_argument("--no-gc", action="store_true", help="Disable the garbage collector during the timed region")
+    ap.add_argument("--validate-timeout", type=float, default=60.0,
+                    help="Wall-clock limit (s) for the isolated validation subprocess")
     args = ap.parse_args()
 
+    args.workload = args.workload or args.task_id
+    if args.workload != args.task_id:
+        if args.workload not in WORKLOADS:
+            raise SystemExit(f"Unknown workload {args.workload}. Known: {', '.join(WORKLOADS)}")
+        if get_workload(args.workload).task_id != args.task_id:
+            raise SystemExit(f"Workload {args.workload} belongs to task {get_workload(args.workload).task_id}, not {args.task_id}.")
+    if args.workers is not None and not get_workload(args.workload).parallel:
+        raise SystemExit(f"--workers only applies to parallel workloads ({', '.join(k for k, w in WORKLOADS.items() if w.parallel)}).")
+    if args.adaptive:
+        if args.energy_source == "csv":
+            raise SystemExit("--adaptive cannot be combined with --energy-source csv (per-run rows are indexed by --runs).")
+        if not 2 <= args.min_runs <= args.runs:
+            raise SystemExit("--adaptive needs 2 <= --min-runs <= --runs.")
+
     print(f"[INFO] Starting run harness for task: {args.task_id}")
     impl = args.impl
     print(f"[INFO] Implementation module: {impl}")
@@ -297,61 +275,52 @@ if __name__ == "__main__":
         print(f"[INFO] Latest generated module: {mod_path}")
         impl = mod_path
 
-    print(f"[INFO] Loading module: {impl}")
-    mod = import_module(impl)
+    # Validate in a resource-limited subprocess before importing, so a hanging or
+    # memory-hungry candidate cannot take the harness down with it.
+    print(f"[INFO] Validating implementation (isolated)...")
+    verdicts = VerdictCache()
+    verdict = validate_cached(args.task_id, impl, Limits(timeout_s=args.validate_timeout), verdicts)
+    if not verdict.cached:
+        verdicts.save()
+    correct = 1 if verdict.ok else 0
+    print(f"[INFO] Validation result: {'correct' if correct else 'incorrect'} ({verdict.status}"
+          + (", cached)" if verdict.cached else ")"))
+    if verdict.status in ("timeout", "cpu_limit", "mem_limit", "crashed"):
+        raise SystemExit(f"Candidate {impl} hit a validation limit ({verdict.status}); not measuring it.")
 
-    print(f"[INFO] Validating implementation...")
-    correct = 1 if validate(args.task_id, impl) else 0
-    print(f"[INFO] Validation result: {'correct' if correct else 'incorrect'}")
-
-    # Resolve in-process runner and external snippet
-    runner = get_runner_callable(args.task_id, mod)
-    snippet = get_runner_snippet(args.task_id, mod.__name__)
-
-    total_iters = args.warmup + args.runs
-    print(f"[INFO] Total iterations: {total_iters} (warmup: {args.warmup}, runs: {args.runs})")
-    for i in range(total_iters):
-        print(f"[INFO] Iteration {i+1}/{total_iters}")
-        print(f"[INFO] Running with tracemalloc...")
-        runtime, peak = run_with_tracemalloc(runner)
-
-        flops = None
-        if not args.skip_perf:
-            print(f"[INFO] Measuring FLOPs with perf (event={FLOPS_EVENT})...")
-            try:
-                flops = run_with_perf_snippet(snippet)
-                print(f"[INFO] FLOPs measured: {flops}")
-            except Exception as e:
-                print(f"[WARN] FLOPs measurement failed: {e}")
-                flops = None
-
-        # Energy per run (program-under-test)
-        if args.energy_source == "perf":
-            print(f"[INFO] Measuring energy with perf...")
-            try:
-                energy_j = measure_energy_perf_snippet(snippet)
-                print(f"[INFO] Energy measured: {energy_j} J")
-            except Exception as e:
-                print(f"[WARN] Energy measurement failed: {e}")
-                energy_j = None
-        elif args.energy_source == "csv":
-            idx = i - args.warmup
-            print(f"[INFO] Reading energy from CSV: {args.energy_csv}, index: {idx}")
-            energy_j = per_run_energy_from_csv(args.energy_csv, idx)
-            print(f"[INFO] Energy from CSV: {energy_j} J")
-        else:
-            energy_j = None
+    # Environment: pin before the worker / perf children start so they inherit the affinity
+    cpus = None
+    try:
+        cpus = cpus_for_run(args.pin_cpu, get_workload(args.workload).parallel, args.workers)
+        if cpus is not None:
+            cpus = pin(cpus)
+            print(f"[INFO] Pinned to CPU(s) {','.join(map(str, cpus))}")
+            if args.workers and len(cpus) < args.workers:
+                print(f"[WARN] {args.workers} workers share {len(cpus)} pinned CPU(s); parallel runs are serialized.")
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Could not pin to CPU(s) {args.pin_cpu}: {e}")
+        cpus = None
+    freq = cpu_freq_info(cpus[0] if cpus else 0)
+    print(f"[INFO] CPU governor: {freq['governor']}, freq: {freq['freq_khz']} kHz, turbo: {freq['turbo']}")
+    if freq["governor"] not in (None, "performance"):
+        print(f"[WARN] Governor is {freq['governor']}, not performance; frequency scaling adds runtime noise.")
+    try:
+        load = check_load(args.max_load, args.on_busy)
+        print(f"[INFO] Load average per CPU: {load:.2f}")
+    except BusyHostError as e:
+        raise SystemExit(f"{e}. Refusing to measure (--on-busy refuse).")
+    env_meta = environment_metadata(cpus, args.no_gc)  # before measuring, so loadavg is the host's, not ours
 
-        if i < args.warmup:
-            print(f"[INFO] Warm-up {i+1}: correct={correct}, t={runtime:.3f}s, mem={peak:.1f} KiB, FLOPs={flops}, E={energy_j}")
-            continue
+    print(f"[INFO] Loading module: {impl}")
+    mod = import_module(impl)
 
-        row = dict(
-            task_id=args.task_id, impl=impl, variant=args.variant, run_idx=i - args.warmup,
-            runtime_s=runtime, mem_kib=peak, flops=flops if flops is not None else "",
-            energy_j=energy_j if energy_j is not None else "",
-            correct=correct
-        )
-        print(f"[INFO] Appending results to CSV: {DATA_FILE}")
-        append_csv(row)
-        print(f"[RESULT] Run {i - args.warmup}: correct={correct}, t={runtime:.3f}s, mem={peak:.1f} KiB, FLOPs={flops}, E={energy_j}")
+    perf_events = perf_events_for(args.skip_perf, args.energy_source)
+    sizes = parse_sizes(args.sizes) if args.sizes else [None]
+    rows = []
+    try:
+        for k, size in enumerate(sizes):
+            rows += measure(args, impl, mod, correct, size, perf_events, csv_offset=k * args.runs)
+    finally:
+        meta = dict(adaptive=args.adaptive, target=args.target, min_runs=args.min_runs) if args.adaptive else {}
+        meta.update(env_meta)
+        save_rows(rows, Path(args.results_db), csv_mirror=not args.no_csv, max_runs=args.runs, warmup=args.warmup, **meta)
@@ -0,0 +1,83 @@
+"""
+Adaptive sequential sampling for harness.run.
+
+Instead of a fixed --runs N, measured iterations continue until, for every
+tracked metric, the run-to-run uncertainty of the mean drops below a target:
+either the relative standard error (std / sqrt(n) / |mean|) or the relative
+half-width of a bootstrap confidence interval of the mean. A minimum run
+count guards against stopping on a lucky streak, and a maximum bounds the
+budget for variants that never settle.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TRACKED = ("runtime_s", "mem_kib", "energy_j")
+
+def rse(x: Sequence[float]) -> float:
+    """Relative standard error of the mean (inf with fewer than 2 samples or a zero mean)."""
+    x = np.asarray(x, float)
+    if len(x) < 2:
+        return math.inf
+    mean = x.mean()
+    if mean == 0:
+        return 0.0 if np.all(x == 0) else math.inf
+    return float(x.std(ddof=1) / math.sqrt(len(x)) / abs(mean))
+
+def bootstrap_ci(x: Sequence[float], level: float = 0.95, resamples: int = 2000,
+                 seed: Optional[int] = 0) -> Tuple[float, float]:
+    """Percentile bootstrap CI of the mean, vectorized over all resamples."""
+    x = np.asarray(x, float)
+    if len(x) < 2:
+        return -math.inf, math.inf
+    means = x[np.random.default_rng(seed).integers(0, len(x), (resamples, len(x)))].mean(axis=1)
+    alpha = (1 - level) / 2
+    lo, hi = np.quantile(means, [alpha, 1 - alpha])
+    return float(lo), float(hi)
+
+def ci_rel_halfwidth(x: Sequence[float], level: float = 0.95, resamples: int = 2000) -> float:
+    x = np.asarray(x, float)
+    lo, hi = bootstrap_ci(x, level, resamples)
+    mean = x.mean() if len(x) else 0.0
+    if not math.isfinite(lo) or mean == 0:
+        return 0.0 if len(x) >= 2 and np.all(x == 0) else math.inf
+    return (hi - lo) / 2 / abs(mean)
+
+class AdaptiveSampler:
+    """
+    Collects per-run metrics and decides when to stop. criterion is "rse" or
+    "ci" (bootstrap CI half-width); both are relative to the mean.
+    """
+    def __init__(self, criterion: str = "rse", target: float = 0.02, min_runs: int = 5, max_runs: int = 50,
+                 metrics: Sequence[str] = TRACKED, level: float = 0.95):
+        if criterion not in ("rse", "ci"):
+            raise ValueError(f"Unknown stopping criterion: {criterion}")
+        if not 2 <= min_runs <= max_runs:
+            raise ValueError("Need 2 <= min_runs <= max_runs")
+        self.criterion, self.target, self.level = criterion, target, level
+        self.min_runs, self.max_runs = min_runs, max_runs
+        self.samples: Dict[str, List[float]] = {m: [] for m in metrics}
+        self.n = 0
+
+    def add(self, row: dict):
+        self.n += 1
+        for m, xs in self.samples.items():
+            v = row.get(m)
+            if v is not None and v != "":
+                xs.append(float(v))
+
+    def spread(self) -> Dict[str, float]:
+        """Current relative uncertainty per metric that has samples."""
+        fn = rse if self.criterion == "rse" else (lambda x: ci_rel_halfwidth(x, self.level))
+        return {m: fn(xs) for m, xs in self.samples.items() if xs}
+
+    def converged(self) -> bool:
+        return self.n >= self.min_runs and all(v <= self.target for v in self.spread().values())
+
+    def done(self) -> bool:
+        return self.n >= self.max_runs or self.converged()
+
+    def status(self) -> str:
+        parts = ", ".join(f"{m}={v:.3g}" for m, v in self.spread().items())
+        return f"n={self.n} {self.criterion} ({parts}) target={self.target:g}"
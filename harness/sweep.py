@@ -0,0 +1,143 @@
+"""
+Parallel sweep over a task × prompt × model matrix.
+
+Replaces the serial `make full-*` loop in run_all.sh:
+  - generation runs on a single producer thread (Ollama serves one request at a
+    time) and feeds a bounded queue, so it never runs far ahead of measurement;
+  - measurement runs on a pool of workers, each pinned to its own CPU, that
+    drain the queue with `harness.run`;
+  - compute_gc.py / stats.py run once after the whole matrix has been measured.
+
+Note: RAPL `power/energy-pkg/` is package-wide, so measurements that overlap
+with generation (or with each other) also count that activity. The default of
+one measurement worker keeps runs.csv comparable with serial sweeps; raise
+--measure-workers when energy is not the metric of interest.
+"""
+import argparse, os, queue, re, subprocess, sys, threading, time
+import yaml
+
+from harness.utils import module_from_path
+
+TASKS = ["inefficient_sort", "modular_example", "unit_test_gen",
+         "cache_with_expiry", "json_data_normalizer", "log_file_parser"]
+PROMPTS = ["baseline", "cot_then_optimize", "eff_from_scratch", "tagged_explained"]
+MODELS_FILE = "models/ollama/models.yaml"
+
+_STOP = object()
+
+def default_models():
+    with open(MODELS_FILE, "r", encoding="utf-8") as f:
+        m = yaml.safe_load(f) or {}
+    return [e["name"] for e in m.get("models", [])]
+
+def variant_name(model: str, prompt: str) -> str:
+    # Same naming as the Makefile: $(MODEL)_$(PROMPT) | tr ':/.' '_'
+    return re.sub(r"[:/.]", "_", f"{model}_{prompt}")
+
+def measurement_cpus(count: int):
+    """
+    Picks `count` CPUs for measurement workers. CPU 0 is left for the OS and
+    the generation stage whenever more than one CPU is available.
+    """
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) > 1:
+        cpus = cpus[1:]
+    return [cpus[i % len(cpus)] for i in range(count)]
+
+def _log(msg: str):
+    print(msg, flush=True)
+
+def generate_stage(jobs, out_q: queue.Queue, args, failures: list):
+    """Producer: runs harness.generate for each job and enqueues the saved module."""
+    for task_id, prompt, model in jobs:
+        cmd = [sys.executable, "-m", "harness.generate",
+               "--task-id", task_id, "--prompt", prompt, "--model", model]
+        if args.with_codecarbon:
+            cmd.append("--with-codecarbon")
+        _log(f"[GEN] {task_id} / {prompt} / {model}")
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        saved = None
+        for line in proc.stdout.splitlines():
+            if line.startswith("Saved: "):
+                saved = line[len("Saved: "):].strip()
+        if proc.returncode != 0 or not saved:
+            _log(f"[WARN] Generation failed for {task_id} / {prompt} / {model}: {proc.stderr.strip()[-500:]}")
+            failures.append(("generate", task_id, prompt, model))
+            continue
+        # blocks while the measurement pool is behind
+        out_q.put((task_id, prompt, model, module_from_path(saved)))
+    for _ in range(args.measure_workers):
+        out_q.put(_STOP)
+
+def measure_worker(cpu: int, in_q: queue.Queue, args, failures: list):
+    """Consumer: runs harness.run pinned to `cpu` for each generated module."""
+    while True:
+        job = in_q.get()
+        if job is _STOP:
+            return
+        task_id, prompt, model, impl = job
+        cmd = [sys.executable, "-m", "harness.run",
+               "--task-id", task_id, "--impl", impl, "--variant", variant_name(model, prompt),
+               "--runs", str(args.runs), "--warmup", str(args.warmup),
+               "--energy-source", args.energy_source, "--pin-cpu", str(cpu)]
+        if args.skip_perf:
+            cmd.append("--skip-perf")
+        _log(f"[RUN] cpu={cpu} {task_id} / {impl}")
+        # harness.run pins itself; preexec_fn is not safe while other threads are spawning
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            _log(f"[WARN] Measurement failed for {impl}: {proc.stderr.strip()[-500:]}")
+            failures.append(("run", task_id, prompt, model))
+
+def run_analysis():
+    for script in ("analysis/compute_gc.py", "analysis/stats.py"):
+        _log(f"[INFO] Running {script}")
+        subprocess.run([sys.executable, script], check=True)
+
+def _csv_list(s: str):
+    return [x.strip() for x in s.split(",") if x.strip()]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tasks", default=",".join(TASKS), help="Comma-separated task ids")
+    ap.add_argument("--prompts", default=",".join(PROMPTS), help="Comma-separated prompt names")
+    ap.add_argument("--models", default="", help=f"Comma-separated models (default: all in {MODELS_FILE})")
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--warmup", type=int, default=2)
+    ap.add_argument("--energy-source", choices=["none","perf"], default="perf")
+    ap.add_argument("--skip-perf", action="store_true", help="Skip FLOPs measurement if perf missing.")
+    ap.add_argument("--with-codecarbon", action="store_true", help="Log generation energy with CodeCarbon")
+    ap.add_argument("--measure-workers", type=int, default=1, help="Size of the CPU-pinned measurement pool")
+    ap.add_argument("--queue-size", type=int, default=2, help="Generated modules allowed to wait for measurement")
+    ap.add_argument("--skip-analysis", action="store_true", help="Do not run compute_gc.py/stats.py at the end")
+    ap.add_argument("--dry-run", action="store_true", help="Print the matrix and exit")
+    args = ap.parse_args()
+
+    models = _csv_list(args.models) or default_models()
+    jobs = [(t, p, m) for t in _csv_list(args.tasks) for m in models for p in _csv_list(args.prompts)]
+    cpus = measurement_cpus(args.measure_workers)
+    _log(f"[INFO] Sweep: {len(jobs)} jobs, measurement CPUs: {cpus}")
+    if args.dry_run:
+        for t, p, m in jobs:
+            _log(f"  {t} / {p} / {m} -> {variant_name(m, p)}")
+        raise SystemExit(0)
+
+    t0 = time.perf_counter()
+    q: queue.Queue = queue.Queue(maxsize=max(1, args.queue_size))
+    failures: list = []
+    workers = [threading.Thread(target=measure_worker, args=(cpu, q, args, failures), daemon=True)
+               for cpu in cpus]
+    for w in workers:
+        w.start()
+    generate_stage(jobs, q, args, failures)
+    for w in workers:
+        w.join()
+
+    if not args.skip_analysis:
+        run_analysis()
+
+    _log(f"[INFO] Sweep finished in {time.perf_counter() - t0:.1f}s, failures: {len(failures)}")
+    for f in failures:
+        _log(f"  [FAILED] {f[0]}: {f[1]} / {f[2]} / {f[3]}")
+    if failures:
+        raise SystemExit(1)
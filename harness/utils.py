@@ -1,25 +1,75 @@
 import re, os, glob
+from dataclasses import dataclass, fields
+from typing import Optional
+
 FLOPS_EVENT = "fp_arith_inst_retired.scalar_double"
+ENERGY_EVENT = "power/energy-pkg/"
+# One perf invocation collects all counters for the same execution
+PERF_EVENTS = [FLOPS_EVENT, ENERGY_EVENT, "cycles", "instructions"]
+
+@dataclass
+class PerfCounters:
+    """Counters from one perf stat run; None when the event was missing or not counted."""
+    flops: Optional[int] = None
+    energy_j: Optional[float] = None
+    cycles: Optional[int] = None
+    instructions: Optional[int] = None
+
+    def per_iteration(self, iters: int) -> "PerfCounters":
+        if iters <= 1:
+            return self
+        vals = {}
+        for f in fields(self):
+            v = getattr(self, f.name)
+            vals[f.name] = None if v is None else (v / iters if isinstance(v, float) else v // iters)
+        return PerfCounters(**vals)
+
+_EVENT_FIELDS = {
+    FLOPS_EVENT: ("flops", int),
+    ENERGY_EVENT: ("energy_j", float),
+    "cycles": ("cycles", int),
+    "instructions": ("instructions", int),
+}
+
+def _event_name(token: str) -> str:
+    return token.split(":")[0]
+
+def parse_perf_counters(stderr: str) -> PerfCounters:
+    """
+    Parses perf stat stderr for every event in PERF_EVENTS.
+    Handles both CSV format (`-x ,`: value,unit,event,...) and the regular
+    whitespace-separated format. Event modifiers such as ':u' are ignored.
+    """
+    out = PerfCounters()
+    for line in stderr.splitlines():
+        tokens = line.split()
+        if len(tokens) > 2 and tokens[1] == "Joules":
+            tokens = [tokens[0]] + tokens[2:]
+        if len(tokens) >= 2 and _event_name(tokens[1]) in _EVENT_FIELDS:
+            # regular format: "1,770      fp_arith_inst_retired.scalar_double"
+            value, event = tokens[0], _event_name(tokens[1])
+        else:
+            # CSV format: "1770,,fp_arith_inst_retired.scalar_double,..."
+            parts = [p.strip() for p in line.split(",")]
+            if len(parts) < 3:
+                continue
+            value, event = parts[0], _event_name(parts[2])
+        if event not in _EVENT_FIELDS:
+            continue
+        name, conv = _EVENT_FIELDS[event]
+        try:
+            v = float(value.replace(",", ""))
+        except ValueError:
+            continue  # <not counted> / <not supported>
+        setattr(out, name, conv(v))
+    return out
 
 def parse_perf_stderr(stderr: str):
     """
     Extracts the FLOPs event count from perf stderr output.
-    Looks for lines containing the event name and parses the first numeric column.
-    Handles both regular format (whitespace-separated) and CSV format (comma-separated).
+    Kept for callers that only need FLOPs; see parse_perf_counters.
     """
-    flops = None
-    for line in stderr.splitlines():
-        if FLOPS_EVENT in line:
-            # Check if this is CSV format (contains commas)
-            if "," in line:
-                parts = line.strip().split(",")
-            else:
-                parts = line.strip().split()
-            try:
-                flops = int(parts[0].replace(",", ""))
-            except Exception:
-                pass
-    return flops
+    return parse_perf_counters(stderr).flops
 
 def latest_generated_module(task_id: str):
     """
@@ -30,5 +80,11 @@ def latest_generated_module(task_id: str):
     files = sorted(glob.glob(os.path.join(base, "*.py")), key=os.path.getmtime, reverse=True)
     if not files:
         return None
-    path = files[0].replace(os.sep, ".")
+    return module_from_path(files[0])
+
+def module_from_path(path: str) -> str:
+    """
+    Converts a repo-relative file path (e.g., 'tasks/generated/x/y.py') to its module path.
+    """
+    path = os.path.normpath(path).replace(os.sep, ".")
     return path[:-3] if path.endswith(".py") else path
@@ -0,0 +1,193 @@
+"""
+Sandboxed, parallel validation of generated candidates.
+
+Each candidate is validated by tasks.validators.validate in its own
+subprocess with RLIMIT_AS (address space) and RLIMIT_CPU limits and a wall
+timeout, so a candidate that loops forever or allocates without bound only
+takes down its own child. A thread pool runs many children at once, which
+also overlaps the cache validator's TTL sleep. Verdicts are cached by
+(task, sha256 of the candidate file, sha256 of validators.py), so unchanged
+candidates are never re-validated; timing-dependent verdicts (too_slow and
+limit hits) are not cached. --differential additionally runs
+tasks.differential.check on candidates that pass (status `too_slow` or
+`invalid` with a detail line when they diverge from the reference).
+
+    python -m harness.validate_pool --task log_file_parser --workers 4
+"""
+import argparse, hashlib, json, os, signal, subprocess, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from harness.utils import module_from_path
+
+CACHE_FILE = Path("data/cache/validation.json")
+VALIDATORS_FILE = Path("tasks/validators.py")
+DIFFERENTIAL_FILE = Path("tasks/differential.py")
+_CHILD = """
+import resource, sys
+mem, cpu = int(sys.argv[4]) * 1024 * 1024, int(sys.argv[5])
+resource.setrlimit(resource.RLIMIT_AS, (mem, mem))
+resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+from tasks.validators import validate
+try:
+    code = 0 if validate(sys.argv[1], sys.argv[2]) else 1
+    if code == 0 and sys.argv[3] == "1":
+        from tasks.differential import check
+        rep = check(sys.argv[1], sys.argv[2])
+        print(rep.detail)
+        code = 0 if rep.ok else 4 if rep.status == "too_slow" else 1
+except MemoryError:
+    code = 3
+except RecursionError:
+    code = 5
+sys.exit(code)
+"""
+_MEM_EXIT, _SLOW_EXIT, _RECURSION_EXIT = 3, 4, 5
+CACHEABLE = {"valid", "invalid"}  # too_slow and limit hits may depend on machine load
+
+@dataclass
+class Limits:
+    mem_mb: int = 2048
+    cpu_s: int = 30
+    timeout_s: float = 60.0
+
+@dataclass
+class Verdict:
+    task_id: str
+    impl: str
+    status: str             # valid | invalid | too_slow | timeout | cpu_limit | mem_limit | crashed
+    seconds: float = 0.0
+    cached: bool = False
+    detail: str = ""        # differential check finding, if any
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "valid"
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def validate_isolated(task_id: str, impl: str, limits: Limits = Limits(), differential: bool = False) -> Verdict:
+    """
+    Runs validate(task_id, impl) in a resource-limited child process; with
+    `differential`, candidates that pass also go through tasks.differential.check.
+    """
+    t0 = time.perf_counter()
+    try:
+        # the child sets its own limits before importing anything: preexec_fn is not safe from pool threads
+        proc = subprocess.run([sys.executable, "-c", _CHILD, task_id, impl, "1" if differential else "0",
+                               str(limits.mem_mb), str(limits.cpu_s)], capture_output=True, timeout=limits.timeout_s)
+    except subprocess.TimeoutExpired:
+        return Verdict(task_id, impl, "timeout", time.perf_counter() - t0)
+    dt = time.perf_counter() - t0
+    detail = proc.stdout.decode(errors="replace").strip().rsplit("\n", 1)[-1]
+    if proc.returncode in (0, 1):
+        return Verdict(task_id, impl, "valid" if proc.returncode == 0 else "invalid", dt, detail=detail)
+    if proc.returncode == _SLOW_EXIT:
+        return Verdict(task_id, impl, "too_slow", dt, detail=detail)
+    if proc.returncode == _MEM_EXIT:
+        return Verdict(task_id, impl, "mem_limit", dt)
+    if proc.returncode == _RECURSION_EXIT:
+        return Verdict(task_id, impl, "crashed", dt, detail="RecursionError")
+    if proc.returncode in (-signal.SIGXCPU, -signal.SIGKILL):
+        return Verdict(task_id, impl, "cpu_limit", dt)
+    return Verdict(task_id, impl, "crashed", dt)
+
+class VerdictCache:
+    """JSON file of verdicts keyed by task, candidate hash and validators.py hash."""
+    def __init__(self, path: Path = CACHE_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._validators = _sha256(VALIDATORS_FILE)
+        self._differential = _sha256(DIFFERENTIAL_FILE)
+        try:
+            self._data: Dict[str, dict] = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._data = {}
+
+    def key(self, task_id: str, file: Path, differential: bool = False) -> str:
+        checks = self._validators[:16] + (f"+{self._differential[:16]}" if differential else "")
+        return f"{task_id}:{_sha256(file)}:{checks}"
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            return self._data.get(key)
+
+    def put(self, key: str, verdict: Verdict):
+        if verdict.status not in CACHEABLE:
+            return
+        with self._lock:
+            self._data[key] = {"status": verdict.status, "seconds": verdict.seconds, "detail": verdict.detail}
+
+    def save(self):
+        """Writes the verdicts, merged over what is on disk (other harness.run processes may have saved since)."""
+        with self._lock:
+            try:
+                on_disk = json.loads(self.path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                on_disk = {}
+            self._data = {**on_disk, **self._data}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+            tmp.write_text(json.dumps(self._data, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+def module_file(impl: str) -> Optional[Path]:
+    spec = find_spec(impl)
+    return Path(spec.origin) if spec and spec.origin else None
+
+def validate_cached(task_id: str, impl: str, limits: Limits = Limits(),
+                    cache: Optional[VerdictCache] = None, differential: bool = False) -> Verdict:
+    file = module_file(impl) if cache else None
+    key = cache.key(task_id, file, differential) if file else None
+    hit = cache.get(key) if key else None
+    if hit:
+        return Verdict(task_id, impl, hit["status"], hit["seconds"], cached=True, detail=hit.get("detail", ""))
+    v = validate_isolated(task_id, impl, limits, differential)
+    if key:
+        cache.put(key, v)
+    return v
+
+def validate_many(jobs, workers: int = 4, limits: Limits = Limits(),
+                  cache: Optional[VerdictCache] = None, differential: bool = False) -> List[Verdict]:
+    """Validates (task_id, impl) jobs concurrently; verdicts are returned in job order."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        verdicts = list(ex.map(lambda j: validate_cached(j[0], j[1], limits, cache, differential), jobs))
+    if cache:
+        cache.save()
+    return verdicts
+
+def generated_jobs(task_id: str, root: Path = Path("tasks/generated")):
+    return [(task_id, module_from_path(str(p))) for p in sorted((root / task_id).glob("*.py"))
+            if p.name != "__init__.py"]
+
+if __name__ == "__main__":
+    from harness.sweep import TASKS
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--task", action="append", help="Task id to validate tasks/generated/<task>/ for (repeatable; default: all)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--mem-mb", type=int, default=Limits.mem_mb, help="RLIMIT_AS per candidate")
+    ap.add_argument("--cpu-s", type=int, default=Limits.cpu_s, help="RLIMIT_CPU per candidate")
+    ap.add_argument("--timeout-s", type=float, default=Limits.timeout_s, help="Wall-clock limit per candidate")
+    ap.add_argument("--differential", action="store_true",
+                    help="Also compare valid candidates with the reference on random inputs (tasks.differential)")
+    ap.add_argument("--no-cache", action="store_true", help="Ignore and do not update cached verdicts")
+    ap.add_argument("--json", default="", help="Also write the verdicts to this JSON file")
+    args = ap.parse_args()
+
+    jobs = [j for t in (args.task or TASKS) for j in generated_jobs(t)]
+    limits = Limits(args.mem_mb, args.cpu_s, args.timeout_s)
+    print(f"[INFO] Validating {len(jobs)} candidates with {args.workers} workers "
+          f"(mem={limits.mem_mb} MB, cpu={limits.cpu_s}s, timeout={limits.timeout_s}s)")
+    t0 = time.perf_counter()
+    verdicts = validate_many(jobs, args.workers, limits, None if args.no_cache else VerdictCache(), args.differential)
+    for v in verdicts:
+        print(f"[RESULT] {v.status:9s} {v.seconds:6.2f}s{' (cached)' if v.cached else ''}  {v.impl}"
+              + (f"  # {v.detail}" if v.detail else ""))
+    counts = {s: sum(v.status == s for v in verdicts) for s in sorted({v.status for v in verdicts})}
+    print(f"[INFO] {counts} in {time.perf_counter() - t0:.1f}s")
+    if args.json:
+        Path(args.json).write_text(json.dumps([asdict(v) for v in verdicts], indent=1), encoding="utf-8")
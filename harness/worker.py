@@ -0,0 +1,218 @@
+"""
+Persistent measurement worker.
+
+The child imports the candidate once, prepares its workload and then serves
+"setup N" / "run" commands over a pipe, so perf counters no longer include
+interpreter startup, module import or fixture construction ("setup" runs
+before perf is enabled). The parent attaches `perf stat -p <pid>` to the
+child, starting with counters disabled (`-D -1`) and enabling them through a
+`--control` fifo only while the child executes the requested iterations.
+Perf builds without `--control` fall back to a plain attach.
+
+`-p PID` scopes the core PMU events (cycles, instructions, FLOPs) to the
+child, but `power/energy-pkg/` is a RAPL package counter: it reports the
+whole CPU package's energy while the window is open, including other
+processes and idle cores, not the child's share.
+"""
+import argparse, os, select, signal, subprocess, sys, tempfile, time
+
+from harness.env import gc_disabled
+from harness.utils import parse_perf_counters, PerfCounters
+
+ACK_TIMEOUT_S = 5.0
+ATTACH_SETTLE_S = 0.05
+
+class WorkerError(RuntimeError):
+    pass
+
+class MeasurementWorker:
+    """
+    Parent-side handle for a `python -m harness.worker` child.
+    Use as a context manager; the child is stopped on exit.
+    """
+    def __init__(self, workload: str, impl: str, size=None, workers=None, no_gc: bool = False):
+        cmd_r, self._cmd_w = os.pipe()
+        self._reply_r, reply_w = os.pipe()
+        size_args = ["--size", str(size)] if size is not None else []
+        if workers is not None:
+            size_args += ["--workers", str(workers)]
+        if no_gc:
+            size_args.append("--no-gc")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "harness.worker", "--workload", workload, "--impl", impl, *size_args,
+             "--cmd-fd", str(cmd_r), "--reply-fd", str(reply_w)],
+            pass_fds=(cmd_r, reply_w),
+        )
+        os.close(cmd_r)
+        os.close(reply_w)
+        self._cmd = os.fdopen(self._cmd_w, "w", buffering=1)
+        self._reply = os.fdopen(self._reply_r, "r")
+        self._use_control = True
+        if self._read_reply() != "ready":
+            raise WorkerError("worker failed to start")
+
+    @property
+    def pid(self) -> int:
+        return self.proc.pid
+
+    def _read_reply(self) -> str:
+        line = self._reply.readline()
+        if not line:
+            raise WorkerError(f"worker exited (rc={self.proc.poll()})")
+        line = line.strip()
+        if line.startswith("error "):
+            raise WorkerError(line[len("error "):])
+        return line
+
+    def setup(self, iters: int = 1):
+        """Builds `iters` fixtures in the child (outside any perf window)."""
+        self._cmd.write(f"setup {iters}\n")
+        if self._read_reply() != "ready":
+            raise WorkerError("setup failed")
+
+    def run(self, iters: int = 1) -> float:
+        """Runs the workload `iters` times in the child; returns the child's wall time (s)."""
+        self.setup(iters)
+        return self._run()
+
+    def _run(self) -> float:
+        self._cmd.write("run\n")
+        reply = self._read_reply()
+        if not reply.startswith("done "):
+            raise WorkerError(f"unexpected reply: {reply}")
+        return float(reply.split()[1])
+
+    def perf_stat(self, events, iters: int = 1) -> str:
+        """
+        Runs `iters` iterations with perf attached to the child and returns perf's
+        stderr (CSV, `-x ,`). Counters only cover the "run" command.
+        """
+        if self._use_control:
+            stderr = self._perf_stat_control(events, iters)
+            if stderr is not None:
+                return stderr
+            print("[WARN] perf --control unavailable; falling back to plain attach")
+            self._use_control = False
+        return self._perf_stat_attach(events, iters)
+
+    def _perf_cmd(self, events, extra=()):
+        return ["perf", "stat", "-x", ",", "-e", ",".join(events), "-p", str(self.pid), *extra]
+
+    def _perf_stat_control(self, events, iters: int):
+        with tempfile.TemporaryDirectory() as d:
+            ctl_path, ack_path = os.path.join(d, "ctl"), os.path.join(d, "ack")
+            os.mkfifo(ctl_path)
+            os.mkfifo(ack_path)
+            # O_RDWR so neither open blocks if perf never shows up
+            ctl = os.open(ctl_path, os.O_RDWR)
+            ack = os.open(ack_path, os.O_RDWR)
+            perf = subprocess.Popen(
+                self._perf_cmd(events, ("-D", "-1", "--control", f"fifo:{ctl_path},{ack_path}")),
+                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+            )
+            try:
+                self.setup(iters)
+                if not self._control(ctl, ack, b"enable\n", perf):
+                    perf.kill()
+                    perf.communicate()
+                    return None
+                self._run()
+                self._control(ctl, ack, b"disable\n", perf)
+                perf.send_signal(signal.SIGINT)
+                _, stderr = perf.communicate(timeout=ACK_TIMEOUT_S)
+                return stderr
+            finally:
+                if perf.poll() is None:
+                    perf.kill()
+                os.close(ctl)
+                os.close(ack)
+
+    @staticmethod
+    def _control(ctl: int, ack: int, msg: bytes, perf) -> bool:
+        os.write(ctl, msg)
+        deadline = time.monotonic() + ACK_TIMEOUT_S
+        while time.monotonic() < deadline:
+            if perf.poll() is not None:
+                return False
+            ready, _, _ = select.select([ack], [], [], 0.05)
+            if ready:
+                os.read(ack, 64)
+                return True
+        return False
+
+    def _perf_stat_attach(self, events, iters: int) -> str:
+        self.setup(iters)
+        perf = subprocess.Popen(self._perf_cmd(events), stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, text=True)
+        time.sleep(ATTACH_SETTLE_S)
+        try:
+            self._run()
+        finally:
+            perf.send_signal(signal.SIGINT)
+        _, stderr = perf.communicate(timeout=ACK_TIMEOUT_S)
+        return stderr
+
+    def perf_counters(self, events, iters: int = 1) -> PerfCounters:
+        """All `events` from one perf window, reported per iteration."""
+        return parse_perf_counters(self.perf_stat(events, iters)).per_iteration(iters)
+
+    def close(self):
+        try:
+            self._cmd.write("quit\n")
+            self._cmd.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self._reply.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def serve(workload_name: str, impl: str, size, cmd_fd: int, reply_fd: int, workers=None, no_gc: bool = False):
+    from importlib import import_module
+    from harness.workloads import prepare
+
+    reply = os.fdopen(reply_fd, "w", buffering=1)
+    try:
+        workload = prepare(workload_name, import_module(impl), size, workers)
+    except Exception as e:
+        reply.write(f"error {type(e).__name__}: {e}\n")
+        return
+    reply.write("ready\n")
+    with os.fdopen(cmd_fd, "r") as cmds:
+        for line in cmds:
+            parts = line.split()
+            if not parts or parts[0] == "quit":
+                break
+            try:
+                if parts[0] == "setup":
+                    workload.setup(int(parts[1]) if len(parts) > 1 else 1)
+                    reply.write("ready\n")
+                elif parts[0] == "run":
+                    with gc_disabled(no_gc):
+                        t0 = time.perf_counter()
+                        workload.run()
+                        dt = time.perf_counter() - t0
+                    reply.write(f"done {dt}\n")
+                else:
+                    reply.write(f"error unknown command {parts[0]}\n")
+            except Exception as e:
+                reply.write(f"error {type(e).__name__}: {e}\n")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workload", required=True, help="Workload name from harness.workloads")
+    ap.add_argument("--impl", required=True)
+    ap.add_argument("--size", type=int, default=None)
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--cmd-fd", type=int, required=True)
+    ap.add_argument("--reply-fd", type=int, required=True)
+    ap.add_argument("--no-gc", action="store_true", help="Disable the garbage collector while running iterations")
+    args = ap.parse_args()
+    serve(args.workload, args.impl, args.size, args.cmd_fd, args.reply_fd, args.workers, args.no_gc)
@@ -0,0 +1,359 @@
+"""
+Declarative workload registry.
+
+Each workload declares a data builder (size -> fixture), an entrypoint adapter
+(module -> callable(fixture)) and a default size. The in-process runner, the
+`python -c` perf child and the persistent worker all go through `prepare`, so
+they execute the same workload. Fixtures are built in `setup()`, outside the
+timed/traced region, and rebuilt per iteration so candidates that mutate their
+input do not get cheaper inputs on later iterations. Workloads that declare
+`parallel=True` take a `workers` count, passed through to their adapter.
+"""
+import json, os, random, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+FIXTURE_DIR = Path("data/fixtures")
+
+@dataclass(frozen=True)
+class Workload:
+    task_id: str                                      # task whose validator applies
+    build: Callable[[Optional[int]], Any]             # size -> fixture
+    adapt: Callable[[Any], Callable[[Any], Any]]      # module -> fn(fixture)
+    size: Optional[int] = None
+    unit: Optional[str] = None                        # throughput unit, e.g. "GB"
+    units: Optional[Callable[[Any, Optional[int]], float]] = None  # (fixture, size) -> work in `unit`
+    parallel: bool = False                            # adapter accepts workers=N
+    summary: Optional[Callable[[Any], str]] = None    # run output -> extra result line
+
+class PreparedWorkload:
+    """A workload bound to a module. Call setup() outside the measured region, then run()."""
+    def __init__(self, workload: Workload, fn: Callable[[Any], Any], size: Optional[int]):
+        self.workload = workload
+        self.size = size
+        self._fn = fn
+        self._fixtures: list = []
+        self.last_units: Optional[float] = None
+        self.last_out: Any = None
+
+    def summarize(self) -> Optional[str]:
+        """Extra result line from the last run's output (computed outside the timed region)."""
+        out, self.last_out = self.last_out, None
+        return self.workload.summary(out) if self.workload.summary and out is not None else None
+
+    def setup(self, iters: int = 1):
+        self._fixtures = [self.workload.build(self.size) for _ in range(iters)]
+        if self.workload.units:
+            self.last_units = self.workload.units(self._fixtures[-1], self.size)
+
+    def run(self):
+        if not self._fixtures:
+            self.setup()
+        fixtures, self._fixtures = self._fixtures, []
+        out = None
+        for f in fixtures:
+            out = self._fn(f)
+        if self.workload.summary:
+            self.last_out = out
+        return out
+
+    def __call__(self):
+        self.setup()
+        return self.run()
+
+def has_run_task(mod) -> bool:
+    return hasattr(mod, "run_task") and callable(getattr(mod, "run_task"))
+
+def _fallback_entrypoint(task_id: str, mod):
+    # Try common function names if present
+    for name in ("main", "run", "solve"):
+        fn = getattr(mod, name, None)
+        if callable(fn):
+            return lambda _fixture: fn()
+    raise AttributeError(f"No runnable entrypoint found for task '{task_id}'. Module lacks run_task and known APIs.")
+
+# --- Data builders (deterministic) ---
+def build_log_lines(n: int):
+    rnd = random.Random(42)
+    lines = []
+    for i in range(n):
+        lines.append(f"[t] INFO start {i}")
+        if i % 3 == 0:
+            lines.append(f"[t] ERROR E123: bad {i}")
+        if i % 10 == 0:
+            lines.append(f"2025-01-01T00:00:00Z ERROR E42 minor {i}")
+        if i % 25 == 0 and rnd.random() < 0.5:
+            lines.append("unstructured line")
+    return lines
+
+def build_log_file(size_bytes: int) -> str:
+    """
+    Writes (once) a deterministic log of at least `size_bytes` to data/fixtures/
+    using the build_log_lines pattern, and returns its path.
+    """
+    path = FIXTURE_DIR / f"log_{size_bytes}.log"
+    if path.exists() and path.stat().st_size >= size_bytes:
+        return str(path)
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    block = ("\n".join(build_log_lines(10000)) + "\n").encode()
+    written = 0
+    with open(tmp, "wb") as f:
+        while written < size_bytes:
+            f.write(block)
+            written += len(block)
+    os.replace(tmp, path)
+    return str(path)
+
+def _record(rid: int) -> dict:
+    rec = {"id": rid, "timestamp": f"t{rid}"}
+    if rid % 4 == 0:
+        rec["user"] = {"id": rid % 10, "name": f"U{rid%10}"}
+    # 0–2 items
+    k = rid % 3
+    if k:
+        rec["items"] = [{"sku": f"S{(rid+j)%50}", "qty": (j+1)} for j in range(k)]
+    return rec
+
+def build_records(n: int):
+    return [_record(rid) for rid in range(n)]
+
+def records_rows(n: int) -> int:
+    """Flattened rows produced by build_records(n): record `rid` has rid % 3 items."""
+    full, rem = divmod(n, 3)
+    return 3 * full + (rem == 2)
+
+def build_ndjson_file(n: int) -> str:
+    """Writes (once) build_records(n) as newline-delimited JSON to data/fixtures/ and returns its path."""
+    path = FIXTURE_DIR / f"records_{n}.ndjson"
+    if path.exists():
+        return str(path)
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    dumps = json.JSONEncoder(separators=(",", ":")).encode
+    with open(tmp, "w", encoding="utf-8") as f:
+        for start in range(0, n, 10000):
+            f.write("".join(dumps(_record(rid)) + "\n" for rid in range(start, min(n, start + 10000))))
+    os.replace(tmp, path)
+    return str(path)
+
+def build_cache_ops(n: int):
+    # (key, value to put first or None); every op also does a get.
+    # Key space scales with n (2000 keys at the default 20000 ops).
+    keys = max(1, n // 10)
+    return [(f"k{i%keys}", str(i) if i % 3 == 0 else None) for i in range(n)]
+
+def build_cache_ops_highcard(n: int):
+    # write-heavy, every key unique: a put per op, a get of a recent key every 4th op
+    return [(f"h{i}", str(i)) if i % 4 else (f"h{i-1}", None) for i in range(n)]
+
+def build_cache_ops_mixed(n: int, write_ratio: float = 0.1):
+    # (key, value) puts and (key, None) gets, ~10% writes over n // 10 keys
+    rnd = random.Random(7)
+    keys = max(1, n // 10)
+    return [(f"k{rnd.randrange(keys)}", str(i) if rnd.random() < write_ratio else None) for i in range(n)]
+
+# --- Entrypoint adapters ---
+NDJSON_BATCH = 4096  # records per batch for streaming ingest
+CACHE_THREADS = 8    # default thread count for the concurrent cache workload
+CACHE_BATCH = 64     # ops per get_many/put_many call
+
+def _adapt_sort(mod):
+    if has_run_task(mod):
+        return lambda n: mod.run_task(n, seed=7)
+    return _fallback_entrypoint("inefficient_sort", mod)
+
+def _adapt_modular(mod):
+    if has_run_task(mod):
+        return lambda n: mod.run_task(n)
+    return _fallback_entrypoint("modular_example", mod)
+
+def _adapt_no_args(task_id):
+    def adapt(mod):
+        if has_run_task(mod):
+            return lambda _fixture: mod.run_task()
+        return _fallback_entrypoint(task_id, mod)
+    return adapt
+
+def _adapt_log(mod):
+    if has_run_task(mod):
+        return mod.run_task
+    if callable(getattr(mod, "parse_errors", None)):
+        return mod.parse_errors
+    return _fallback_entrypoint("log_file_parser", mod)
+
+def _adapt_log_stream(mod):
+    if callable(getattr(mod, "parse_errors_stream", None)):
+        return mod.parse_errors_stream
+    fn = _adapt_log(mod)
+    def _run(path):
+        # candidates written for list[str] get a lazily-read text file instead
+        with open(path, encoding="utf-8", errors="replace") as f:
+            return fn(f)
+    return _run
+
+def _adapt_log_sharded(mod, workers=None):
+    if callable(getattr(mod, "parse_errors_parallel", None)):
+        return lambda path: mod.parse_errors_parallel(path, workers=workers)
+    # no parallel entrypoint: the single-process streaming path is the baseline
+    return _adapt_log_stream(mod)
+
+def _adapt_json(mod):
+    if has_run_task(mod):
+        return mod.run_task
+    if callable(getattr(mod, "normalize_records", None)):
+        return mod.normalize_records
+    return _fallback_entrypoint("json_data_normalizer", mod)
+
+def _adapt_json_columnar(mod):
+    if callable(getattr(mod, "normalize_columnar", None)):
+        return mod.normalize_columnar
+    return _adapt_json(mod)
+
+def _adapt_json_ndjson(mod):
+    if callable(getattr(mod, "iter_ndjson_rows", None)):
+        def _run(path):
+            rows = 0
+            for batch in mod.iter_ndjson_rows(path, batch_size=NDJSON_BATCH):
+                rows += len(batch)
+            return rows
+        return _run
+    fn = _adapt_json(mod)
+    def _run(path):
+        # candidates without a streaming entrypoint parse the whole file first
+        with open(path, "rb") as f:
+            return fn([json.loads(line) for line in f if line.strip()])
+    return _run
+
+def _adapt_cache_ttl(ttl_seconds):
+    def adapt(mod):
+        if has_run_task(mod):
+            return lambda _ops: mod.run_task()
+        if not hasattr(mod, "ExpiringCache"):
+            return _fallback_entrypoint("cache_with_expiry", mod)
+        Cache = mod.ExpiringCache
+        def _run(ops):
+            c = Cache(ttl_seconds=ttl_seconds)
+            # exercise put/get; no sleeps
+            for k, v in ops:
+                if v is not None:
+                    c.put(k, v)
+                c.get(k)
+        return _run
+    return adapt
+
+_adapt_cache = _adapt_cache_ttl(60)  # expiration not required during run
+
+def _adapt_cache_batched(mod):
+    if not callable(getattr(getattr(mod, "ExpiringCache", None), "get_many", None)):
+        return _adapt_cache(mod)  # no batch API: the per-op loop
+    Cache = mod.ExpiringCache
+    def _run(ops):
+        c = Cache(ttl_seconds=60)
+        for i in range(0, len(ops), CACHE_BATCH):
+            batch = ops[i:i + CACHE_BATCH]
+            c.put_many([(k, v) for k, v in batch if v is not None])
+            c.get_many([k for k, _ in batch])
+    return _run
+
+class _Locked:
+    """One global lock around a cache that has no thread-safety of its own."""
+    def __init__(self, cache):
+        self._cache, self._lock = cache, threading.Lock()
+    def get(self, key):
+        with self._lock:
+            return self._cache.get(key)
+    def put(self, key, value):
+        with self._lock:
+            self._cache.put(key, value)
+
+def _adapt_cache_concurrent(mod, workers=None):
+    workers = workers or CACHE_THREADS
+    if callable(getattr(mod, "ShardedExpiringCache", None)):
+        make = lambda: mod.ShardedExpiringCache(ttl_seconds=60)
+    elif hasattr(mod, "ExpiringCache"):
+        make = lambda: _Locked(mod.ExpiringCache(ttl_seconds=60))
+    else:
+        return _fallback_entrypoint("cache_with_expiry", mod)
+    def _worker(c, ops):
+        lat = []
+        clock = time.perf_counter_ns
+        for k, v in ops:
+            t0 = clock()
+            if v is None:
+                c.get(k)
+            else:
+                c.put(k, v)
+            lat.append(clock() - t0)
+        return lat
+    def _run(ops):
+        c = make()
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            parts = ex.map(_worker, [c] * workers, [ops[i::workers] for i in range(workers)])
+            return [x for part in parts for x in part]  # per-op latencies (ns)
+    return _run
+
+def _p99_summary(lat) -> str:
+    if not isinstance(lat, list) or not lat:
+        return "p99=n/a"
+    lat = sorted(lat)
+    return f"p99={lat[int(0.99 * (len(lat) - 1))] / 1e3:.1f} us/op"
+
+WORKLOADS = {
+    "inefficient_sort": Workload("inefficient_sort", lambda n: n, _adapt_sort, 300),
+    "modular_example": Workload("modular_example", lambda n: n, _adapt_modular, 10000),
+    "unit_test_gen": Workload("unit_test_gen", lambda n: None, _adapt_no_args("unit_test_gen")),
+    "log_file_parser": Workload("log_file_parser", build_log_lines, _adapt_log, 4000),
+    # size in bytes of an on-disk log (>= 1 GiB by default)
+    "log_file_parser_stream": Workload("log_file_parser", build_log_file, _adapt_log_stream, 1 << 30,
+                                       unit="GB", units=lambda p, _n: os.path.getsize(p) / 1e9),
+    # same file, split into line-aligned byte ranges parsed by a process pool
+    "log_file_parser_sharded": Workload("log_file_parser", build_log_file, _adapt_log_sharded, 1 << 30,
+                                        unit="GB", units=lambda p, _n: os.path.getsize(p) / 1e9, parallel=True),
+    "json_data_normalizer": Workload("json_data_normalizer", build_records, _adapt_json, 2000),
+    # same records, compact column-array output instead of one dict per row
+    "json_data_normalizer_columnar": Workload("json_data_normalizer", build_records, _adapt_json_columnar, 2000),
+    # size in records of an on-disk NDJSON file, parsed and flattened end to end
+    "json_data_normalizer_ndjson": Workload("json_data_normalizer", build_ndjson_file, _adapt_json_ndjson, 1_000_000,
+                                            unit="rows", units=lambda _p, n: records_rows(n)),
+    "cache_with_expiry": Workload("cache_with_expiry", build_cache_ops, _adapt_cache, 20000),
+    # unique keys with a TTL far shorter than the run: caches that only expire
+    # lazily in get() keep every key, which shows up in mem_kib
+    "cache_with_expiry_highcard": Workload("cache_with_expiry", build_cache_ops_highcard,
+                                           _adapt_cache_ttl(0.01), 200000),
+    # the cache_with_expiry ops through get_many/put_many, one clock read per batch
+    "cache_with_expiry_batched": Workload("cache_with_expiry", build_cache_ops, _adapt_cache_batched, 20000),
+    # get/put mix from a thread pool; the sharded cache if present, else the cache behind one lock
+    "cache_with_expiry_concurrent": Workload("cache_with_expiry", build_cache_ops_mixed, _adapt_cache_concurrent,
+                                             200000, unit="ops", units=lambda _ops, n: n, parallel=True,
+                                             summary=_p99_summary),
+}
+
+def get_workload(name: str) -> Workload:
+    """Registered workload by name; unknown names get a no-argument run_task workload."""
+    wl = WORKLOADS.get(name)
+    if wl is None:
+        wl = Workload(name, lambda n: None, _adapt_no_args(name))
+    return wl
+
+def prepare(name: str, mod, size: Optional[int] = None, workers: Optional[int] = None) -> PreparedWorkload:
+    wl = get_workload(name)
+    if workers is not None and not wl.parallel:
+        raise ValueError(f"workload '{name}' does not take a worker count")
+    fn = wl.adapt(mod, workers=workers) if wl.parallel else wl.adapt(mod)
+    return PreparedWorkload(wl, fn, wl.size if size is None else size)
+
+def snippet(name: str, module_name: str, size: Optional[int] = None, workers: Optional[int] = None,
+            no_gc: bool = False) -> str:
+    """
+    Python snippet for `python -c` that runs the same workload in a child process
+    (perf counts the whole child, fixture construction included); `no_gc` keeps
+    the garbage collector off while the workload runs, as harness.run --no-gc does in-process.
+    """
+    return (
+        "from importlib import import_module; from harness.env import gc_disabled; from harness.workloads import prepare\n"
+        f"w=prepare({name!r}, import_module({module_name!r}), {size!r}, {workers!r}); w.setup()\n"
+        f"with gc_disabled({no_gc!r}): w.run()"
+    )
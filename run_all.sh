@@ -1,68 +1,16 @@
 #!/bin/bash
-# Script to run all required make commands for green-prompting-experiments
+# Script to run the full task × prompt × model matrix for green-prompting-experiments
 set -e
 
 . venv/bin/activate
 
-# full-sort
-make full-sort MODEL=deepseek-coder:6.7b PROMPT=baseline
-make full-sort MODEL=deepseek-coder:6.7b PROMPT=cot_then_optimize
-make full-sort MODEL=deepseek-coder:6.7b PROMPT=eff_from_scratch
-make full-sort MODEL=deepseek-coder:6.7b PROMPT=tagged_explained
-make full-sort MODEL=qwen2.5-coder:7b PROMPT=baseline
-make full-sort MODEL=qwen2.5-coder:7b PROMPT=cot_then_optimize
-make full-sort MODEL=qwen2.5-coder:7b PROMPT=eff_from_scratch
-make full-sort MODEL=qwen2.5-coder:7b PROMPT=tagged_explained
-
-# full-mod
-make full-mod MODEL=deepseek-coder:6.7b PROMPT=baseline
-make full-mod MODEL=deepseek-coder:6.7b PROMPT=cot_then_optimize
-make full-mod MODEL=deepseek-coder:6.7b PROMPT=eff_from_scratch
-make full-mod MODEL=deepseek-coder:6.7b PROMPT=tagged_explained
-make full-mod MODEL=qwen2.5-coder:7b PROMPT=baseline
-make full-mod MODEL=qwen2.5-coder:7b PROMPT=cot_then_optimize
-make full-mod MODEL=qwen2.5-coder:7b PROMPT=eff_from_scratch
-make full-mod MODEL=qwen2.5-coder:7b PROMPT=tagged_explained
-
-# full-unit
-make full-unit MODEL=deepseek-coder:6.7b PROMPT=baseline
-make full-unit MODEL=deepseek-coder:6.7b PROMPT=cot_then_optimize
-make full-unit MODEL=deepseek-coder:6.7b PROMPT=eff_from_scratch
-make full-unit MODEL=deepseek-coder:6.7b PROMPT=tagged_explained
-make full-unit MODEL=qwen2.5-coder:7b PROMPT=baseline
-make full-unit MODEL=qwen2.5-coder:7b PROMPT=cot_then_optimize
-make full-unit MODEL=qwen2.5-coder:7b PROMPT=eff_from_scratch
-make full-unit MODEL=qwen2.5-coder:7b PROMPT=tagged_explained
-
-# full-cacheexp
-make full-cacheexp MODEL=deepseek-coder:6.7b PROMPT=baseline
-make full-cacheexp MODEL=deepseek-coder:6.7b PROMPT=cot_then_optimize
-make full-cacheexp MODEL=deepseek-coder:6.7b PROMPT=eff_from_scratch
-make full-cacheexp MODEL=deepseek-coder:6.7b PROMPT=tagged_explained
-make full-cacheexp MODEL=qwen2.5-coder:7b PROMPT=baseline
-make full-cacheexp MODEL=qwen2.5-coder:7b PROMPT=cot_then_optimize
-make full-cacheexp MODEL=qwen2.5-coder:7b PROMPT=eff_from_scratch
-make full-cacheexp MODEL=qwen2.5-coder:7b PROMPT=tagged_explained
-
-# full-jsonnorm
-make full-jsonnorm MODEL=deepseek-coder:6.7b PROMPT=baseline
-make full-jsonnorm MODEL=deepseek-coder:6.7b PROMPT=cot_then_optimize
-make full-jsonnorm MODEL=deepseek-coder:6.7b PROMPT=eff_from_scratch
-make full-jsonnorm MODEL=deepseek-coder:6.7b PROMPT=tagged_explained
-make full-jsonnorm MODEL=qwen2.5-coder:7b PROMPT=baseline
-make full-jsonnorm MODEL=qwen2.5-coder:7b PROMPT=cot_then_optimize
-make full-jsonnorm MODEL=qwen2.5-coder:7b PROMPT=eff_from_scratch
-make full-jsonnorm MODEL=qwen2.5-coder:7b PROMPT=tagged_explained
-
-# full-log
-make full-log MODEL=deepseek-coder:6.7b PROMPT=baseline
-make full-log MODEL=deepseek-coder:6.7b PROMPT=cot_then_optimize
-make full-log MODEL=deepseek-coder:6.7b PROMPT=eff_from_scratch
-make full-log MODEL=deepseek-coder:6.7b PROMPT=tagged_explained
-make full-log MODEL=qwen2.5-coder:7b PROMPT=baseline
-make full-log MODEL=qwen2.5-coder:7b PROMPT=cot_then_optimize
-make full-log MODEL=qwen2.5-coder:7b PROMPT=eff_from_scratch
-make full-log MODEL=qwen2.5-coder:7b PROMPT=tagged_explained
+# Generation feeds a bounded queue; measurement runs on CPU-pinned workers;
+# compute_gc.py and stats.py run once at the end (see harness/sweep.py).
+python -m harness.sweep \
+	--tasks inefficient_sort,modular_example,unit_test_gen,cache_with_expiry,json_data_normalizer,log_file_parser \
+	--prompts baseline,cot_then_optimize,eff_from_scratch,tagged_explained \
+	--models deepseek-coder:6.7b,qwen2.5-coder:7b \
+	--runs 10 --warmup 2 --energy-source perf --with-codecarbon
 
 # llmcarbon
 make llmcarbon GRID=340 PUE=1.0 EMB=300
@@ -0,0 +1,235 @@
+"""
+Property-based differential checks against the reference implementations.
+
+validators.validate checks one tiny hand-written fixture per task. check()
+instead generates seeded random inputs of increasing size (edge cases mixed
+in), runs candidate and reference on each, and compares the outputs. Each
+size also has a time budget relative to the reference: a candidate slower
+than `budget` x reference, or whose time grows clearly faster than the
+reference's from one size to the next (e.g. O(n^2) vs O(n)), is flagged
+`too_slow` and larger sizes are not attempted. A size is only flagged if it
+still is on the best of REPEATS timings, so one noisy run (e.g. under
+validate_pool --workers 4) does not fail a candidate.
+
+    python -m tasks.differential --task-id log_file_parser --impl tasks.generated.log_file_parser.<module>
+"""
+import argparse, math, random, time
+from dataclasses import dataclass, field
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from tasks.validators import _FakeClock, _accepts, _as_list, _sort_rows
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000)
+BUDGET = 10.0       # candidate may take up to BUDGET x the reference time per size
+MIN_BUDGET_S = 0.05 # below this, timings are noise and never flagged
+SLOPE_MIN_S = 0.25  # the growth test compares two timings, so it needs a higher floor
+SLOPE_SLACK = 0.5   # allowed excess log-log growth exponent over the reference
+REPEATS = 3         # a flagged size is re-timed and judged on the best of this many runs
+
+@dataclass
+class SizeResult:
+    n: int
+    ok: bool
+    cand_s: float
+    ref_s: float
+
+    @property
+    def ratio(self) -> float:
+        return self.cand_s / self.ref_s if self.ref_s > 0 else math.inf
+
+@dataclass
+class DiffReport:
+    task_id: str
+    impl: str
+    status: str              # pass | mismatch | too_slow | error | skipped
+    detail: str = ""
+    sizes: List[SizeResult] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("pass", "skipped")
+
+# --- Seeded input generators (rnd, n) -> input ---
+_LOG_TEMPLATES = (
+    "[{ts}] INFO started {i}",
+    "[{ts}] WARN slow request {i}",
+    "[{ts}] ERROR E{c}: something bad happened",
+    "{ts} ERROR E{c} Disk full",
+    "[{ts}] ERROR E{c}",
+    "[{ts}] ERROR   E{c}, trailing spaces   ",
+    "[{ts}] ERROR\tE{c} tab separated",
+    "[{ts}] ERROR E_{c} underscore code",
+    "[{ts}] ERROR : missing code",
+    "[{ts}] ERROR e{c} lowercase code",
+    "[{ts}] ERROR X{c} not an E code",
+    "[{ts}] ERRORE{c} no space",
+    "[{ts}] ERROR E{c}ERROR E1 glued",
+    "[{ts}] ERROR E{c}: ünïcode détail",
+    "no level here {i}",
+    "",
+)
+
+def gen_log_lines(rnd: random.Random, n: int) -> List[str]:
+    out = []
+    for i in range(n):
+        t = rnd.choice(_LOG_TEMPLATES)
+        ts = rnd.choice(("t", "2025-01-01T00:00:00Z", "2025-01-01 12:34:56"))
+        out.append(t.format(ts=ts, i=i, c=rnd.randrange(1000)))
+    return out
+
+def gen_records(rnd: random.Random, n: int) -> List[Dict[str, Any]]:
+    out = []
+    for rid in range(n):
+        rec: Dict[str, Any] = {"id": rid, "timestamp": f"t{rnd.randrange(10**6)}"}
+        u = rnd.random()
+        if u < 0.4:
+            rec["user"] = {"id": rnd.randrange(100), "name": f"U{rnd.randrange(100)}"}
+        elif u < 0.5:
+            rec["user"] = {"id": rnd.randrange(100)}         # partial user
+        k = rnd.randrange(4)
+        if k or rnd.random() < 0.5:                          # else: no "items" key
+            rec["items"] = [{"sku": f"S{rnd.randrange(50)}", "qty": rnd.randrange(1, 10)} for _ in range(k)]
+        out.append(rec)
+    return out
+
+def gen_cache_ops(rnd: random.Random, n: int, expiry: bool) -> List[Tuple[str, str, Any]]:
+    """("put", key, value), ("get", key, None) and, with expiry, ("tick", "", seconds)."""
+    keys = max(1, n // 8)
+    ops = []
+    for i in range(n):
+        r = rnd.random()
+        if expiry and r < 0.02:
+            ops.append(("tick", "", rnd.choice((0.3, 0.6, 1.2))))
+        elif r < 0.4:
+            ops.append(("put", f"k{rnd.randrange(keys)}", f"v{i}"))
+        else:
+            ops.append(("get", f"k{rnd.randrange(keys)}", None))
+    return ops
+
+# --- Per-task runners: (candidate module, reference module, rnd, n) -> (cand_fn, ref_fn, compare) ---
+def _replay_cache(cls, ops, clock):
+    cache = cls(1, clock=clock) if clock else cls(3600)
+    got = []
+    for op, key, arg in ops:
+        if op == "put":
+            cache.put(key, arg)
+        elif op == "get":
+            got.append(cache.get(key))
+        else:
+            clock.advance(arg)
+    return got
+
+def _case_cache(mod, ref, rnd, n):
+    # expiry is only exercised when both caches take an injectable clock; otherwise a
+    # TTL long enough that nothing expires keeps the check independent of wall time
+    expiry = _accepts(mod.ExpiringCache, "clock")
+    ops = gen_cache_ops(rnd, n, expiry)
+    return (lambda: _replay_cache(mod.ExpiringCache, ops, _FakeClock() if expiry else None),
+            lambda: _replay_cache(ref.ExpiringCache, ops, _FakeClock() if expiry else None),
+            lambda a, b: a == b)
+
+def _case_log(mod, ref, rnd, n):
+    lines = gen_log_lines(rnd, n)
+    # candidates may consume or mutate their input; a fresh copy per call keeps re-timing fair
+    return (lambda: mod.run_task(list(lines)), lambda: ref.parse_errors(lines),
+            lambda a, b: isinstance(a, dict) and {k: list(v) for k, v in a.items()} == b)
+
+def _case_json(mod, ref, rnd, n):
+    data = gen_records(rnd, n)
+    fn = mod.run_task if hasattr(mod, "run_task") else mod.normalize_records
+    return (lambda: fn(data), lambda: ref.normalize_records(data),
+            lambda a, b: _sort_rows(list(a)) == _sort_rows(b))
+
+def _case_sort(mod, ref, rnd, n):
+    seed = rnd.randrange(10**6)
+    def compare(a, _b):
+        lst = _as_list(a)
+        return lst is not None and len(lst) == n and all(0 <= x <= 10000 for x in lst) \
+            and all(lst[i] <= lst[i + 1] for i in range(len(lst) - 1))
+    return lambda: mod.run_task(n, seed=seed), lambda: ref.run_task(n, seed=seed), compare
+
+def _case_modular(mod, ref, rnd, n):
+    return (lambda: mod.run_task(n), lambda: ref.run_task(n),
+            lambda a, b: isinstance(a, float) and math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9))
+
+CASES: Dict[str, Tuple[str, Callable]] = {
+    "log_file_parser": ("tasks.reference.log_file_parser", _case_log),
+    "json_data_normalizer": ("tasks.reference.json_data_normalizer", _case_json),
+    "cache_with_expiry": ("tasks.reference.cache_with_expiry", _case_cache),
+    "inefficient_sort": ("tasks.reference.inefficient_sort_human", _case_sort),
+    "modular_example": ("tasks.reference.modular_example_human", _case_modular),
+}
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+def _slope(a: SizeResult, b: SizeResult, attr: str) -> float:
+    x, y = getattr(a, attr), getattr(b, attr)
+    return math.log(y / x) / math.log(b.n / a.n) if x > 0 and y > 0 else 0.0
+
+def _best(fn, repeats: int) -> float:
+    return min(_timed(fn)[1] for _ in range(repeats))
+
+def _too_slow(report: DiffReport, r: SizeResult, budget: float) -> str:
+    """Why the latest size `r` is too slow, or "" if it is within budget."""
+    if r.cand_s > max(budget * r.ref_s, MIN_BUDGET_S):
+        return f"{r.ratio:.1f}x reference at n={r.n} (budget {budget:g}x)"
+    if report.sizes and r.cand_s > SLOPE_MIN_S:
+        prev = report.sizes[-1]
+        grow, ref_grow = _slope(prev, r, "cand_s"), _slope(prev, r, "ref_s")
+        if grow > max(ref_grow, 1.0) + SLOPE_SLACK:
+            return f"time grows as n^{grow:.2f} vs reference n^{ref_grow:.2f} at n={r.n}"
+    return ""
+
+def check(task_id: str, impl: str, sizes=DEFAULT_SIZES, seed: int = 0, budget: float = BUDGET) -> DiffReport:
+    """Compares `impl` with the task's reference on seeded inputs of each size in `sizes`."""
+    if task_id not in CASES:
+        return DiffReport(task_id, impl, "skipped", "no reference to compare against")
+    ref_name, case = CASES[task_id]
+    report = DiffReport(task_id, impl, "pass")
+    try:
+        mod, ref = import_module(impl), import_module(ref_name)
+        for n in sizes:
+            cand_fn, ref_fn, same = case(mod, ref, random.Random(f"{seed}:{n}"), n)
+            want, ref_s = _timed(ref_fn)
+            got, cand_s = _timed(cand_fn)
+            r = SizeResult(n, bool(same(got, want)), cand_s, ref_s)
+            if not r.ok:
+                report.sizes.append(r)
+                report.status, report.detail = "mismatch", f"output differs from reference at n={n} (seed={seed})"
+                break
+            if _too_slow(report, r, budget):  # confirm on the best of REPEATS runs before flagging
+                r.cand_s = min(cand_s, _best(cand_fn, REPEATS - 1))
+                r.ref_s = min(ref_s, _best(ref_fn, REPEATS - 1))
+            detail = _too_slow(report, r, budget)
+            report.sizes.append(r)
+            if detail:
+                report.status, report.detail = "too_slow", detail
+                break
+    except (MemoryError, RecursionError):
+        raise  # resource exhaustion: the sandboxed caller reports it as a limit, not an error
+    except Exception as e:
+        report.status, report.detail = "error", f"{type(e).__name__}: {e}"
+    return report
+
+def parse_sizes(spec: str) -> List[int]:
+    return [int(float(s)) for s in spec.split(",") if s.strip()]
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--task-id", required=True, choices=sorted(CASES))
+    ap.add_argument("--impl", required=True, help="Candidate module path")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="Comma-separated input sizes")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--budget", type=float, default=BUDGET, help="Allowed candidate/reference time ratio per size")
+    args = ap.parse_args()
+
+    rep = check(args.task_id, args.impl, parse_sizes(args.sizes), args.seed, args.budget)
+    for r in rep.sizes:
+        print(f"[INFO] n={r.n:>8d}  {'ok' if r.ok else 'MISMATCH':8s}  candidate={r.cand_s:.4f}s  "
+              f"reference={r.ref_s:.4f}s  ({r.ratio:.2f}x)")
+    print(f"[RESULT] {rep.status}{': ' + rep.detail if rep.detail else ''}")
+    raise SystemExit(0 if rep.ok else 1)
@@ -1,30 +1,169 @@
 """
 Simple in-memory expiring cache.
-get/put average O(1). Lazy removal on access.
+get/put average O(1). Expired entries are removed on access and actively:
+every put purges entries whose TTL has passed, so keys that are written and
+never read again do not accumulate. With a constant TTL, expiry order is
+write order, so a FIFO of (expires_at, key) acts as the min-heap. An optional
+max_entries bound evicts the least recently used entry.
+
+The clock is injectable (any zero-argument callable returning seconds, e.g.
+CoarseClock or a fake in tests); get_many/put_many read it once per batch.
+It defaults to time.monotonic and must never go backwards: a wall clock
+stepped back would stamp new entries earlier than queued ones and leave the
+FIFO out of expiry order.
+
+ExpiringCache is not thread-safe; ShardedExpiringCache is, via lock striping.
 """
-import time
-from typing import Optional, Dict, Tuple
+import threading, time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+class CoarseClock:
+    """
+    Wraps a clock (default time.monotonic) and re-reads it at most once per
+    `tick` seconds, returning the cached value in between. Elapsed time is
+    measured with a cheap monotonic `timer` (ns), so a value is never more
+    than `tick` seconds stale, even after an idle gap. Only worth it when the
+    source is costlier than the timer.
+    """
+    __slots__ = ("_source", "_timer", "_tick_ns", "_next", "_now")
+
+    def __init__(self, source: Callable[[], float] = time.monotonic, tick: float = 0.001,
+                 timer: Callable[[], int] = time.monotonic_ns):
+        if tick <= 0:
+            raise ValueError("tick must be positive")
+        self._source, self._timer = source, timer
+        self._tick_ns = int(tick * 1e9)
+        self._next, self._now = None, 0.0
+
+    def __call__(self) -> float:
+        t = self._timer()
+        if self._next is None or t >= self._next:  # racing threads can only cause an extra re-read
+            self._now, self._next = self._source(), t + self._tick_ns
+        return self._now
+
+_MISSING = (None, None)
 
 class ExpiringCache:
-    def __init__(self, ttl_seconds: int):
+    def __init__(self, ttl_seconds: int, max_entries: Optional[int] = None,
+                 clock: Optional[Callable[[], float]] = None):
         if ttl_seconds <= 0:
             raise ValueError("ttl_seconds must be positive")
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("max_entries must be positive")
         self._ttl = ttl_seconds
-        # key -> (value, expires_at)
-        self._store: Dict[str, Tuple[str, float]] = {}
+        self._max = max_entries
+        self._clock = clock or time.monotonic
+        # key -> (value, expires_at); ordered by recency when bounded
+        self._store: Dict[str, Tuple[str, float]] = OrderedDict() if max_entries else {}
+        # (expires_at, key) in write order; stale when the key was rewritten or evicted
+        self._expiry: Deque[Tuple[float, str]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._store)
 
     def get(self, key: str) -> Optional[str]:
         item = self._store.get(key)
         if not item:
             return None
         value, exp = item
-        now = time.time()
+        now = self._clock()
         if now >= exp:
             # expired: lazily delete
             self._store.pop(key, None)
             return None
+        if self._max:
+            self._store.move_to_end(key)
         return value
 
     def put(self, key: str, value: str) -> None:
-        exp = time.time() + self._ttl
-        self._store[key] = (value, exp)
+        self._put(key, value, self._clock())
+
+    def _put(self, key: str, value: str, now: float) -> None:
+        q = self._expiry
+        if q and q[0][0] <= now:
+            self.purge(now)
+        exp = now + self._ttl
+        store = self._store
+        if self._max:
+            if key in store:
+                store.move_to_end(key)
+            elif len(store) >= self._max:
+                store.popitem(last=False)  # least recently used
+        store[key] = (value, exp)
+        q.append((exp, key))
+        # rewrites leave stale queue entries; compact once they dominate
+        if len(q) > 2 * len(store) + 64:
+            self._expiry = deque(ek for ek in q if store.get(ek[1], _MISSING)[1] == ek[0])
+
+    def get_many(self, keys: Iterable[str]) -> List[Optional[str]]:
+        """get() for each key, with a single clock read for the batch."""
+        now = self._clock()
+        store, lru = self._store, self._max
+        out: List[Optional[str]] = []
+        for key in keys:
+            item = store.get(key)
+            if not item:
+                out.append(None)
+            elif now >= item[1]:
+                del store[key]
+                out.append(None)
+            else:
+                if lru:
+                    store.move_to_end(key)
+                out.append(item[0])
+        return out
+
+    def put_many(self, items: Union[Dict[str, str], Iterable[Tuple[str, str]]]) -> None:
+        """put() for each (key, value), all stamped with a single clock read."""
+        now = self._clock()
+        put = self._put
+        for key, value in (items.items() if isinstance(items, dict) else items):
+            put(key, value, now)
+
+    def purge(self, now: Optional[float] = None) -> int:
+        """Removes expired entries; returns how many were removed. Amortized O(1) per put."""
+        now = self._clock() if now is None else now
+        q, store = self._expiry, self._store
+        removed = 0
+        while q and q[0][0] <= now:
+            exp, key = q.popleft()
+            item = store.get(key)
+            if item is not None and item[1] == exp:
+                del store[key]
+                removed += 1
+        return removed
+
+class ShardedExpiringCache:
+    """
+    Thread-safe ExpiringCache: keys are spread over `shards` independent caches,
+    each guarded by its own lock, so threads touching different shards do not
+    contend. max_entries, if given, is split evenly across shards.
+    """
+    def __init__(self, ttl_seconds: int, shards: int = 16, max_entries: Optional[int] = None,
+                 clock: Optional[Callable[[], float]] = None):
+        if shards <= 0:
+            raise ValueError("shards must be positive")
+        per_shard = -(-max_entries // shards) if max_entries else None
+        self._shards = [ExpiringCache(ttl_seconds, per_shard, clock) for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+
+    def __len__(self) -> int:
+        return sum(len(s) for s in self._shards)
+
+    def get(self, key: str) -> Optional[str]:
+        i = hash(key) % len(self._shards)
+        with self._locks[i]:
+            return self._shards[i].get(key)
+
+    def put(self, key: str, value: str) -> None:
+        i = hash(key) % len(self._shards)
+        with self._locks[i]:
+            self._shards[i].put(key, value)
+
+    def purge(self) -> int:
+        removed = 0
+        for lock, shard in zip(self._locks, self._shards):
+            with lock:
+                removed += shard.purge()
+        return removed
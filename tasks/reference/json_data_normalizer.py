@@ -1,7 +1,23 @@
 """
 Flatten nested JSON-like dicts into row records without extra passes.
+
+normalize_columnar produces the same rows in a compact columnar form:
+record-level fields are stored once per record, numeric fields live in
+array('q') columns and sku / user_name values are interned in string
+tables, so no per-row dict is ever allocated. The returned ColumnarRows is
+a Sequence whose items are row dicts built on access.
+
+iter_ndjson_rows streams newline-delimited JSON from a path, file or
+iterable of lines and yields the flattened rows (or row batches) without
+holding the whole input in memory.
 """
-from typing import List, Dict, Any
+import json, os
+from array import array
+from collections.abc import Sequence
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
+
+FIELDS = ("record_id", "timestamp", "user_id", "user_name", "sku", "qty")
 
 def normalize_records(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
@@ -25,3 +41,173 @@ def normalize_records(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
                 "qty": it.get("qty"),
             })
     return out
+
+_NULL = -(1 << 63)  # sentinel for None inside an int64 column
+
+class IntColumn:
+    """Nullable int64 column; switches to a plain list if a value is not an int64."""
+    __slots__ = ("values", "objects")
+
+    def __init__(self):
+        self.values: Optional[array] = array("q")
+        self.objects: Optional[list] = None
+
+    def append(self, v):
+        if self.objects is None:
+            if v is None:
+                self.values.append(_NULL)
+                return
+            if type(v) is int and v != _NULL:
+                try:
+                    self.values.append(v)
+                    return
+                except OverflowError:
+                    pass
+            self.objects = [None if x == _NULL else x for x in self.values]
+            self.values = None
+        self.objects.append(v)
+
+    def __getitem__(self, i):
+        if self.objects is not None:
+            return self.objects[i]
+        v = self.values[i]
+        return None if v == _NULL else v
+
+    def __len__(self):
+        return len(self.objects if self.objects is not None else self.values)
+
+class StringTable:
+    """Interned values plus an array of codes into them."""
+    __slots__ = ("table", "index", "codes")
+
+    def __init__(self):
+        self.table: list = []
+        self.index: Dict[Any, int] = {}
+        self.codes = array("l")
+
+    def append(self, v):
+        # key on type too, so 1 / True / 1.0 stay distinct
+        key = v if type(v) is str else (type(v), v)
+        try:
+            code = self.index.get(key)
+        except TypeError:  # unhashable value: stored, not interned
+            code = None
+            key = None
+        if code is None:
+            code = len(self.table)
+            self.table.append(v)
+            if key is not None:
+                self.index[key] = code
+        self.codes.append(code)
+
+    def __getitem__(self, i):
+        return self.table[self.codes[i]]
+
+    def __len__(self):
+        return len(self.codes)
+
+class ColumnarRows(Sequence):
+    """
+    Rows of normalize_records in columnar form. Record-level columns are indexed
+    through `rec`, the row -> record index; indexing yields a fresh row dict.
+    """
+    def __init__(self):
+        # per record (only records that produced rows)
+        self.record_id = IntColumn()
+        self.timestamp: list = []
+        self.user_id = IntColumn()
+        self.user_name = StringTable()
+        # per row
+        self.rec = array("l")
+        self.sku = StringTable()
+        self.qty = IntColumn()
+
+    def __len__(self):
+        return len(self.rec)
+
+    def _row(self, i: int) -> Dict[str, Any]:
+        r = self.rec[i]
+        return {
+            "record_id": self.record_id[r],
+            "timestamp": self.timestamp[r],
+            "user_id": self.user_id[r],
+            "user_name": self.user_name[r],
+            "sku": self.sku[i],
+            "qty": self.qty[i],
+        }
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._row(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("row index out of range")
+        return self._row(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self._row(i)
+
+    def column(self, name: str) -> list:
+        """Materializes one field for all rows."""
+        if name in ("sku", "qty"):
+            col = getattr(self, name)
+            return [col[i] for i in range(len(self))]
+        if name not in FIELDS:
+            raise KeyError(name)
+        col = getattr(self, name)
+        return [col[r] for r in self.rec]
+
+def normalize_columnar(data: List[Dict[str, Any]]) -> ColumnarRows:
+    out = ColumnarRows()
+    rid_append, ts_append = out.record_id.append, out.timestamp.append
+    uid_append, uname_append = out.user_id.append, out.user_name.append
+    rec_append, sku_append, qty_append = out.rec.append, out.sku.append, out.qty.append
+    r = 0
+    for rec in data:
+        items = rec.get("items")
+        if not items:
+            continue
+        user = rec.get("user") or {}
+        rid_append(rec.get("id"))
+        ts_append(rec.get("timestamp"))
+        uid_append(user.get("id"))
+        uname_append(user.get("name"))
+        for it in items:
+            rec_append(r)
+            sku_append(it.get("sku"))
+            qty_append(it.get("qty"))
+        r += 1
+    return out
+
+def _ndjson_records(lines: Iterable) -> Iterator[Dict[str, Any]]:
+    loads = json.loads
+    for line in lines:
+        if isinstance(line, dict):  # already-parsed records pass through
+            yield line
+        elif line.strip():
+            yield loads(line)
+
+def iter_ndjson_rows(source: Union[str, os.PathLike, Iterable], batch_size: Optional[int] = None) -> Iterator[Any]:
+    """
+    Flattens newline-delimited JSON records from a file path, an open file or an
+    iterable of lines (str/bytes) or dicts. Yields row dicts one at a time, or
+    lists of the rows of up to `batch_size` records when batch_size is set.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from iter_ndjson_rows(f, batch_size)
+        return
+    records = _ndjson_records(source)
+    chunk = batch_size or 1024
+    while True:
+        batch = list(islice(records, chunk))
+        if not batch:
+            return
+        rows = normalize_records(batch)
+        if batch_size:
+            if rows:
+                yield rows
+        else:
+            yield from rows
@@ -1,8 +1,37 @@
 """
 Parse log lines; collect error lines grouped by error code.
 Time: O(n), Space: O(k + m) where k = error codes, m = error lines stored.
+
+parse_errors_stream / iter_error_groups do the same over a file path or binary
+stream: the input is read in large chunks (or mmap'ed) and searched for
+b"ERROR " at the bytes level, so only matching lines are ever decoded and
+the full log is never held in memory.
+
+parse_errors_parallel splits a log file into newline-aligned byte ranges,
+parses them in a process pool and merges the per-shard groups in shard order,
+which preserves input order within each code.
 """
-from typing import List, Dict
+import mmap, os, re
+from concurrent.futures import ProcessPoolExecutor
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+
+CHUNK_SIZE = 1 << 20  # 1 MiB reads
+# "ERROR ", the ASCII code token, the byte after it, and the rest of the line.
+# str.lstrip()/isalnum() also accept non-ASCII and \x1c-\x1f, so lines where
+# such a byte follows the token fall back to the str scan in _error_code.
+_ERROR_RE = re.compile(rb"ERROR [ \t\r\x0b\x0c]*([A-Za-z0-9_]*)([^\n]?)[^\n]*")
+
+def _error_code(after: str) -> str:
+    # error code is first token in 'after', strip punctuation like ":"
+    after = after.lstrip()
+    code = []
+    for ch in after:
+        if ch.isalnum() or ch == "_":
+            code.append(ch)
+        else:
+            break
+    code = "".join(code)
+    return code if code.startswith("E") else ""
 
 def parse_errors(log_lines: List[str]) -> Dict[str, List[str]]:
     groups: Dict[str, List[str]] = {}
@@ -17,19 +46,142 @@ def parse_errors(log_lines: List[str]) -> Dict[str, List[str]]:
             _, after = line.split("ERROR ", 1)
         except ValueError:
             continue
-        # error code is first token in 'after', strip punctuation like ":"
-        after = after.lstrip()
-        if not after:
+        code = _error_code(after)
+        if not code:
+            continue
+        groups.setdefault(code, []).append(line.rstrip("\n"))
+    return groups
+
+def _scan_into(buf, start: int, end: int, groups: Dict[str, List[str]], names: Dict[bytes, str]):
+    """Appends error lines in buf[start:end] (complete lines only) to groups."""
+    rfind = buf.rfind
+    for m in _ERROR_RE.finditer(buf, start, end):
+        code, nxt = m.group(1, 2)
+        slow = nxt and (nxt[0] >= 0x80 or 0x1c <= nxt[0] <= 0x1f)
+        if not slow and code[:1] != b"E":
             continue
-        # extract token until space or colon
-        code = []
-        for ch in after:
-            if ch.isalnum() or ch == "_":
-                code.append(ch)
+        line = buf[(rfind(b"\n", start, m.start()) + 1) or start:m.end()].decode("utf-8", "replace")
+        if slow:
+            key = _error_code(line.split("ERROR ", 1)[1])
+            if not key:
+                continue
+        else:
+            key = names.get(code)
+            if key is None:
+                key = names[code] = code.decode()
+        lst = groups.get(key)
+        if lst is None:
+            groups[key] = [line]
+        else:
+            lst.append(line)
+
+def _windows(source, chunk_size: int, use_mmap: bool):
+    """Yields (buf, start, end) windows of complete lines from a path or binary stream."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            if use_mmap and os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    size, start = len(mm), 0
+                    while start < size:
+                        end = min(start + chunk_size, size)
+                        if end < size:
+                            nl = mm.rfind(b"\n", start, end)
+                            if nl == -1:
+                                nl = mm.find(b"\n", end)
+                            end = size if nl == -1 else nl + 1
+                        yield mm, start, end
+                        start = end
             else:
+                yield from _windows(f, chunk_size, False)
+        return
+
+    read = source.read
+    tail = b""
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        buf = tail + chunk if tail else chunk
+        # complete lines only; the trailing partial line carries over
+        cut = buf.rfind(b"\n") + 1
+        if cut:
+            yield buf, 0, cut
+        tail = buf[cut:]
+    if tail:
+        yield tail, 0, len(tail)
+
+def iter_error_groups(source: Union[str, os.PathLike, BinaryIO], chunk_size: int = CHUNK_SIZE,
+                      use_mmap: bool = False) -> Iterator[Dict[str, List[str]]]:
+    """
+    Yields partial groups per chunk, in file order. Concatenating the lists of
+    successive groups per code gives parse_errors_stream's result.
+    """
+    names: Dict[bytes, str] = {}
+    for buf, start, end in _windows(source, chunk_size, use_mmap):
+        groups: Dict[str, List[str]] = {}
+        _scan_into(buf, start, end, groups, names)
+        if groups:
+            yield groups
+
+def parse_errors_stream(source: Union[str, os.PathLike, BinaryIO], chunk_size: int = CHUNK_SIZE,
+                        use_mmap: bool = False) -> Dict[str, List[str]]:
+    """parse_errors over a file path or binary stream, without materializing its lines."""
+    groups: Dict[str, List[str]] = {}
+    names: Dict[bytes, str] = {}
+    for buf, start, end in _windows(source, chunk_size, use_mmap):
+        _scan_into(buf, start, end, groups, names)
+    return groups
+
+def shard_ranges(path: Union[str, os.PathLike], shards: int) -> List[Tuple[int, int]]:
+    """Splits a file into at most `shards` contiguous (start, end) byte ranges aligned to line starts."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, shards):
+            b = size * i // shards
+            if b <= bounds[-1]:
+                continue
+            f.seek(b - 1)
+            f.readline()  # finish the line containing byte b-1
+            b = f.tell()
+            if b >= size:
                 break
-        code = "".join(code)
-        if not code or not code.startswith("E"):
-            continue
-        groups.setdefault(code, []).append(line.rstrip("\n"))
+            if b > bounds[-1]:
+                bounds.append(b)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+def _parse_range(path: Union[str, os.PathLike], start: int, end: int) -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        _scan_into(mm, start, end, groups, {})
+    return groups
+
+def parse_errors_parallel(path: Union[str, os.PathLike], workers: Optional[int] = None,
+                          shards: Optional[int] = None) -> Dict[str, List[str]]:
+    """
+    parse_errors over a log file using `workers` processes (default: CPU count).
+    The file is cut into `shards` ranges (default: 4 per worker) so uneven
+    error density still balances across workers.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = shard_ranges(path, shards or workers * 4)
+    if workers == 1 or len(ranges) <= 1:
+        results = (_parse_range(path, s, e) for s, e in ranges)
+        return _merge(results)
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        # map() yields in submission order, i.e. file order
+        return _merge(ex.map(_parse_range, [path] * len(ranges), *zip(*ranges)))
+
+def _merge(results) -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    for part in results:
+        for code, lines in part.items():
+            lst = groups.get(code)
+            if lst is None:
+                groups[code] = lines
+            else:
+                lst.extend(lines)
     return groups
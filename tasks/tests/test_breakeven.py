@@ -0,0 +1,34 @@
+import math
+import pandas as pd
+
+def _runs(variant, n, energy, workload="log_file_parser"):
+    return [dict(task_id="log_file_parser", workload=workload, n=n, workers=None, variant=variant,
+                 energy_j=e, correct=1) for e in energy]
+
+def test_break_even_per_workload_size(monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    from breakeven import breakeven_table
+    runs = pd.DataFrame(_runs("m_baseline", 1000, [2.0, 2.0]) + _runs("m_eff", 1000, [1.0])
+                        + _runs("m_baseline", 100000, [200.0]) + _runs("m_eff", 100000, [100.0]))
+    gen = pd.DataFrame([dict(task_id="log_file_parser", variant="m_eff", gen_calls=1, gen_energy_j=1000.0),
+                        dict(task_id="log_file_parser", variant="m_baseline", gen_calls=1, gen_energy_j=400.0)])
+    t = breakeven_table(runs, gen).set_index(["n", "variant"])
+    # each size is repaid by its own per-run saving, not by the mean over sizes
+    assert t.loc[(1000, "m_eff"), "break_even_runs"] == 1000.0
+    assert t.loc[(100000, "m_eff"), "break_even_runs"] == 10.0
+    assert t.loc[(100000, "m_eff"), "break_even_runs_incremental"] == 6.0
+    assert math.isinf(t.loc[(1000, "m_baseline"), "break_even_runs"])
+
+def test_repair_calls_are_summed_per_generation(tmp_path, monkeypatch):
+    import json
+    monkeypatch.syspath_prepend("analysis")
+    from breakeven import load_generation_energy
+    rec = lambda gid, e: dict(task_id="log_file_parser", model="m", prompt="eff", energy_j=e,
+                              emissions_kg=0.0, **({"generation_id": gid} if gid else {}))
+    # generation g1 needed a repair call; g2 did not; one legacy record without an id
+    log = tmp_path / "gen.jsonl"
+    log.write_text("\n".join(json.dumps(r) for r in [rec("g1", 100.0), rec("g1", 60.0), rec("g2", 120.0),
+                                                      rec(None, 140.0)]))
+    g = load_generation_energy(str(log), str(tmp_path / "none.csv")).iloc[0]
+    assert (g["generations"], g["gen_calls"]) == (3, 4)
+    assert g["gen_energy_j"] == (160.0 + 120.0 + 140.0) / 3
@@ -12,3 +12,85 @@ def test_cache_with_expiry_reference():
     # reinsertion works
     c.put("k", "v2")
     assert c.get("k") == "v2"
+
+class _FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+    def monotonic(self):
+        return self.now
+
+def test_cache_with_expiry_purges_unread_keys(monkeypatch):
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    clock = _FakeTime()
+    monkeypatch.setattr(mod, "time", clock)
+    c = mod.ExpiringCache(ttl_seconds=10)
+    for i in range(100):
+        c.put(f"k{i}", "v")
+    clock.now += 5
+    c.put("k0", "again")  # rewrite extends k0
+    clock.now += 5
+    c.put("new", "v")  # put purges everything written before now - ttl
+    assert len(c) == 2
+    assert c.get("k0") == "again" and c.get("k1") is None
+    clock.now += 5
+    assert c.purge() == 1 and len(c) == 1
+    clock.now += 5
+    assert c.purge() == 1 and len(c) == 0
+
+def test_cache_with_expiry_lru_bound():
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    c = mod.ExpiringCache(ttl_seconds=60, max_entries=2)
+    c.put("a", "1")
+    c.put("b", "2")
+    assert c.get("a") == "1"  # b is now least recently used
+    c.put("c", "3")
+    assert c.get("b") is None
+    assert c.get("a") == "1" and c.get("c") == "3"
+    assert len(c) == 2
+
+def test_sharded_cache_concurrent_puts():
+    from concurrent.futures import ThreadPoolExecutor
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    c = mod.ShardedExpiringCache(ttl_seconds=60, shards=4)
+    def fill(t):
+        for i in range(500):
+            c.put(f"{t}-{i}", str(i))
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        list(ex.map(fill, range(8)))
+    assert len(c) == 4000
+    assert c.get("3-499") == "499" and c.get("missing") is None
+
+def test_cache_with_expiry_injected_clock_and_batches():
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    clock = _FakeTime()
+    c = mod.ExpiringCache(ttl_seconds=10, clock=clock.monotonic)
+    c.put_many({"a": "1", "b": "2"})
+    assert c.get_many(["a", "b", "c"]) == ["1", "2", None]
+    clock.now += 10
+    assert c.get_many(["a", "b"]) == [None, None]
+    reads = iter(range(100))
+    timer = _FakeTime()
+    coarse = mod.CoarseClock(lambda: next(reads), tick=1.0, timer=lambda: int(timer.now * 1e9))
+    assert [coarse() for _ in range(3)] == [0, 0, 0]
+    timer.now += 1.0
+    assert [coarse() for _ in range(3)] == [1, 1, 1]
+
+def test_coarse_clock_is_time_bounded_after_idle_gap():
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    clock = _FakeTime()  # source and timer advance together, as the real clocks do
+    coarse = mod.CoarseClock(clock.monotonic, tick=0.5, timer=lambda: int(clock.now * 1e9))
+    c = mod.ExpiringCache(ttl_seconds=10, clock=coarse)
+    c.put("k", "v")
+    assert c.get("k") == "v"
+    clock.now += 60  # idle, far past the TTL: the very next call must not reuse the old timestamp
+    assert c.get("k") is None
+
+def test_default_clock_is_monotonic():
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    assert mod.ExpiringCache(5)._clock is time.monotonic
+
+def test_put_signature_matches_spec():
+    import inspect
+    mod = importlib.import_module("tasks.reference.cache_with_expiry")
+    for cls in (mod.ExpiringCache, mod.ShardedExpiringCache):
+        assert list(inspect.signature(cls.put).parameters) == ["self", "key", "value"]
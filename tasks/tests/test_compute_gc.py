@@ -0,0 +1,57 @@
+import pandas as pd
+from harness.results_store import ResultsStore
+
+def _rows(variant, times, n=1000, task="log_file_parser"):
+    return [dict(task_id=task, workload=task, impl="m", variant=variant, n=n, run_idx=i,
+                 runtime_s=t, mem_kib=10.0 + i, energy_j="", correct=1) for i, t in enumerate(times)]
+
+def _append(db, rows):
+    with ResultsStore(db, import_from=None) as store:
+        store.start_invocation({"host": "test"})
+        for r in rows:
+            store.add(r)
+
+def test_incremental_matches_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    import compute_gc
+    monkeypatch.setattr(compute_gc, "PD_FILE", tmp_path / "pd.csv")
+    monkeypatch.setattr(compute_gc, "GC_FILE", tmp_path / "gc.csv")
+    db = tmp_path / "results.sqlite"
+
+    _append(db, _rows("m_baseline", [2.0, 2.2]) + _rows("m_eff", [1.0]) + _rows("m_baseline", [5.0], n=10))
+    assert compute_gc.incremental(db) == 4
+    # new runs for one existing key (same group split across batches) and one new task
+    _append(db, _rows("m_eff", [1.2, 1.4]) + _rows("x_baseline", [3.0], task="cache_with_expiry"))
+    assert compute_gc.incremental(db) == 3
+    assert compute_gc.incremental(db) == 0
+    inc = pd.read_csv(tmp_path / "pd.csv")
+    compute_gc.incremental(db, full=True)
+    full = pd.read_csv(tmp_path / "pd.csv")
+    pd.testing.assert_frame_equal(inc, full)
+
+    eff = full[(full["variant"] == "m_eff") & (full["n"] == 1000)].iloc[0]
+    assert abs(eff["pd_runtime"] - (2.1 - 1.2) / 2.1) < 1e-12
+    # delta-method CI: se(ratio) = r * sqrt(sem_v^2 / mean_v^2 + sem_b^2 / mean_b^2)
+    r = 1.2 / 2.1
+    se = r * ((0.04 / 3) / 1.2 ** 2 + (0.02 / 2) / 2.1 ** 2) ** 0.5
+    assert abs(eff["pd_runtime_hi"] - (1 - r + 1.959963984540054 * se)) < 1e-9
+    assert full[full["n"] == 10]["pd_runtime_lo"].isna().all()  # single run: no CI
+    assert len(full) == 4
+
+def test_variance_state_survives_large_magnitudes(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    import compute_gc
+    monkeypatch.setattr(compute_gc, "PD_FILE", tmp_path / "pd.csv")
+    monkeypatch.setattr(compute_gc, "GC_FILE", tmp_path / "gc.csv")
+    db = tmp_path / "results.sqlite"
+    big = lambda variant, energy: [dict(r, energy_j=e) for r, e in zip(_rows(variant, [1.0] * len(energy)), energy)]
+    # raw sums of squares lose these deviations entirely at 1e9 magnitude
+    _append(db, big("m_baseline", [1e9, 1e9 + 2]) + big("m_eff", [5e8]))
+    compute_gc.incremental(db)
+    _append(db, big("m_baseline", [1e9 + 4]) + big("m_eff", [5e8 + 2, 5e8 + 4]))
+    compute_gc.incremental(db)
+    eff = pd.read_csv(tmp_path / "pd.csv").set_index("variant").loc["m_eff"]
+    mb, me = 1e9 + 2, 5e8 + 2  # both samples have variance 4, n = 3
+    r = me / mb
+    se = r * ((4 / 3) / me ** 2 + (4 / 3) / mb ** 2) ** 0.5
+    assert abs(eff["pd_energy_hi"] - (1 - r + 1.959963984540054 * se)) < 1e-12
@@ -0,0 +1,61 @@
+import random
+from tasks.differential import check, gen_log_lines
+
+def _module(tmp_path, monkeypatch, name, body):
+    (tmp_path / f"diff_{name}.py").write_text(body)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    return f"diff_{name}"
+
+def test_generators_are_seeded():
+    assert gen_log_lines(random.Random(1), 50) == gen_log_lines(random.Random(1), 50)
+
+def test_reference_wrapper_passes(tmp_path, monkeypatch):
+    impl = _module(tmp_path, monkeypatch, "log_ok",
+                   "from tasks.reference.log_file_parser import parse_errors as run_task\n")
+    rep = check("log_file_parser", impl, sizes=(100, 1000))
+    assert rep.status == "pass" and [r.n for r in rep.sizes] == [100, 1000]
+
+def test_mismatch_on_edge_case(tmp_path, monkeypatch):
+    # accepts any token starting with E, so "ERRORE12"-style and "E" lines diverge eventually
+    impl = _module(tmp_path, monkeypatch, "log_bad", (
+        "def run_task(lines):\n"
+        "    out = {}\n"
+        "    for line in lines:\n"
+        "        if 'ERROR' in line:\n"
+        "            tok = line.split('ERROR', 1)[1].split()\n"
+        "            if tok and tok[0].startswith('E'):\n"
+        "                out.setdefault(tok[0].rstrip(':,'), []).append(line)\n"
+        "    return out\n"))
+    rep = check("log_file_parser", impl, sizes=(100,))
+    assert rep.status == "mismatch"
+
+def test_quadratic_candidate_is_too_slow(tmp_path, monkeypatch):
+    impl = _module(tmp_path, monkeypatch, "log_slow", (
+        "from tasks.reference.log_file_parser import parse_errors\n"
+        "def run_task(lines):\n"
+        "    seen = []\n"
+        "    for line in lines:\n"
+        "        if line not in seen:\n"
+        "            seen.append(line)\n"
+        "    return parse_errors(lines)\n"))
+    rep = check("log_file_parser", impl, sizes=(100, 1000, 10000))
+    assert rep.status == "too_slow", rep
+    assert rep.sizes[-1].ratio > 1
+
+def test_one_noisy_timing_is_not_too_slow(tmp_path, monkeypatch):
+    # a one-off stall (e.g. other validate_pool workers) on the first timed call only
+    impl = _module(tmp_path, monkeypatch, "modular_stall", (
+        "import time\n"
+        "from tasks.reference.modular_example_human import run_task as _run\n"
+        "calls = []\n"
+        "def run_task(n):\n"
+        "    calls.append(n)\n"
+        "    if len(calls) == 2:\n"
+        "        time.sleep(0.5)\n"
+        "    return _run(n)\n"))
+    rep = check("modular_example", impl, sizes=(100, 1000))
+    assert rep.status == "pass", rep
+    assert rep.sizes[-1].cand_s < 0.5
+
+def test_unknown_task_is_skipped():
+    assert check("unit_test_gen", "tasks.reference.unit_test_gen_human").status == "skipped"
@@ -0,0 +1,70 @@
+import gc, os, subprocess, sys
+import pytest
+from harness import env
+from harness.workloads import get_workload
+
+def test_parse_cpu_list():
+    assert env.parse_cpu_list("1,3-5") == {1, 3, 4, 5}
+    assert env.parse_cpu_list("") == set() and env.parse_cpu_list(None) == set()
+
+def test_pick_and_pin_keep_to_allowed_cpus():
+    before = os.sched_getaffinity(0)
+    try:
+        cpus = env.pin(env.pick_cpus())
+        assert len(cpus) == 1 and set(cpus) <= before and os.sched_getaffinity(0) == set(cpus)
+        assert env.pick_cpus() == cpus  # already pinned (e.g. by harness.sweep): stay there
+        with pytest.raises(ValueError):
+            env.pin([os.cpu_count() + 7])
+    finally:
+        os.sched_setaffinity(0, before)
+
+def test_parallel_workloads_get_a_core_per_worker(tmp_path, monkeypatch):
+    (tmp_path / "isolated").write_text("2-3\n")
+    monkeypatch.setattr(env, "CPU_DIR", tmp_path)
+    monkeypatch.setattr(env.os, "sched_getaffinity", lambda pid: set(range(8)))
+    sharded = get_workload("log_file_parser_sharded").parallel
+    assert env.cpus_for_run("auto") == [3]
+    assert env.cpus_for_run("auto", sharded, workers=4) == [2, 3, 6, 7]
+    assert env.cpus_for_run("auto", sharded) == list(range(8))  # worker count left to the workload
+    assert env.cpus_for_run("auto", get_workload("cache_with_expiry_concurrent").parallel, 2) == [2, 3]
+    assert env.cpus_for_run("1-2,5") == [1, 2, 5] and env.cpus_for_run("none") is None
+
+def test_sharded_run_children_get_more_than_one_cpu():
+    before = os.sched_getaffinity(0)
+    try:
+        cpus = env.pin(env.cpus_for_run("auto", get_workload("log_file_parser_sharded").parallel, workers=2))
+        child = subprocess.run([sys.executable, "-c", "import os; print(len(os.sched_getaffinity(0)))"],
+                               capture_output=True, text=True, check=True)
+        assert int(child.stdout) == len(cpus) == min(2, len(before))  # > 1 wherever the host has 2 CPUs
+    finally:
+        os.sched_setaffinity(0, before)
+
+def test_check_load(monkeypatch, capsys):
+    monkeypatch.setattr(env, "load_per_cpu", lambda: 3.0)
+    assert env.check_load(1.0, "warn") == 3.0
+    assert "[WARN] Host is busy" in capsys.readouterr().out
+    with pytest.raises(env.BusyHostError):
+        env.check_load(1.0, "refuse")
+    assert env.check_load(5.0, "refuse") == 3.0
+
+def test_gc_disabled_restores_state():
+    assert gc.isenabled()
+    with env.gc_disabled():
+        assert not gc.isenabled()
+    assert gc.isenabled()
+    with env.gc_disabled(False):
+        assert gc.isenabled()
+
+def test_cpu_freq_info_reads_sysfs(tmp_path, monkeypatch):
+    freq = tmp_path / "cpu2/cpufreq"
+    freq.mkdir(parents=True)
+    (freq / "scaling_governor").write_text("powersave\n")
+    (freq / "scaling_cur_freq").write_text("2500000\n")
+    (tmp_path / "intel_pstate").mkdir()
+    (tmp_path / "intel_pstate/no_turbo").write_text("1\n")
+    monkeypatch.setattr(env, "CPU_DIR", tmp_path)
+    info = env.cpu_freq_info(2)
+    assert info["governor"] == "powersave" and info["freq_khz"] == 2500000
+    assert info["freq_max_khz"] is None and info["turbo"] is False
+    meta = env.environment_metadata([2, 3], no_gc=True)
+    assert meta["pinned_cpus"] == [2, 3] and meta["gc_disabled"] and meta["governor"] == "powersave"
@@ -0,0 +1,50 @@
+import asyncio, os, time
+
+from harness.gen_cache import GenerationCache, cache_key
+
+def test_cache_key_ignores_option_order():
+    a = cache_key("p", "sha256:abc", {"seed": 42, "temperature": 0.1})
+    assert a == cache_key("p", "sha256:abc", {"temperature": 0.1, "seed": 42})
+    assert a != cache_key("p", "sha256:def", {"seed": 42, "temperature": 0.1})
+    assert a != cache_key("p", "sha256:abc", {"seed": 43, "temperature": 0.1})
+
+def test_wrap_serves_repeated_prompts(tmp_path):
+    cache = GenerationCache(tmp_path)
+    calls = []
+    async def call(prompt):
+        calls.append(prompt)
+        return {"response": f"code for {prompt}", "stream": {"chunks": 3, "early_stop": True}}
+    cached = cache.wrap(call, "sha256:abc", {"seed": 42})
+    first = asyncio.run(cached("p1"))
+    again = asyncio.run(cached("p1"))
+    asyncio.run(cached("p2"))
+    assert calls == ["p1", "p2"]
+    assert "cache_hit" not in first
+    assert again == {"response": "code for p1", "cache_hit": True}
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_streamed_responses_are_not_served_to_full_calls(tmp_path):
+    from harness.generate import response_mode
+    assert cache_key("p", "d", {}, response_mode(True)) != cache_key("p", "d", {}, response_mode(False))
+    cache = GenerationCache(tmp_path)
+    async def truncated(prompt):
+        return {"response": "```python\ndef run_task(): ...\n```"}
+    async def full(prompt):
+        return {"response": "```python\ndef run_task(): ...\n```\nExplanation follows"}
+    asyncio.run(cache.wrap(truncated, "d", {}, response_mode(True))("p"))
+    resp = asyncio.run(cache.wrap(full, "d", {}, response_mode(False))("p"))
+    assert resp["response"].endswith("Explanation follows") and cache.misses == 2
+
+def test_evict_by_age_then_size(tmp_path):
+    cache = GenerationCache(tmp_path, max_bytes=10**6, max_age_s=3600)
+    for i in range(4):
+        cache.put(f"{i:02d}" * 32, {"response": "x" * 1000})
+    old = cache._path("00" * 32)
+    os.utime(old, (time.time() - 7200, time.time() - 7200))
+    assert cache.get("00" * 32) is None
+    assert cache.evict() == 1
+    cache.max_bytes = 2500  # room for two entries: the least recently used goes
+    lru = cache._path("01" * 32)
+    os.utime(lru, (time.time() - 60, time.time() - 60))
+    assert cache.evict() == 1 and not lru.exists()
+    assert cache.get("02" * 32) and cache.get("03" * 32)
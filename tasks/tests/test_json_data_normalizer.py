@@ -19,3 +19,49 @@ def test_json_data_normalizer_reference():
         {"record_id":11,"timestamp":"t2","user_id":None,"user_name":None,"sku":"C","qty":5},
     ]
     assert sort_rows(out) == sort_rows(want)
+
+def test_json_data_normalizer_columnar_matches_rows():
+    mod = importlib.import_module("tasks.reference.json_data_normalizer")
+    data = [
+        {"id": 10, "timestamp": "t1", "user": {"id": 1, "name": "Ann"}, "items": [{"sku": "A", "qty": 2}]},
+        {"id": 11, "timestamp": "t2", "items": [{"sku": "B", "qty": 1}, {"sku": "A"}]},
+        {"id": 12, "timestamp": "t3", "user": {"id": 2, "name": "Bo"}, "items": []},
+        {"id": 2**70, "timestamp": "t4", "items": [{"sku": None, "qty": 1.5}]},  # not int64
+    ]
+    rows = mod.normalize_records(data)
+    cols = mod.normalize_columnar(data)
+    assert len(cols) == len(rows)
+    assert list(cols) == rows
+    assert cols[-1] == rows[-1] and cols[1:3] == rows[1:3]
+    assert cols.column("user_name") == [r["user_name"] for r in rows]
+    assert cols.sku.table == ["A", "B", None]  # interned
+
+def test_json_data_normalizer_ndjson_stream(tmp_path):
+    import json
+    mod = importlib.import_module("tasks.reference.json_data_normalizer")
+    data = [
+        {"id": 10, "timestamp": "t1", "user": {"id": 1, "name": "Ann"}, "items": [{"sku": "A", "qty": 2}]},
+        {"id": 12, "timestamp": "t3", "items": []},
+        {"id": 11, "timestamp": "t2", "items": [{"sku": "B", "qty": 1}, {"sku": "C", "qty": 5}]},
+    ]
+    want = mod.normalize_records(data)
+    path = tmp_path / "records.ndjson"
+    path.write_text("\n".join(json.dumps(r) for r in data) + "\n\n")
+    assert list(mod.iter_ndjson_rows(str(path))) == want
+    batches = list(mod.iter_ndjson_rows((json.dumps(r) for r in data), batch_size=2))
+    assert batches == [want[:1], want[1:]]
+
+def test_validator_accepts_list_or_columnar_only(tmp_path, monkeypatch):
+    from tasks.validators import validate
+    monkeypatch.syspath_prepend(str(tmp_path))
+    bodies = {
+        "jdn_list": "from tasks.reference.json_data_normalizer import normalize_records as run_task\n",
+        "jdn_columnar": "from tasks.reference.json_data_normalizer import normalize_columnar as run_task\n",
+        "jdn_tuple": "from tasks.reference.json_data_normalizer import normalize_records\n"
+                     "def run_task(data):\n    return tuple(normalize_records(data))\n",
+    }
+    for name, body in bodies.items():
+        (tmp_path / f"{name}.py").write_text(body)
+    assert validate("json_data_normalizer", "jdn_list")
+    assert validate("json_data_normalizer", "jdn_columnar")
+    assert not validate("json_data_normalizer", "jdn_tuple")
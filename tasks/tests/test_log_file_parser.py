@@ -19,3 +19,37 @@ def test_log_file_parser_reference():
     assert out["E999"] == ["2025-01-01T00:00:00Z ERROR E999 Disk full"]
     # missing code shouldn't create empty key
     assert "E" not in out
+
+def test_log_file_parser_stream_matches_list_version(tmp_path):
+    import io
+    mod = importlib.import_module("tasks.reference.log_file_parser")
+    lines = [
+        "[t] INFO start",
+        "[t] ERROR E123: bad",
+        "2025-01-01T00:00:00Z ERROR E123 repeated",
+        "[t] ERROR : missing code",
+        "[t] ERROR E42: minor ERROR E43",
+        "x ERROR  E7 non-ascii space",
+        "2025-01-01T00:00:00Z ERROR E999 Disk full",
+    ] * 50
+    data = "\n".join(lines).encode()
+    want = mod.parse_errors(lines)
+    # tiny chunks force lines to straddle chunk boundaries
+    assert mod.parse_errors_stream(io.BytesIO(data), chunk_size=7) == want
+    path = tmp_path / "app.log"
+    path.write_bytes(data)
+    assert mod.parse_errors_stream(str(path)) == want
+    assert mod.parse_errors_stream(str(path), chunk_size=64, use_mmap=True) == want
+
+def test_log_file_parser_parallel_preserves_order(tmp_path):
+    mod = importlib.import_module("tasks.reference.log_file_parser")
+    lines = [f"[t] ERROR E{i % 3}: line {i}" if i % 2 else f"[t] INFO {i}" for i in range(400)]
+    path = tmp_path / "app.log"
+    path.write_text("\n".join(lines))
+    want = mod.parse_errors(lines)
+    ranges = mod.shard_ranges(str(path), 13)
+    data = path.read_bytes()
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    assert all(data[s - 1:s] == b"\n" for s, _ in ranges[1:])
+    for workers in (1, 2):
+        assert mod.parse_errors_parallel(str(path), workers=workers, shards=13) == want
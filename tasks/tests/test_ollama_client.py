@@ -0,0 +1,126 @@
+import asyncio, json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+from harness.ollama_client import AsyncOllamaClient
+from harness.generate import FenceParser, generate_job
+
+class _StubOllama(BaseHTTPRequestHandler):
+    """Mimics POST /api/generate; the first request gets a 503 to exercise retries."""
+    protocol_version = "HTTP/1.1"  # keep-alive
+    lock = threading.Lock()
+    calls = 0
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_POST(self):
+        cls = type(self)
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with cls.lock:
+            cls.calls += 1
+            first = cls.calls == 1
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.05)
+        with cls.lock:
+            cls.in_flight -= 1
+        if self.path != "/api/generate" or first:
+            self._reply(503 if first else 404, {"error": "busy"})
+            return
+        text = "```python\ndef run_task(n):\n    return n\n```\n"
+        if body.get("stream"):
+            self._stream(list(text) + ["Explanation"] * 50)
+            return
+        self._reply(200, {"model": body["model"], "response": text, "done": True,
+                          "prompt_eval_count": len(body["prompt"]), "prompt_eval_duration": 1000})
+
+    def _stream(self, tokens):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for tok in tokens:
+                self.wfile.write(json.dumps({"response": tok, "done": False}).encode() + b"\n")
+                self.wfile.flush()
+            self.wfile.write(json.dumps({"response": "", "done": True, "eval_count": len(tokens)}).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client cancelled
+
+    def _reply(self, status, obj):
+        data = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_host():
+    _StubOllama.calls = _StubOllama.in_flight = _StubOllama.max_in_flight = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllama)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+def test_async_client_retries_and_limits_concurrency(stub_host):
+    async def main():
+        async with AsyncOllamaClient(host=stub_host, concurrency=2, backoff_s=0.01) as client:
+            return await asyncio.gather(*(client.generate("m", f"p{i}") for i in range(6)))
+    out = asyncio.run(main())
+    assert all(r["done"] for r in out)
+    assert _StubOllama.calls == 7  # one 503 retried
+    assert _StubOllama.max_in_flight <= 2
+
+def test_generate_job_saves_module(stub_host, tmp_path):
+    async def main():
+        async with AsyncOllamaClient(host=stub_host, backoff_s=0.01) as client:
+            call = lambda p: client.generate("m", p)
+            return await generate_job(call, "modular_example", "baseline", "m", {}, out_root=tmp_path)
+    path = asyncio.run(main())
+    assert path.parent == tmp_path / "modular_example"
+    assert "def run_task" in path.read_text()
+    meta = json.loads(path.with_name(path.name + ".json").read_text())
+    assert meta["prompt"] == "baseline" and meta["prompt_layout"] == "inline"
+    assert meta["timings"][0]["prompt_eval_duration"] == 1000
+
+def test_stream_stops_after_code_block(stub_host, tmp_path):
+    text = "```python\ndef run_task(n):\n    return n\n```\n"
+    async def main():
+        async with AsyncOllamaClient(host=stub_host, backoff_s=0.01) as client:
+            call = lambda p: client.generate_stream("m", p, stop=FenceParser().feed)
+            return await generate_job(call, "modular_example", "baseline", "m", {"num_predict": 640},
+                                      out_root=tmp_path)
+    path = asyncio.run(main())
+    meta = json.loads(path.with_name(path.name + ".json").read_text())
+    # cancelled on the closing fence, before the trailing newline and narration
+    chunks = len(text) - 1
+    assert meta["stream"] == [{"chunks": chunks, "early_stop": True, "tokens_saved_max": 640 - chunks}]
+    assert path.read_text() == "def run_task(n):\n    return n"
+
+def test_shared_prefix_layout():
+    from harness.generate import job_prompt
+    a = job_prompt("modular_example", "baseline", "shared_prefix")
+    b = job_prompt("modular_example", "tagged_explained", "shared_prefix")
+    spec = open("tasks/task_specs/modular_example.md", encoding="utf-8").read()
+    prefix = f"[task specification]\n{spec}\n\n"
+    assert a.startswith(prefix) and b.startswith(prefix)
+    assert "{{TASK_SPEC}}" not in a and a.count(spec) == 1
+
+def test_energy_fields_per_token():
+    from types import SimpleNamespace
+    from harness.generate import call_timings, energy_fields
+    t = call_timings({"prompt_eval_count": 300, "prompt_eval_duration": 10**9,
+                      "eval_count": 100, "eval_duration": 2 * 10**9})
+    assert t["output_tokens_per_s"] == 50 and t["prompt_tokens_per_s"] == 300
+    tracker = SimpleNamespace(final_emissions_data=SimpleNamespace(energy_consumed=400 / 3.6e6))  # 400 J
+    e = energy_fields(tracker, [t, None])
+    assert e["eval_count"] == 100 and e["energy_j"] == pytest.approx(400)
+    assert e["j_per_token"] == pytest.approx(1.0) and e["j_per_output_token"] == pytest.approx(4.0)
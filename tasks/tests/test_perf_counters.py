@@ -0,0 +1,24 @@
+from harness.utils import PerfCounters, parse_perf_counters
+
+# `perf stat -x , -e fp_arith_inst_retired.scalar_double,power/energy-pkg/,cycles,instructions` stderr
+CSV_STDERR = """\
+<not supported>,,fp_arith_inst_retired.scalar_double,0,100.00,,
+12.75,Joules,power/energy-pkg/,1002345678,100.00,,
+<not counted>,,cycles:u,0,0.00,,
+3001,,instructions:u,1002345678,100.00,1.23,insn per cycle
+"""
+
+def test_parses_csv_and_skips_uncounted_events():
+    c = parse_perf_counters(CSV_STDERR)
+    assert c == PerfCounters(flops=None, energy_j=12.75, cycles=None, instructions=3001)
+
+def test_regular_format():
+    c = parse_perf_counters("      1,770      fp_arith_inst_retired.scalar_double\n"
+                            "      4.50 Joules power/energy-pkg/\n")
+    assert (c.flops, c.energy_j) == (1770, 4.5)
+
+def test_per_iteration_divides_counts_and_energy():
+    c = PerfCounters(flops=1001, energy_j=12.75, cycles=None, instructions=3001).per_iteration(3)
+    assert c == PerfCounters(flops=333, energy_j=4.25, cycles=None, instructions=1000)
+    one = parse_perf_counters(CSV_STDERR)
+    assert one.per_iteration(1) is one
@@ -0,0 +1,52 @@
+import csv, sqlite3
+import pytest
+from analysis import runs_io
+from analysis.runs_io import load_runs, max_run_id
+from harness.results_store import RUN_COLUMNS, ResultsStore
+
+def _row(task, variant, idx, correct=1):
+    return dict(task_id=task, workload=task, impl="m", variant=variant, n=1000, workers="", run_idx=idx,
+                runtime_s=0.5 + idx, mem_kib=10.0, flops="", energy_j="", cycles="", instructions="", correct=correct)
+
+def test_invocation_rows_are_typed_and_filterable(tmp_path):
+    db = tmp_path / "results.sqlite"
+    with ResultsStore(db, import_from=None) as store:
+        inv = store.start_invocation(dict(host="h", cpu="c", commit_sha="abc"), isolated_cpu=3)
+        for i in range(3):
+            store.add(_row("log_file_parser", "a_baseline", i))
+        store.add(_row("cache_with_expiry", "b", 0, correct=0))
+        assert sqlite3.connect(db).execute("SELECT COUNT(*) FROM runs").fetchone()[0] == 0  # buffered
+    df = load_runs(where={"task_id": "log_file_parser", "correct": 1}, columns=["variant", "n", "workers", "runtime_s"], db=db)
+    assert list(df["runtime_s"]) == [0.5, 1.5, 2.5]
+    assert df["n"].dtype.kind == "i" and df["workers"].isna().all()
+    meta = sqlite3.connect(db).execute("SELECT host, commit_sha, meta FROM invocations WHERE invocation_id=?", (inv,)).fetchone()
+    assert meta == ("h", "abc", '{"isolated_cpu": 3}')
+    assert len(load_runs(where={"task_id": ["log_file_parser", "cache_with_expiry"]}, db=db)) == 4
+
+def test_new_store_imports_legacy_csv_and_csv_fallback(tmp_path):
+    legacy = tmp_path / "runs.csv"
+    with open(legacy, "w", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["task_id", "impl", "variant", "run_idx", "runtime_s", "mem_kib", "flops", "energy_j", "correct"])
+        w.writerow(["inefficient_sort", "m", "v", 0, 0.25, 14.0, 1770, 0.5, 1])
+    fallback = load_runs(columns=["task_id", "n", "runtime_s"], db=None, csv=legacy)
+    assert fallback["n"].isna().all() and fallback["runtime_s"].tolist() == [0.25]
+    db = tmp_path / "results.sqlite"
+    ResultsStore(db, import_from=legacy).close()
+    df = load_runs(db=db)
+    assert list(df.columns) == [c for c, _ in RUN_COLUMNS]
+    assert df.loc[0, "flops"] == 1770 and df["workload"].isna().all()
+
+def test_readers_close_their_connections(tmp_path, monkeypatch):
+    db = tmp_path / "results.sqlite"
+    with ResultsStore(db, import_from=None) as store:
+        store.start_invocation(dict(host="h"))
+        store.add(_row("log_file_parser", "a_baseline", 0))
+    opened = []
+    connect = sqlite3.connect
+    monkeypatch.setattr(runs_io.sqlite3, "connect", lambda *a, **k: opened.append(connect(*a, **k)) or opened[-1])
+    assert max_run_id(db) == 1 and len(load_runs(db=db)) == 1
+    assert len(opened) == 2
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):  # "Cannot operate on a closed database"
+            conn.execute("SELECT 1")
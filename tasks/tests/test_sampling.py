@@ -0,0 +1,30 @@
+import math
+import numpy as np
+import pytest
+from harness.sampling import AdaptiveSampler, bootstrap_ci, rse
+
+def test_rse_and_bootstrap_ci():
+    x = np.random.default_rng(0).normal(10, 1, 400)
+    assert rse(x) == pytest.approx(x.std(ddof=1) / 20 / x.mean())
+    lo, hi = bootstrap_ci(x)
+    half = 1.96 * x.std(ddof=1) / 20
+    assert lo < x.mean() < hi and (hi - lo) / 2 == pytest.approx(half, rel=0.15)
+    assert rse([1.0]) == math.inf and rse([2.0, 2.0]) == 0.0
+
+def test_stable_metrics_stop_at_min_runs_noisy_ones_hit_budget():
+    stable = AdaptiveSampler("rse", target=0.01, min_runs=4, max_runs=30)
+    while not stable.done():
+        stable.add({"runtime_s": 1.0 + 1e-4 * stable.n, "mem_kib": 5.0, "energy_j": ""})
+    assert stable.n == 4 and stable.converged() and "energy_j" not in stable.spread()
+
+    rng = np.random.default_rng(1)
+    noisy = AdaptiveSampler("ci", target=0.01, min_runs=4, max_runs=30)
+    while not noisy.done():
+        noisy.add({"runtime_s": rng.lognormal(0, 1), "mem_kib": 5.0})
+    assert noisy.n == 30 and not noisy.converged()
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        AdaptiveSampler("mad")
+    with pytest.raises(ValueError):
+        AdaptiveSampler(min_runs=10, max_runs=5)
@@ -0,0 +1,17 @@
+import pandas as pd
+
+def _runs(workers, runtime):
+    return [dict(task_id="log_file_parser", workload="log_file_parser_sharded", workers=workers, variant="v",
+                 n=n, correct=1, runtime_s=runtime(n)) for n in (1000, 10000, 100000)]
+
+def test_worker_counts_get_separate_curves(monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    from scaling import scaling_table
+    # one row per worker count, not one curve over both
+    df = pd.DataFrame(_runs(1, lambda n: n * 1e-6) + _runs(8, lambda n: n * 1e-6 / 8)
+                      + [dict(task_id="log_file_parser", workload=None, workers=None, variant="v", n=n,
+                              correct=1, runtime_s=n * n * 1e-9) for n in (1000, 10000)])
+    t = scaling_table(df).set_index(["workload", "workers"])
+    assert abs(t.loc[("log_file_parser_sharded", 1.0), "slope"] - 1) < 1e-9
+    assert abs(t.loc[("log_file_parser_sharded", 8.0), "slope"] - 1) < 1e-9
+    assert len(t) == 3 and abs(t.xs("log_file_parser", level="workload")["slope"].iloc[0] - 2) < 1e-9
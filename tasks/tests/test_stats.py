@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from scipy import stats as sps
+
+def _runs():
+    rng = np.random.default_rng(3)
+    rows = []
+    for task in ("a", "b"):
+        for v, scale in (("v1", 1.0), ("v2", 1.3), ("v3", 1.0), ("v4", 2.0)):
+            n = 6 if v == "v4" else 10
+            for x in rng.gamma(4, scale, n):
+                rows.append(dict(task_id=task, workload=task, n=1000, workers=None, variant=v, correct=1,
+                                 runtime_s=x, mem_kib=float(int(x))))
+    rows.append(dict(task_id="a", workload="a", n=1000, workers=None, variant="v5", correct=0, runtime_s=9.0, mem_kib=9.0))
+    return pd.DataFrame(rows)
+
+def test_batched_tests_match_per_pair_scipy(monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    import stats
+    df = _runs()
+    pw, an = stats.run_tests(df, ["runtime_s", "mem_kib"])
+    for metric in ("runtime_s", "mem_kib"):
+        got = pw[metric]
+        assert len(got) == 2 * 6 and "v5" not in set(got["v1"]) | set(got["v2"])
+        for r in got.itertuples():
+            g = df[(df["task_id"] == r.task_id) & (df["correct"] == 1)]
+            a, b = g[g["variant"] == r.v1][metric], g[g["variant"] == r.v2][metric]
+            t, p = sps.ttest_ind(a, b, equal_var=False)
+            u, pu = sps.mannwhitneyu(a, b, alternative="two-sided")
+            assert np.allclose([r.t, r.p_t, r.mw, r.p_mw], [t, p, u, pu])
+        assert len(an[metric]) == 2
+    par, _ = stats.run_tests(df, ["runtime_s", "mem_kib"], jobs=2)
+    pd.testing.assert_frame_equal(par["mem_kib"], pw["mem_kib"])
+
+def test_holm_and_bh(monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    import stats
+    p = np.array([0.01, np.nan, 0.04, 0.03, 0.5])
+    assert np.allclose(stats.holm(p), [0.04, np.nan, 0.09, 0.09, 0.5], equal_nan=True)
+    assert np.allclose(stats.bh(p), [0.04, np.nan, 0.0533333, 0.0533333, 0.5], equal_nan=True)
+
+def test_sizes_and_workloads_are_not_pooled(monkeypatch):
+    monkeypatch.syspath_prepend("analysis")
+    import stats
+    df = _runs()
+    big = df[df["task_id"] == "a"].assign(n=100000, runtime_s=lambda d: d["runtime_s"] * 100)
+    sharded = df[df["task_id"] == "a"].assign(workload="a_sharded", workers=4)
+    old = df.assign(workload=None, n=None)  # runs recorded before named workloads and sizes
+    pw, an = stats.run_tests(pd.concat([df, big, sharded, old[old["task_id"] == "b"]]), ["runtime_s"])
+    got = pw["runtime_s"]
+    assert len(got) == 6 * 5 and len(an["runtime_s"]) == 5
+    small = got[(got["workload"] == "a") & (got["n"] == 1000)].reset_index(drop=True)
+    large = got[(got["workload"] == "a") & (got["n"] == 100000)].reset_index(drop=True)
+    # scaling every sample by 100 leaves each size's tests (and its own Holm family) unchanged
+    assert np.allclose(small["p_t"], large["p_t"]) and np.allclose(small["p_t_holm"], large["p_t_holm"])
+    assert set(got[got["workload"] == "a_sharded"]["workers"]) == {4}
+    assert got[got["task_id"] == "b"]["n"].isna().sum() == 6
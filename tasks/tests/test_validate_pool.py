@@ -0,0 +1,59 @@
+from harness.validate_pool import Limits, Verdict, VerdictCache, validate_cached, validate_isolated, validate_many
+
+def _candidate(tmp_path, monkeypatch, name, body, package="vp_candidates"):
+    pkg = tmp_path / package
+    pkg.mkdir(exist_ok=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / f"{name}.py").write_text(body)
+    monkeypatch.setenv("PYTHONPATH", f"{tmp_path}:.")
+    return f"{package}.{name}"
+
+GOOD = "def run_task(n=1000):\n    return float(sum(range(n)))\n"
+
+def test_limits_classify_bad_candidates(tmp_path, monkeypatch):
+    good = _candidate(tmp_path, monkeypatch, "good", GOOD)
+    loop = _candidate(tmp_path, monkeypatch, "loop", "while True:\n    pass\n")
+    oom = _candidate(tmp_path, monkeypatch, "oom", "x = bytearray(8 * 1024 ** 3)\n")
+    limits = Limits(mem_mb=512, cpu_s=1, timeout_s=10)
+    assert validate_isolated("modular_example", good, limits).status == "valid"
+    assert validate_isolated("modular_example", loop, limits).status == "cpu_limit"
+    assert validate_isolated("modular_example", oom, limits).status == "mem_limit"
+    assert validate_isolated("modular_example", loop, Limits(cpu_s=30, timeout_s=0.5)).status == "timeout"
+
+def test_exhaustion_inside_run_task_is_a_limit_not_invalid(tmp_path, monkeypatch):
+    # validate() must not swallow these as an ordinary wrong answer
+    oom = _candidate(tmp_path, monkeypatch, "oom_call", "def run_task(n=1000):\n    return bytearray(8 * 1024 ** 3)\n")
+    deep = _candidate(tmp_path, monkeypatch, "deep", "def run_task(n=1000):\n    return run_task(n)\n")
+    limits = Limits(mem_mb=512, cpu_s=10, timeout_s=30)
+    assert validate_isolated("modular_example", oom, limits).status == "mem_limit"
+    assert validate_isolated("modular_example", deep, limits).status == "crashed"
+
+def test_validate_many_caches_by_file_hash(tmp_path, monkeypatch):
+    good = _candidate(tmp_path, monkeypatch, "good", GOOD)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    cache = VerdictCache(tmp_path / "verdicts.json")
+    first = validate_many([("modular_example", good)], workers=2, cache=cache)
+    again = validate_many([("modular_example", good)], workers=2, cache=VerdictCache(tmp_path / "verdicts.json"))
+    assert first[0].ok and not first[0].cached
+    assert again[0].ok and again[0].cached
+
+def test_save_merges_verdicts_from_other_processes(tmp_path, monkeypatch):
+    # own package: vp_candidates may already be imported from another test's tmp_path
+    good = _candidate(tmp_path, monkeypatch, "good", GOOD, "vp_merge")
+    other = _candidate(tmp_path, monkeypatch, "other", GOOD + "# other\n", "vp_merge")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    path = tmp_path / "verdicts.json"
+    a, b = VerdictCache(path), VerdictCache(path)  # e.g. two parallel harness.run processes
+    validate_cached("modular_example", good, cache=a)
+    validate_cached("modular_example", other, cache=b)
+    a.save()
+    b.save()
+    fresh = VerdictCache(path)
+    assert all(validate_cached("modular_example", m, cache=fresh).cached for m in (good, other))
+
+def test_timing_dependent_verdicts_are_not_cached(tmp_path):
+    cache = VerdictCache(tmp_path / "verdicts.json")
+    for status in ("too_slow", "cpu_limit", "timeout"):
+        cache.put(status, Verdict("modular_example", "x", status))
+    cache.put("valid", Verdict("modular_example", "x", "valid"))
+    assert [k for k in ("too_slow", "cpu_limit", "timeout", "valid") if cache.get(k)] == ["valid"]
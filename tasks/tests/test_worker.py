@@ -0,0 +1,44 @@
+import os, signal, stat
+import pytest
+from harness.worker import MeasurementWorker, WorkerError
+
+IMPL = "tasks.reference.log_file_parser"
+
+# Stand-in for perf: rejects --control (as old perf builds do) and, when attached,
+# prints CSV counters to stderr on SIGINT like `perf stat -x ,`.
+FAKE_PERF = """#!/bin/sh
+case "$*" in *--control*) echo "unknown option: control" >&2; exit 129;; esac
+trap 'echo "4000,,instructions:u,,100.00,," >&2; echo "3000,,cycles:u,,100.00,," >&2; exit 0' INT
+while true; do sleep 0.01; done
+"""
+
+def test_setup_run_quit_round_trip():
+    with MeasurementWorker("log_file_parser", IMPL, 50) as w:
+        w.setup(2)
+        assert w.run(3) > 0
+        proc = w.proc
+    assert proc.wait(timeout=5) == 0
+
+def test_startup_error_is_reported():
+    with pytest.raises(WorkerError):
+        MeasurementWorker("log_file_parser", "tasks.reference.no_such_module", 50)
+
+def test_worker_death_raises():
+    w = MeasurementWorker("log_file_parser", IMPL, 50)
+    os.kill(w.pid, signal.SIGKILL)
+    w.proc.wait(timeout=5)
+    with pytest.raises((WorkerError, OSError)):
+        w.run()
+    w.close()
+
+def test_falls_back_to_plain_attach_without_perf_control(tmp_path, monkeypatch, capsys):
+    perf = tmp_path / "perf"
+    perf.write_text(FAKE_PERF)
+    perf.chmod(perf.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    with MeasurementWorker("log_file_parser", IMPL, 2000) as w:
+        c = w.perf_counters(["cycles", "instructions"], iters=2)
+        assert not w._use_control
+        assert (c.cycles, c.instructions) == (1500, 2000)
+        w.perf_counters(["cycles", "instructions"])  # stays on plain attach, no second warning
+    assert capsys.readouterr().out.count("falling back to plain attach") == 1
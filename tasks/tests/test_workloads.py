@@ -0,0 +1,53 @@
+import importlib, subprocess, sys
+from harness.workloads import WORKLOADS, prepare, snippet
+
+REFERENCES = {
+    "inefficient_sort": "tasks.reference.inefficient_sort_human",
+    "modular_example": "tasks.reference.modular_example_human",
+    "unit_test_gen": "tasks.reference.unit_test_gen_human",
+    "log_file_parser": "tasks.reference.log_file_parser",
+    "json_data_normalizer": "tasks.reference.json_data_normalizer",
+    "cache_with_expiry": "tasks.reference.cache_with_expiry",
+}
+
+def test_every_workload_runs_reference():
+    for task_id, wl in WORKLOADS.items():
+        mod = importlib.import_module(REFERENCES[wl.task_id])
+        w = prepare(task_id, mod, 50 if wl.size else None)
+        w.setup()
+        w.run()
+
+def test_log_workload_fixture_built_in_setup():
+    mod = importlib.import_module(REFERENCES["log_file_parser"])
+    w = prepare("log_file_parser", mod, 30)
+    w.setup(2)
+    assert len(w._fixtures) == 2
+    out = w.run()
+    assert set(out) == {"E123", "E42"}
+    assert w._fixtures == []
+
+def test_snippet_runs_in_child():
+    code = snippet("json_data_normalizer", REFERENCES["json_data_normalizer"], 10)
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+def test_snippet_honours_no_gc():
+    # report the collector state from inside run()
+    spy = ("import gc, harness.workloads as hw; _run = hw.PreparedWorkload.run\n"
+           "hw.PreparedWorkload.run = lambda self: (print(gc.isenabled()), _run(self))[1]\n")
+    for no_gc, want in ((True, "False"), (False, "True")):
+        code = spy + snippet("modular_example", REFERENCES["modular_example"], 10, no_gc=no_gc)
+        out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+        assert out.split() == [want]
+
+def test_ndjson_workload_reports_rows():
+    mod = importlib.import_module(REFERENCES["json_data_normalizer"])
+    w = prepare("json_data_normalizer_ndjson", mod, 50)
+    w.setup()
+    assert w.run() == w.last_units == len(mod.normalize_records(importlib.import_module("harness.workloads").build_records(50)))
+
+def test_concurrent_cache_workload_reports_p99():
+    mod = importlib.import_module(REFERENCES["cache_with_expiry"])
+    w = prepare("cache_with_expiry_concurrent", mod, 200, workers=3)
+    w.setup()
+    assert len(w.run()) == w.last_units == 200
+    assert w.summarize().startswith("p99=")
@@ -1,12 +1,24 @@
 from importlib import import_module
 import math, inspect, time
 
-def _accepts_seed(fn):
+def _accepts(fn, param: str):
     try:
-        return "seed" in inspect.signature(fn).parameters
+        return param in inspect.signature(fn).parameters
     except Exception:
         return False
 
+def _accepts_seed(fn):
+    return _accepts(fn, "seed")
+
+class _FakeClock:
+    """Injected into caches that take a `clock`, so expiry is tested without sleeping."""
+    def __init__(self):
+        self.now = 1_000_000.0
+    def __call__(self):
+        return self.now
+    def advance(self, seconds: float):
+        self.now += seconds
+
 def _as_list(x):
     # normalize numpy arrays and tuples to a Python list; reject others
     try:
@@ -37,11 +49,16 @@ def _sort_rows(rows):
     # Stable sort for list[dict] based on common keys used in json_data_normalizer
     return sorted(rows, key=lambda r: (r.get("record_id"), r.get("sku") or ""))
 
+# Resource exhaustion is not a wrong answer: these propagate, so the sandboxed
+# validation child (harness.validate_pool) reports mem_limit / crashed instead of invalid.
+_FATAL = (MemoryError, RecursionError)
+
 def validate(task_id: str, impl_module: str) -> bool:
     """
     Returns True iff the candidate implementation in `impl_module` passes
     task-specific correctness checks. Any exception or signature mismatch
-    is treated as invalid (False), not a hard crash.
+    is treated as invalid (False), not a hard crash; MemoryError and
+    RecursionError are re-raised.
     """
     mod = import_module(impl_module)
     # For cache_with_expiry, we can validate without run_task function
@@ -101,7 +118,9 @@ def validate(task_id: str, impl_module: str) -> bool:
                 {"id": 13, "timestamp": "t4"},  # no items
             ]
             out = mod.run_task(data)
-            if not isinstance(out, list):
+            # list[dict], or the reference's columnar row view; other sequences (tuples etc.) are invalid
+            from tasks.reference.json_data_normalizer import ColumnarRows
+            if not isinstance(out, (list, ColumnarRows)) or not all(isinstance(r, dict) for r in out):
                 return False
             want = [
                 {"record_id":10,"timestamp":"t1","user_id":1,"user_name":"Ann","sku":"A","qty":2},
@@ -111,6 +130,8 @@ def validate(task_id: str, impl_module: str) -> bool:
             try:
                 # compare as sets with deterministic ordering
                 return _sort_rows(out) == _sort_rows(want)
+            except _FATAL:
+                raise
             except Exception:
                 return False
 
@@ -143,8 +164,9 @@ def validate(task_id: str, impl_module: str) -> bool:
                 return False
             
             try:
-                # Test with 1 second TTL
-                cache = mod.ExpiringCache(1)
+                # Test with 1 second TTL (fake clock when the cache accepts one)
+                clock = _FakeClock() if _accepts(mod.ExpiringCache, "clock") else None
+                cache = mod.ExpiringCache(1, clock=clock) if clock else mod.ExpiringCache(1)
                 
                 # Test 1: get from empty cache should return None
                 if cache.get("test_key") is not None:
@@ -156,7 +178,10 @@ def validate(task_id: str, impl_module: str) -> bool:
                     return False
                 
                 # Test 3: after TTL expires, should return None
-                time.sleep(1.1)  # Wait slightly longer than TTL
+                if clock:
+                    clock.advance(1.1)
+                else:
+                    time.sleep(1.1)  # Wait slightly longer than TTL
                 if cache.get("test_key") is not None:
                     return False
                 
@@ -172,9 +197,13 @@ def validate(task_id: str, impl_module: str) -> bool:
                 
                 return True
                 
+            except _FATAL:
+                raise
             except Exception:
                 return False
 
+    except _FATAL:
+        raise
     except TypeError:
         # wrong signature → treat as invalid, not a hard crash
         return False